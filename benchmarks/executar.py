@@ -0,0 +1,336 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import matplotlib
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from supervisorio.cache_graficos import figura_para_png
+from supervisorio.canais import CANAIS_ARMAZENADOS, FASES
+from supervisorio.catalogo import nome_medidor
+from supervisorio.derivados import CacheJanelas
+from supervisorio.fasores import DFTDeslizante, canais_fasoriais
+from supervisorio.frota import ServicoFrota
+from supervisorio.graficos import PONTOS_GRAFICO, desenhar_serie
+from supervisorio.potencia import AMOSTRAS_POR_CICLO, CICLOS_POR_JANELA, FREQUENCIA
+from supervisorio.reducao import reduzir
+from supervisorio.servico import ServicoIngestao
+from supervisorio.simulador import SimuladorCarga, gravar
+from supervisorio.sintetico import gerar_dados_eletricos
+
+# =======================================================================
+# BENCHMARKS DOS CAMINHOS DE DADOS E DE DESENHO
+# Gera conjuntos sintéticos de 1 hora a 1 ano em resolução de 1 segundo e
+# mede, para cada um, as etapas por onde passa um gráfico da página
+# inicial: geração/carga, recorte da janela, canais derivados, redução,
+# consulta à pirâmide e desenho do PNG, além de um rerun completo da
+# página via AppTest. Uma frota simulada mede os resumos e os totais dos
+# medidores, em série e no pool de processos. Cada etapa registra o melhor tempo de N execuções e
+# o pico de memória alocada (tracemalloc). O resultado vai para JSON e
+# pode ser comparado com uma base salva:
+#
+#   python -m benchmarks.executar --tamanhos 1h,1d,7d --salvar-base benchmarks/base.json
+#   python -m benchmarks.executar --base benchmarks/base.json
+#
+# A saída é 1 quando alguma etapa fica mais lenta que a base além da
+# tolerância.
+# =======================================================================
+
+TAMANHOS = {
+    "1h": pd.Timedelta(hours=1),
+    "1d": pd.Timedelta(days=1),
+    "7d": pd.Timedelta(days=7),
+    "30d": pd.Timedelta(days=30),
+    "1ano": pd.Timedelta(days=365),
+}
+TAMANHOS_PADRAO = "1h,1d,7d,30d"
+# Os mesmos períodos do seletor da página inicial.
+PERIODOS = {
+    "15 Minutos": pd.Timedelta(minutes=15),
+    "1 Hora": pd.Timedelta(hours=1),
+    "24 Horas": pd.Timedelta(hours=24),
+    "7 Dias": pd.Timedelta(days=7),
+    "30 Dias": pd.Timedelta(days=30),
+    "1 Ano": pd.Timedelta(days=365),
+}
+CANAIS_GRAFICO = [f"Tensão Fase {fase}" for fase in FASES]
+CANAIS_DERIVADOS_GRAFICO = [f"Fator de Potência {fase}" for fase in FASES]
+LINHAS_POR_BLOCO = 1_000_000
+# O motor de formas de onda sintetiza 12 ciclos por linha; mede-se a vazão
+# em um trecho limitado em vez de gerar o conjunto inteiro por ele.
+LINHAS_GERACAO = 600
+# DFT deslizante: 1 s de formas de onda (tensão e corrente das 3 fases) de
+# vários medidores em um único bloco.
+MEDIDORES_FASORES = 64
+MEDIDORES_FROTA = 24
+DURACAO_FROTA = pd.Timedelta(hours=12)
+TOLERANCIA = 0.25
+DIFERENCA_MINIMA = 0.005
+ARQUIVO_APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "streamlit_app.py")
+
+
+def avisar(mensagem):
+    print(mensagem, file=sys.stderr, flush=True)
+
+
+def medir(funcao, repeticoes=1):
+    # Uma execução com tracemalloc para o pico de memória e `repeticoes`
+    # execuções sem rastreamento para o tempo (fica o melhor).
+    tracemalloc.start()
+    resultado = funcao()
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return resultado, {"segundos": min(tempos), "pico_mb": pico / 2**20}
+
+
+def gerar_rapido(tempos, rng):
+    # Canais gravados com tendência diária e ruído, sem passar pelo motor de
+    # formas de onda (que é medido à parte).
+    n = len(tempos)
+    dia = np.sin(2 * np.pi * (tempos.asi8 % 86_400_000_000_000) / 86_400_000_000_000)
+    dados = {}
+    for k, fase in enumerate(FASES):
+        v = 127 + 2 * dia + rng.normal(0, 0.5, n)
+        i = 10 + 3 * dia + rng.normal(0, 0.3, n) + k
+        fp = np.clip(0.92 + rng.normal(0, 0.02, n), 0.5, 1.0)
+        p = v * i * fp
+        dados[f"Tensão Fase {fase}"] = v
+        dados[f"Corrente {fase}"] = i
+        dados[f"Potência Ativa {fase}"] = p
+        dados[f"Potência Reativa {fase}"] = v * i * np.sqrt(1 - fp**2)
+        dados[f"THD Tensão {fase}"] = np.abs(3 + rng.normal(0, 0.3, n))
+        dados[f"THD Corrente {fase}"] = np.abs(15 + rng.normal(0, 2, n))
+    for a, b in (("A", "B"), ("B", "C"), ("C", "A")):
+        dados[f"Tensão Linha {a}{b}"] = np.sqrt(3) * (dados[f"Tensão Fase {a}"] + dados[f"Tensão Fase {b}"]) / 2
+    # Fasores montados direto dos módulos, com um pequeno desvio de ângulo.
+    angulos = np.deg2rad([0, -120, 120])[:, None] + rng.normal(0, 0.01, (len(FASES), n))
+    tensoes = np.stack([dados[f"Tensão Fase {fase}"] for fase in FASES]) * np.exp(1j * angulos)
+    correntes = np.stack([dados[f"Corrente {fase}"] for fase in FASES]) * np.exp(1j * (angulos - np.deg2rad(23)))
+    dados.update(canais_fasoriais(tensoes, correntes))
+    return {c: dados[c].astype(np.float32) for c in CANAIS_ARMAZENADOS}
+
+
+def carregar(diretorio, duracao, fim, rng):
+    # Ingestão pelo mesmo caminho do serviço (armazenamento, pirâmide,
+    # integradores e agregados), em blocos; só a ingestão entra no tempo.
+    servico = ServicoIngestao(diretorio, fonte=None)
+    tempos = pd.date_range(end=fim, periods=int(duracao / pd.Timedelta(seconds=1)), freq="s")
+    gasto = 0.0
+    tracemalloc.start()
+    for a in range(0, len(tempos), LINHAS_POR_BLOCO):
+        bloco = tempos[a:a + LINHAS_POR_BLOCO]
+        dados = gerar_rapido(bloco, rng)
+        inicio = time.perf_counter()
+        servico.ingerir(bloco, dados)
+        gasto += time.perf_counter() - inicio
+    pico = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return servico, {"segundos": gasto, "pico_mb": pico / 2**20, "linhas_por_segundo": len(tempos) / gasto}
+
+
+def medir_periodo(servico, inicio, fim, repeticoes):
+    etapas = {}
+    instantaneo = servico.instantaneo
+
+    df_bruto, etapas["janela"] = medir(lambda: instantaneo.series.janela(inicio, fim, CANAIS_GRAFICO).para_dataframe(), repeticoes)
+
+    def derivar():
+        # Cache novo a cada execução: mede o cálculo, não o acerto.
+        servico.leitura.cache = CacheJanelas()
+        return servico.leitura.series(CANAIS_DERIVADOS_GRAFICO).janela(inicio, fim).para_dataframe()
+    _, etapas["derivar"] = medir(derivar, repeticoes)
+
+    x, y = df_bruto.index.values, df_bruto.to_numpy()
+    _, etapas["reduzir_minmax"] = medir(lambda: reduzir(x, y, PONTOS_GRAFICO, "minmax"), repeticoes)
+    _, etapas["reduzir_lttb"] = medir(lambda: reduzir(x, y, PONTOS_GRAFICO, "lttb"), repeticoes)
+
+    df_grafico, etapas["consultar"] = medir(lambda: servico.piramide.consultar(inicio, fim, CANAIS_GRAFICO, PONTOS_GRAFICO, "envelope", instantaneo.series)[1], repeticoes)
+    _, etapas["renderizar"] = medir(lambda: figura_para_png(desenhar_serie(df_grafico, "Tensões de Fase por Tempo", "Tensão (V)")), repeticoes)
+    etapas["consultar"]["linhas"] = len(df_grafico)
+    etapas["janela"]["linhas"] = len(df_bruto)
+    return etapas
+
+
+def medir_pagina(diretorio, periodos, repeticoes):
+    from streamlit.testing.v1 import AppTest
+
+    # O serviço da página é um st.cache_resource: limpa para abrir este conjunto.
+    st.cache_resource.clear()
+    os.environ["SUPERVISORIO_DADOS"] = diretorio
+    app = AppTest.from_file(ARQUIVO_APP, default_timeout=600)
+    etapas = {}
+    tracemalloc.start()
+    inicio = time.perf_counter()
+    app.run()
+    etapas["pagina_primeira_execucao"] = {"segundos": time.perf_counter() - inicio, "pico_mb": tracemalloc.get_traced_memory()[1] / 2**20}
+    tracemalloc.stop()
+    for periodo in periodos:
+        app.selectbox[0].set_value(periodo)
+        _, etapas[f"pagina_rerun ({periodo})"] = medir(lambda: app.run(), repeticoes)
+        if app.exception:
+            raise RuntimeError(f"A página falhou no período {periodo}: {app.exception[0].value}")
+    return etapas
+
+
+def medir_frota(diretorio, repeticoes):
+    # Frota gravada pelo simulador; os totais são calculados de novo a cada
+    # execução (cache limpo), em um processo e no pool.
+    fim = pd.Timestamp.now().floor("h")
+    inicio = fim - DURACAO_FROTA
+    _, carregar_frota = medir(lambda: gravar(SimuladorCarga(0, MEDIDORES_FROTA), diretorio, inicio, fim))
+    etapas = {"carregar": carregar_frota}
+    frota = ServicoFrota(diretorio)
+    medidores = list(frota.medidores())
+    _, etapas["resumos"] = medir(lambda: frota.resumos("Último Dia"), repeticoes)
+    for nome, processos in (("totais_serial", 1), ("totais_pool", os.cpu_count())):
+        frota.processos = processos
+
+        def totais():
+            frota._totais.clear()
+            return frota.totais(medidores, inicio, fim, PONTOS_GRAFICO)
+        _, etapas[nome] = medir(totais, repeticoes)
+        etapas[nome]["processos"] = processos
+    frota.parar()
+    return etapas
+
+
+def executar(tamanhos, repeticoes=3, diretorio=None, pagina=True, manter=False, frota=True):
+    rng = np.random.default_rng(0)
+    raiz = tempfile.mkdtemp(prefix="benchmark_", dir=diretorio)
+    resultados = {}
+    try:
+        avisar(f"motor de formas de onda: {LINHAS_GERACAO} linhas")
+        amostra = pd.date_range(end=pd.Timestamp.now().floor("s"), periods=LINHAS_GERACAO, freq="s")
+        _, gerar = medir(lambda: gerar_dados_eletricos(amostra, np.random.default_rng(0)), 1)
+        gerar["linhas_por_segundo"] = LINHAS_GERACAO / gerar["segundos"]
+        amostras = FREQUENCIA * AMOSTRAS_POR_CICLO
+        ondas = rng.normal(0, 1, (MEDIDORES_FASORES, 2, len(FASES), amostras))
+        _, fasores = medir(lambda: DFTDeslizante(ondas.shape[:-1]).processar(ondas, AMOSTRAS_POR_CICLO * CICLOS_POR_JANELA), repeticoes)
+        fasores["amostras_por_segundo"] = ondas.size / fasores["segundos"]
+        # Medidores trifásicos acompanhados em tempo real por um núcleo.
+        fasores["medidores_tempo_real"] = MEDIDORES_FASORES / fasores["segundos"]
+        resultados["motor"] = {"linhas": LINHAS_GERACAO, "etapas": {"gerar": gerar, "dft_deslizante": fasores}}
+        if frota:
+            avisar(f"frota: {MEDIDORES_FROTA} medidores de {DURACAO_FROTA}")
+            linhas_frota = MEDIDORES_FROTA * int(DURACAO_FROTA.total_seconds())
+            resultados["frota"] = {"linhas": linhas_frota, "etapas": medir_frota(os.path.join(raiz, "frota"), repeticoes)}
+
+        for nome in tamanhos:
+            duracao = TAMANHOS[nome]
+            avisar(f"[{nome}] gerando e carregando {int(duracao.total_seconds())} linhas")
+            fim = pd.Timestamp.now().floor("s")
+            etapas = {}
+            # Uma frota de um medidor, como a página abre o conjunto.
+            diretorio_tamanho = os.path.join(raiz, nome)
+            servico, etapas["carregar"] = carregar(os.path.join(diretorio_tamanho, nome_medidor(0)), duracao, fim, rng)
+
+            periodos = [p for p, d in PERIODOS.items() if d <= duracao]
+            for periodo in periodos:
+                avisar(f"[{nome}] período {periodo}")
+                fim_periodo = fim + pd.Timedelta(1, "ns")
+                for etapa, medida in medir_periodo(servico, fim_periodo - PERIODOS[periodo], fim_periodo, repeticoes).items():
+                    etapas[f"{etapa} ({periodo})"] = medida
+            if pagina:
+                avisar(f"[{nome}] rerun da página")
+                etapas.update(medir_pagina(diretorio_tamanho, periodos, repeticoes))
+            resultados[nome] = {"linhas": int(duracao.total_seconds()), "etapas": etapas}
+    finally:
+        if not manter:
+            shutil.rmtree(raiz, ignore_errors=True)
+    return {
+        "gerado_em": pd.Timestamp.now().isoformat(),
+        "ambiente": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "processadores": os.cpu_count(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "matplotlib": matplotlib.__version__,
+            "streamlit": st.__version__,
+        },
+        "repeticoes": repeticoes,
+        "resultados": resultados,
+    }
+
+
+def comparar(atual, base, tolerancia=TOLERANCIA):
+    # Etapas presentes nas duas execuções que ficaram mais lentas que a base
+    # além da tolerância (e de uma diferença mínima, contra ruído).
+    regressoes = []
+    for nome, resultado in atual["resultados"].items():
+        etapas_base = base["resultados"].get(nome, {}).get("etapas", {})
+        for etapa, medida in resultado["etapas"].items():
+            anterior = etapas_base.get(etapa)
+            if anterior is None:
+                continue
+            razao = medida["segundos"] / anterior["segundos"] if anterior["segundos"] > 0 else float("inf")
+            if razao > 1 + tolerancia and medida["segundos"] - anterior["segundos"] > DIFERENCA_MINIMA:
+                regressoes.append({"tamanho": nome, "etapa": etapa, "base": anterior["segundos"], "atual": medida["segundos"], "razao": razao})
+    return regressoes
+
+
+def imprimir(resultado):
+    for nome, dados in resultado["resultados"].items():
+        print(f"\n== {nome} ({dados['linhas']} linhas) ==")
+        for etapa, medida in dados["etapas"].items():
+            print(f"  {etapa:<40} {medida['segundos'] * 1000:10.1f} ms {medida['pico_mb']:9.1f} MB")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Benchmarks dos caminhos de dados e de desenho do supervisório.")
+    parser.add_argument("--tamanhos", default=TAMANHOS_PADRAO, help=f"Conjuntos a medir, separados por vírgula ({', '.join(TAMANHOS)}).")
+    parser.add_argument("--repeticoes", type=int, default=3, help="Execuções por etapa; vale o melhor tempo.")
+    parser.add_argument("--saida", default=os.path.join("benchmarks", "resultado.json"), help="Arquivo JSON com o resultado.")
+    parser.add_argument("--base", help="JSON de uma execução anterior para comparar.")
+    parser.add_argument("--salvar-base", help="Também grava o resultado como nova base neste caminho.")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA, help="Aumento relativo tolerado antes de acusar regressão.")
+    parser.add_argument("--sem-pagina", action="store_true", help="Não mede o rerun da página via AppTest.")
+    parser.add_argument("--sem-frota", action="store_true", help="Não mede a frota simulada.")
+    parser.add_argument("--diretorio", help="Onde criar os conjuntos sintéticos (padrão: temporário do sistema).")
+    parser.add_argument("--manter", action="store_true", help="Mantém os conjuntos gerados.")
+    args = parser.parse_args(argumentos)
+
+    tamanhos = [t.strip() for t in args.tamanhos.split(",") if t.strip()]
+    desconhecidos = [t for t in tamanhos if t not in TAMANHOS]
+    if desconhecidos:
+        parser.error(f"Tamanhos desconhecidos: {', '.join(desconhecidos)}")
+
+    resultado = executar(tamanhos, args.repeticoes, args.diretorio, not args.sem_pagina, args.manter, not args.sem_frota)
+    imprimir(resultado)
+    for caminho in filter(None, [args.saida, args.salvar_base]):
+        os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    if args.base:
+        with open(args.base, encoding="utf-8") as f:
+            base = json.load(f)
+        regressoes = comparar(resultado, base, args.tolerancia)
+        resultado["regressoes"] = regressoes
+        if args.saida:
+            with open(args.saida, "w", encoding="utf-8") as f:
+                json.dump(resultado, f, ensure_ascii=False, indent=2)
+        if regressoes:
+            print(f"\n{len(regressoes)} regressão(ões) acima de {args.tolerancia:.0%}:")
+            for r in regressoes:
+                print(f"  [{r['tamanho']}] {r['etapa']}: {r['base'] * 1000:.1f} ms -> {r['atual'] * 1000:.1f} ms ({r['razao']:.2f}x)")
+            return 1
+        print("\nSem regressões em relação à base.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
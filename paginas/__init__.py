@@ -0,0 +1,43 @@
+import os
+
+from supervisorio.catalogo import carregar_dispositivos, listar_medidores, nome_medidor, nome_site
+
+# =======================================================================
+# PÁGINAS DO SUPERVISÓRIO
+# Rótulo no menu lateral: módulo da página. Cada módulo expõe
+# `renderizar(perfilador)` e só é importado quando a página é aberta pela
+# primeira vez no processo; as dependências pesadas (matplotlib, Plotly,
+# pyarrow) entram junto com a página, ou no primeiro gráfico, que as usa.
+# As páginas mostram o medidor escolhido na barra lateral; a frota e os
+# sites têm uma página própria.
+# =======================================================================
+
+PAGINAS = {
+    "Página Inicial": "paginas.inicial",
+    "GERAL": "paginas.geral",
+    "Outros": "paginas.outros",
+}
+PAGINA_FROTA = "paginas.frota"
+
+
+def diretorio_dados():
+    # Lido a cada chamada: os benchmarks trocam de conjunto no mesmo processo.
+    return os.environ.get("SUPERVISORIO_DADOS", "dados")
+
+
+def medidores_ao_vivo():
+    # {medidor: site} ingeridos por este processo: os dispositivos Modbus de
+    # SUPERVISORIO_DISPOSITIVOS ou SUPERVISORIO_MEDIDORES simulados (padrão 1).
+    dispositivos = os.environ.get("SUPERVISORIO_DISPOSITIVOS")
+    if dispositivos:
+        return {d["medidor"]: d["site"] for d in carregar_dispositivos(dispositivos)}
+    return {nome_medidor(k): nome_site(k) for k in range(int(os.environ.get("SUPERVISORIO_MEDIDORES", "1")))}
+
+
+def visoes():
+    # Rótulo no seletor: ("frota", None), ("site", site) ou ("medidor", medidor).
+    medidores = {**medidores_ao_vivo(), **listar_medidores(diretorio_dados())}
+    opcoes = {"Frota (todos os medidores)": ("frota", None)}
+    opcoes.update({f"Site {site}": ("site", site) for site in sorted(set(medidores.values()))})
+    opcoes.update({f"{medidor} ({site})": ("medidor", medidor) for medidor, site in sorted(medidores.items())})
+    return opcoes
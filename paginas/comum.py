@@ -0,0 +1,57 @@
+import os
+
+import streamlit as st
+
+from paginas import diretorio_dados, medidores_ao_vivo
+from supervisorio.aquisicao import ServicoAquisicao
+from supervisorio.cache_graficos import CacheGraficos
+from supervisorio.catalogo import carregar_dispositivos
+from supervisorio.frota import ServicoFrota
+from supervisorio.simulador import FonteSimulada, SimuladorCarga
+from supervisorio.sintetico import FonteSintetica
+
+# =======================================================================
+# RECURSOS COMPARTILHADOS PELAS PÁGINAS
+# Um único serviço de frota por processo grava os dados dos medidores e
+# publica instantâneos imutáveis; cada sessão apenas lê o instantâneo mais
+# recente do medidor escolhido.
+# =======================================================================
+
+
+@st.cache_resource
+def obter_frota():
+    # Com SUPERVISORIO_DISPOSITIVOS, os dados vêm dos medidores Modbus-TCP;
+    # com SUPERVISORIO_SEMENTE, do simulador de carga (reprodutível).
+    dispositivos = os.environ.get("SUPERVISORIO_DISPOSITIVOS")
+    semente = os.environ.get("SUPERVISORIO_SEMENTE")
+    ao_vivo = medidores_ao_vivo()
+    if dispositivos:
+        aquisicao = ServicoAquisicao(carregar_dispositivos(dispositivos))
+        aquisicao.iniciar()
+        fontes = aquisicao.fontes
+    elif semente:
+        simulador = SimuladorCarga(int(semente), len(ao_vivo))
+        fontes = {medidor: FonteSimulada(simulador, k) for k, medidor in enumerate(ao_vivo)}
+    else:
+        fontes = {medidor: FonteSintetica() for medidor in ao_vivo}
+    frota = ServicoFrota(diretorio_dados(), fontes, sites=ao_vivo)
+    frota.iniciar()
+    return frota
+
+
+@st.cache_resource
+def obter_cache_graficos():
+    return CacheGraficos()
+
+
+def abrir_servico(perfilador, exigir_dados=True):
+    # (serviço do medidor escolhido na barra lateral, instantâneo publicado
+    # para esta execução). Com exigir_dados, um medidor ainda sem dados (ex.:
+    # escolhido antes da primeira leitura Modbus) encerra a página aqui.
+    with perfilador.medir("Serviço e instantâneo"):
+        servico = obter_frota().servico(st.session_state["selecao"][1])
+        instantaneo = servico.instantaneo
+    if exigir_dados and instantaneo.ultimo_timestamp is None:
+        st.info("Sem dados ainda.")
+        st.stop()
+    return servico, instantaneo
@@ -0,0 +1,75 @@
+import pandas as pd
+import streamlit as st
+
+from paginas.comum import obter_frota
+from supervisorio.agregados import JANELAS
+from supervisorio.frota import agregar_resumos
+from supervisorio.potencia import CAPACITIVO, INDUTIVO
+
+PONTOS_GRAFICO_FROTA = 300
+NATUREZAS = {INDUTIVO: "indutivo", CAPACITIVO: "capacitivo"}
+
+
+# -----------------------------------------------------------------------
+# FROTA E SITES
+# -----------------------------------------------------------------------
+def renderizar(perfilador):
+    tipo, site = st.session_state["selecao"]
+    frota = obter_frota()
+    medidores = [m for m, s in frota.medidores().items() if tipo == "frota" or s == site]
+    st.header("🏭 Frota" if tipo == "frota" else f"🏭 Site {site}")
+    if not medidores:
+        st.info("Nenhum medidor na frota.")
+        return
+
+    # Tudo o que está acima dos gráficos sai dos resumos gravados por cada
+    # medidor: nenhuma série é lida aqui.
+    janela = st.selectbox("Janela de análise:", options=list(JANELAS), index=0, key="janela_frota")
+    with perfilador.medir("Resumos da frota"):
+        resumos = frota.resumos(janela, medidores)
+        total = agregar_resumos(resumos, por=None).iloc[0]
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Medidores", f"{int(resumos['Linhas'].gt(0).sum())} de {len(medidores)} com dados")
+    col2.metric("Demanda atual", f"{total['Potência Ativa'] / 1000:.2f} kW", f"Média: {total['Potência Ativa Média'] / 1000:.2f} kW", delta_color="off")
+    col3.metric("Soma das demandas máximas", f"{total['Demanda Máxima'] / 1000:.2f} kW")
+    col3.caption("Cada medidor soma as máximas de suas fases (15 min).")
+    col4.metric("Energia ativa", f"{total['Energia Ativa'] / 1000:.2f} kWh")
+
+    col1, col2, col3, col4 = st.columns(4)
+    pior = total["Medidor com Pior FP"]
+    col1.metric(f"Pior FP ({janela})", f"{total['FP Mínimo']:.2f}")
+    if isinstance(pior, str):
+        linha = resumos.loc[pior]
+        instante = pd.Timestamp(linha["FP Mínimo Instante"])
+        col1.caption(f"{pior}, fase {linha['FP Mínimo Fase']} ({NATUREZAS.get(linha['FP Mínimo Natureza'], '-')}) em {instante:%d/%m %H:%M}")
+    col2.metric("Tensão mínima", f"{total['Tensão Mínima']:.1f} V")
+    col3.metric("Tensão máxima", f"{total['Tensão Máxima']:.1f} V")
+    col4.metric("Maior desequilíbrio", f"{total['Desequilíbrio Máximo']:.2f} %")
+    st.divider()
+
+    if tipo == "frota":
+        st.subheader("Sites")
+        st.dataframe(agregar_resumos(resumos), width="stretch")
+    st.subheader("Medidores")
+    colunas = ["Site", "Último Instante", "Potência Ativa", "Potência Ativa Média", "Demanda Máxima", "FP Mínimo", "Tensão Mínima", "Tensão Máxima", "Desequilíbrio Máximo"]
+    st.dataframe(resumos[colunas], width="stretch")
+    st.divider()
+
+    # Os totais no tempo somam os rollups dos medidores em um pool de processos.
+    st.subheader(f"Totais ({janela})")
+    ultimo = resumos["Último Instante"].max()
+    if pd.isna(ultimo):
+        st.caption("Sem dados ainda.")
+        return
+    fim = ultimo + pd.Timedelta(1, "ns")
+    with perfilador.medir("Totais dos medidores (pool de processos)"):
+        nivel, totais = frota.totais(medidores, fim - JANELAS[janela][0], fim, PONTOS_GRAFICO_FROTA)
+    st.caption(f"Médias de {nivel} de {len(medidores)} medidores, somadas. O intervalo ainda aberto não entra.")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Potências (kW, kvar, kVA)**")
+        st.line_chart(totais[["Potência Ativa", "Potência Reativa", "Potência Aparente"]] / 1000)
+    with col2:
+        st.markdown("**Fator de potência do conjunto**")
+        st.line_chart(totais["Fator de Potência"])
@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from paginas.comum import abrir_servico
+from supervisorio.agregados import JANELAS
+from supervisorio.canais import CANAIS, FASES
+from supervisorio.potencia import CAPACITIVO, INDUTIVO
+
+PONTOS_GRAFICO_GERAL = 300
+
+
+# -----------------------------------------------------------------------
+# GERAL
+# -----------------------------------------------------------------------
+def renderizar(perfilador):
+    st.header("🖥️ Geral")
+    servico, instantaneo = abrir_servico(perfilador)
+    piramide = servico.piramide
+
+    # Todas as métricas desta página são leituras O(1) dos agregados de janela
+    # deslizante; os gráficos usam a pirâmide de rollups.
+    janela_geral = st.selectbox("Janela de análise:", options=list(JANELAS), index=0)
+    duracao_geral = JANELAS[janela_geral][0]
+    fim_geral = instantaneo.ultimo_timestamp + pd.Timedelta(1, 'ns')
+
+    def dados_geral(prefixo):
+        colunas = [f"{prefixo}{fase}" for fase in FASES]
+        df = piramide.consultar(fim_geral - duracao_geral, fim_geral, colunas, PONTOS_GRAFICO_GERAL)[1]
+        return df.rename(columns=lambda c: f"Fase {c[len(prefixo):]}")
+
+    st.header("Análise das Tensões e Correntes")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Tensões")
+        tab1, tab2 = st.tabs(["Tensão de fase", "Tensão de linha"])
+        with tab1:
+            st.line_chart(dados_geral("Tensão Fase "))
+        with tab2:
+            df_linha = piramide.consultar(fim_geral - duracao_geral, fim_geral, ['Tensão Linha AB', 'Tensão Linha BC', 'Tensão Linha CA'], PONTOS_GRAFICO_GERAL)[1]
+            st.line_chart(df_linha)
+        st.divider()
+
+    with col2:
+        st.subheader("Corrente")
+        st.markdown("As correntes de fase e linha desse sistema de potência são iguais, portanto, não há necessário distinção.")
+        st.line_chart(dados_geral("Corrente "))
+        st.divider()
+
+    st.subheader(f"Resumo ({janela_geral})")
+    linhas_resumo = []
+    for canal in CANAIS:
+        resumo = instantaneo.resumos[janela_geral][canal]
+        linhas_resumo.append({
+            "Canal": canal,
+            "Mínimo": resumo["minimo"][0] if resumo["minimo"] else np.nan,
+            "Máximo": resumo["maximo"][0] if resumo["maximo"] else np.nan,
+            "Média": resumo["media"],
+            "Último": resumo["ultimo"],
+        })
+    st.dataframe(pd.DataFrame(linhas_resumo).set_index("Canal").style.format("{:.2f}"), width="stretch")
+    st.divider()
+
+    st.header("Análise das Potências")
+    st.markdown("Analisando-se as potências, pode-se analisar-se seus valores atuais, estimativas de fator de potência, assim como seus máximos")
+
+    st.header("Potências Máximas")
+    st.markdown("Demandas máximas integradas em intervalos de 15 minutos, lidas diretamente dos registradores do integrador.")
+
+    unidades = {"Ativa": "W", "Reativa": "var", "Aparente": "VA"}
+    demandas_maximas = {tipo: {fase: instantaneo.demanda_maxima[tipo][fase] for fase in FASES} for tipo in unidades}
+    medias_demanda = {tipo: sum(valor for valor, _ in demandas_maximas[tipo].values()) / len(FASES) for tipo in unidades}
+
+    abas_fases = st.tabs([f"Fase {fase}" for fase in FASES])
+    for aba, fase in zip(abas_fases, FASES):
+        with aba:
+            st.subheader(f"Fase {fase}")
+            colunas_metricas = st.columns(3)
+            for coluna, (tipo, unidade) in zip(colunas_metricas, unidades.items()):
+                valor, instante = demandas_maximas[tipo][fase]
+                relacao = valor - medias_demanda[tipo]
+                coluna.metric(f"Potência {tipo}", f"{valor:.2f} {unidade}", f"{relacao:.2f} {unidade} | Média: {medias_demanda[tipo]:.2f} {unidade}")
+                if instante is not None:
+                    coluna.caption(f"Registrada em {instante.strftime('%d/%m %H:%M')}")
+    st.divider()
+
+    st.header("Energias")
+    unidades_energia = {"Ativa": "kWh", "Reativa": "kvarh", "Aparente": "kVAh"}
+    colunas_energia = st.columns(len(FASES) + 1)
+    for coluna, fase in zip(colunas_energia, FASES + [None]):
+        with coluna:
+            st.subheader("Total" if fase is None else f"Fase {fase}")
+            for tipo, unidade in unidades_energia.items():
+                st.metric(f"Energia {tipo}", f"{(sum(instantaneo.energia[tipo].values()) if fase is None else instantaneo.energia[tipo][fase]) / 1000:.2f} {unidade}")
+    st.divider()
+
+    st.header("Fator de Potência")
+    naturezas = {INDUTIVO: "indutivo", CAPACITIVO: "capacitivo", None: "-"}
+    fps = {fase: instantaneo.resumos[janela_geral][f"Fator de Potência {fase}"] for fase in FASES}
+    media_fp = np.nanmean([fps[fase]["ultimo"] for fase in FASES])
+
+    colunas_fp = st.columns(len(FASES))
+    for coluna, fase in zip(colunas_fp, FASES):
+        atual = fps[fase]["ultimo"]
+        coluna.metric(f"FP ({fase})", f"{atual:.2f}", f"{atual - media_fp:.2f}| Média: {media_fp:.2f}")
+        minimo = fps[fase]["minimo"]
+        if minimo is not None:
+            valor, instante, natureza = minimo
+            coluna.caption(f"Mínimo: {valor:.2f} ({naturezas[natureza]}) em {instante.strftime('%d/%m %H:%M')}")
+    st.divider()
+
+    col1, col2, col3 = st.columns([1, 1, 1])
+    with col1:
+        st.subheader("POTÊNCIA ATIVA")
+        st.line_chart(dados_geral("Potência Ativa "))
+        st.divider()
+
+    with col2:
+        st.subheader("POTÊNCIA REATIVA")
+        st.line_chart(dados_geral("Potência Reativa "))
+        st.divider()
+
+    with col3:
+        st.subheader("POTÊNCIA APARENTE")
+        st.line_chart(dados_geral("Potência Aparente "))
+        st.divider()
@@ -0,0 +1,389 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from paginas.comum import abrir_servico, obter_cache_graficos
+from supervisorio.ao_vivo import JanelaAoVivo
+from supervisorio.canais import FASES
+from supervisorio.eventos import TIPOS_EVENTO
+from supervisorio.graficos import PONTOS_INTERATIVO, desenhar_serie, figura_interativa, go
+from supervisorio.harmonicos import ORDEM_MAXIMA
+from supervisorio.reducao import MODOS_REDUCAO
+
+PONTOS_GRAFICO = 1000
+LINHAS_ESPECTRO = 5000
+LINHAS_EVENTOS = 500
+ZOOM_MINIMO = pd.Timedelta(seconds=10)
+
+
+# -----------------------------------------------------------------------
+# PÁGINA INICIAL
+# -----------------------------------------------------------------------
+def renderizar(perfilador):
+    st.title(":zap: Supervisório de Técnicas de Medição")
+    st.markdown("""
+    As despesas com energia elétrica nas atividades comerciais e industriais se apresentam como um dos maiores insumos
+para o setor produtivo. Em diversos empreendimentos, não há um sistema que indique qual o consumo diário e quais
+atividades consomem mais energia elétrica, ficando as empresas limitadas às análises das contas de energia elétrica.
+                
+
+A instalação de um Sistema de Monitoramento em tempo real pode auxiliar as empresas nos rastreios dos custos de
+energia elétrica total ou parcial dos seus processos, auxiliando os empresários no cálculo do custo de energia elétrica
+agregado a cada produto ou processo.
+                
+
+Um Sistema de Monitoramento de Energia Elétrica com supervisório funciona por meio da coleta e monitoração de
+dados de consumo de energia elétrica em tempo real, com análise, processamento dos dados e apresentação dos
+resultados numérica e graficamente, na forma de grandezas energéticas que caracterizam o uso da energia elétrica
+das instalações.
+                
+
+Dentre as grandezas básicas monitoradas por um sistema deste tipo são:
+- Demandas Ativa, Reativa e Aparente, armazenando os valores máximos ocorridos;
+- Energias Ativa, Reativa e Aparente;
+- Fator de Potência, armazenando sua natureza capacitiva ou indutiva bem como valores mínimos ocorridos;
+- Tensões de linha e de fase; e
+- Correntes
+            
+    """)
+    servico, instantaneo = abrir_servico(perfilador)
+    piramide = servico.piramide
+    cache_graficos = obter_cache_graficos()
+
+    # ==============================================================================
+    # 2. MENU DE CONTROLES NA BARRA LATERAL (SIDEBAR)
+    # ==============================================================================
+    # !!! ATENÇÃO: Todo este bloco de código deve estar DENTRO de um `with st.sidebar:` !!!
+    # No seu código original, ele estava no corpo principal.
+    st.header("⚙️ Controles do Dashboard")
+
+    # --- Filtro de Período ---
+    st.subheader("Período de Visualização")
+    periodo_selecionado = st.selectbox(
+        label="Selecione o período:",
+        options=["15 Minutos", "1 Hora", "6 Horas", "24 Horas", "7 Dias", "30 Dias", "1 Ano"],
+        index=1
+    )
+
+    # --- Menu para Formato do Timestamp ---
+    st.subheader("Formato do Eixo X (Tempo)")
+    formatos_data = {
+        "Dia/Mês Hora:Minuto": "%d/%m %H:%M",
+        "Hora:Minuto:Segundo": "%H:%M:%S",
+        "Dia da Semana (Abrev), Hora": "%a, %Hh",
+        "Mês-Dia": "%m-%d",
+    }
+    
+    #
+    #formato_escolhido_label = st.selectbox(
+    #    "Escolha o formato da data:",
+    #    options=list(formatos_data.keys()),
+    #    index=1
+    #)
+
+    
+    formato_escolhido_str = formatos_data["Hora:Minuto:Segundo"]
+
+    # --- Redução de Pontos dos Gráficos ---
+    st.subheader("Redução de Pontos")
+    modo_reducao_label = st.selectbox(
+        "Método de redução:",
+        options=list(MODOS_REDUCAO.keys()),
+        index=0
+    )
+    modo_reducao = MODOS_REDUCAO[modo_reducao_label]
+
+    # --- Tipo de Gráfico ---
+    st.subheader("Tipo de Gráfico")
+    tipos_grafico = ["Estático (imagem)"] + (["Interativo (WebGL)"] if go is not None else [])
+    interativo = st.radio("Gráficos de séries:", tipos_grafico, key="tipo_grafico") == "Interativo (WebGL)"
+
+    # --- Modo ao Vivo ---
+    st.subheader("Modo ao Vivo")
+    ao_vivo = st.toggle("Atualização automática", value=False)
+    intervalo_atualizacao = st.select_slider(
+        "Intervalo de atualização (s):",
+        options=[1, 2, 5, 10, 30, 60],
+        value=1,
+        disabled=not ao_vivo
+    )
+
+    # --- Eventos de Qualidade de Energia ---
+    st.subheader("Eventos")
+    marcar_eventos = st.toggle("Marcar eventos nos gráficos", value=True)
+
+    # --- Filtro de Fases Dinâmico ---
+    st.subheader("Filtro de Fases")
+    sufixos_disponiveis = sorted(list(set([col.split()[-1] for col in instantaneo.canais if len(col.split()[-1]) == 1])))
+    sufixos_selecionados = []
+    cols_filtro = st.columns(len(sufixos_disponiveis))
+    for i, sufixo in enumerate(sufixos_disponiveis):
+        with cols_filtro[i]:
+            if st.checkbox(f'Fase {sufixo}', value=True, key=f'fase_{sufixo}'):
+                sufixos_selecionados.append(sufixo)
+
+    # ==============================================================================
+    # 3. LÓGICA DE FILTRAGEM E PLOTAGEM
+    # ==============================================================================
+
+    # --- Filtragem por Período ---
+    agora = pd.Timestamp.now()
+    deltas = {
+        "15 Minutos": pd.Timedelta(minutes=15),
+        "1 Hora": pd.Timedelta(hours=1),
+        "6 Horas": pd.Timedelta(hours=6),
+        "24 Horas": pd.Timedelta(hours=24),
+        "7 Dias": pd.Timedelta(days=7),
+        "30 Dias": pd.Timedelta(days=30),
+        "1 Ano": pd.Timedelta(days=365)
+    }
+    delta_selecionado = deltas[periodo_selecionado]
+    inicio_periodo = agora - delta_selecionado
+    # A pirâmide de rollups escolhe a resolução mais grossa que ainda preenche o
+    # gráfico, então janelas longas custam o mesmo que as curtas.
+    # No modo envelope, os rollups entregam mínimo e máximo de cada intervalo para
+    # que afundamentos e picos não sejam suavizados pela média.
+    estatistica = "envelope" if modo_reducao == "minmax" else "media"
+    nivel = piramide.escolher_nivel(inicio_periodo, agora, PONTOS_GRAFICO)
+    resolucao = "bruto" if nivel is None else nivel.nome
+
+    def filtrar_periodo(colunas):
+        # Cada gráfico lê só as suas colunas; nos dados brutos o resultado é uma
+        # visão dos arquivos em disco, sem máscara booleana nem cópia.
+        with perfilador.medir("Filtro de período"):
+            return piramide.consultar(inicio_periodo, agora, colunas, PONTOS_GRAFICO, estatistica, instantaneo.series)[1]
+
+    st.markdown(f"Exibindo dados dos **{periodo_selecionado}**. Período: `{inicio_periodo.strftime('%d/%m %H:%M')}` a `{agora.strftime('%d/%m %H:%M')}` (resolução: `{resolucao}`)")
+
+    if not sufixos_selecionados:
+        st.warning("Selecione pelo menos uma fase na barra lateral.")
+        st.stop()
+
+    # --- Ampliação no Modo Interativo ---
+    # Pilha de janelas ampliadas da sessão, compartilhada pelos gráficos;
+    # trocar o período volta à janela inteira. A versão entra na chave dos
+    # gráficos para que a seleção que gerou a ampliação não seja reaplicada.
+    if st.session_state.get("zoom_periodo") != periodo_selecionado:
+        st.session_state["zoom_periodo"] = periodo_selecionado
+        st.session_state["zoom"] = []
+        st.session_state["zoom_versao"] = st.session_state.get("zoom_versao", 0) + 1
+    pilha_zoom = st.session_state["zoom"]
+
+    def janela_interativa():
+        if pilha_zoom:
+            return pilha_zoom[-1]
+        if ao_vivo and servico.instantaneo.ultimo_timestamp is not None:
+            fim = servico.instantaneo.ultimo_timestamp + pd.Timedelta(1, "ns")
+            return fim - delta_selecionado, fim
+        return inicio_periodo, agora
+
+    def ampliar(inicio, fim):
+        atual_inicio, atual_fim = janela_interativa()
+        inicio, fim = max(inicio, atual_inicio), min(fim, atual_fim)
+        if fim - inicio < ZOOM_MINIMO:
+            meio = inicio + (fim - inicio) / 2
+            inicio, fim = meio - ZOOM_MINIMO / 2, meio + ZOOM_MINIMO / 2
+        pilha_zoom.append((inicio, fim))
+        st.session_state["zoom_versao"] += 1
+
+    if interativo:
+        col_zoom, col_voltar, col_inteiro = st.columns([4, 1, 1])
+        if col_voltar.button("Voltar", disabled=not pilha_zoom, key="zoom_voltar"):
+            pilha_zoom.pop()
+            st.session_state["zoom_versao"] += 1
+        if col_inteiro.button("Período inteiro", disabled=not pilha_zoom, key="zoom_inteiro"):
+            pilha_zoom.clear()
+            st.session_state["zoom_versao"] += 1
+        inicio_zoom, fim_zoom = janela_interativa()
+        col_zoom.caption(f"Arraste sobre um gráfico para ampliar. Janela: `{inicio_zoom:%d/%m %H:%M:%S}` a `{fim_zoom:%d/%m %H:%M:%S}` (resolução: `{piramide.resolucao(inicio_zoom, fim_zoom, PONTOS_INTERATIVO)}`)")
+
+    # --- Funções Helper ---
+    def filtrar_colunas(todas_as_colunas, sufixos):
+        with perfilador.medir("Seleção de colunas"):
+            return [col for col in todas_as_colunas if col.split()[-1] in sufixos]
+
+    ### CORREÇÃO 2: ATUALIZAR A FUNÇÃO DE PLOTAGEM ###
+    def plotar_matplotlib(df_data, titulo, y_label, date_format="%d/%m %H:%M", y_min=None, y_max=None, auto=False, modo_reducao="minmax", versao=None, eventos=None):
+        # A chave descreve tudo o que muda o desenho; se nada mudou desde o
+        # último rerun, a imagem sai direto do cache sem rasterizar de novo.
+        chave = (
+            servico.diretorio, titulo, y_label, tuple(df_data.columns),
+            (df_data.index[0], df_data.index[-1], len(df_data)) if not df_data.empty else None,
+            instantaneo.series.geracao, instantaneo.versao if versao is None else versao, date_format, y_min, y_max, auto, modo_reducao,
+            None if eventos is None else (servico.eventos.versao, len(eventos)),
+        )
+        with perfilador.medir("Rasterização (matplotlib)"):
+            imagem = cache_graficos.obter_ou_renderizar(chave, lambda: desenhar_serie(df_data, titulo, y_label, date_format, y_min, y_max, auto, modo_reducao, PONTOS_GRAFICO, eventos))
+        with perfilador.medir("Envio da imagem"):
+            st.image(imagem, width="stretch")
+        perfilador.marcos.pintar()
+
+    def eventos_periodo(colunas, inicio, fim):
+        # Só tensões e correntes têm eventos; a consulta é uma busca binária por canal.
+        if not marcar_eventos or not any(c in servico.eventos.canais for c in colunas):
+            return None
+        with perfilador.medir("Consulta de eventos"):
+            return servico.eventos.consultar(inicio, fim, colunas)
+
+    def instante_plotly(valor):
+        # Datas do eixo voltam como texto; números são ms desde a época.
+        return pd.Timestamp(valor, unit="ms") if isinstance(valor, (int, float)) else pd.Timestamp(valor)
+
+    def grafico_interativo(chave, colunas, titulo, y_label):
+        # A janela é lida da pirâmide na resolução que dá ~PONTOS_INTERATIVO
+        # pontos, então de um ano a um minuto o navegador recebe o mesmo volume.
+        inicio, fim = janela_interativa()
+        with perfilador.medir("Filtro de período"):
+            df = piramide.consultar(inicio, fim, colunas, PONTOS_INTERATIVO, estatistica, servico.instantaneo.series)[1]
+        eventos = eventos_periodo(colunas, inicio, fim)
+        with perfilador.medir("Figura interativa (Plotly)"):
+            fig = figura_interativa(df, titulo, y_label, inicio, fim, modo_reducao, PONTOS_INTERATIVO, eventos)
+            # Mantém o estado do navegador (legenda, zoom da roda) entre as atualizações ao vivo.
+            fig.update_layout(uirevision=st.session_state["zoom_versao"])
+        with perfilador.medir("Envio da figura"):
+            selecao = st.plotly_chart(fig, key=f"interativo_{chave}_{st.session_state['zoom_versao']}", on_select="rerun", selection_mode="box", config={"displaylogo": False})
+        perfilador.marcos.pintar()
+        caixas = selecao.selection.box
+        if caixas:
+            ampliar(*sorted(instante_plotly(x) for x in caixas[0]["x"]))
+            st.rerun()
+
+    def grafico_periodo(chave, colunas, titulo, y_label, auto=False):
+        # No modo ao vivo cada gráfico é um fragmento que roda sozinho a cada
+        # intervalo: lê o instantâneo mais novo, relê só a cauda da janela e,
+        # se a versão não mudou, reaproveita a imagem do cache.
+        if interativo:
+            with perfilador.execucao("Ao vivo"):
+                grafico_interativo(chave, colunas, titulo, y_label)
+            return
+        if not ao_vivo:
+            plotar_matplotlib(filtrar_periodo(colunas), titulo, y_label, date_format=formato_escolhido_str, auto=auto, modo_reducao=modo_reducao, eventos=eventos_periodo(colunas, inicio_periodo, agora))
+            return
+        with perfilador.execucao("Ao vivo"):
+            atual = servico.instantaneo
+            janela_ao_vivo = st.session_state.setdefault(f"ao_vivo_{servico.diretorio}_{chave}", JanelaAoVivo())
+            with perfilador.medir("Filtro de período"):
+                df, _ = janela_ao_vivo.atualizar(piramide, atual, delta_selecionado, colunas, PONTOS_GRAFICO, estatistica)
+            eventos = None if df.empty else eventos_periodo(colunas, df.index[0], df.index[-1])
+            plotar_matplotlib(df, titulo, y_label, date_format=formato_escolhido_str, auto=auto, modo_reducao=modo_reducao, versao=atual.versao, eventos=eventos)
+
+    if ao_vivo:
+        grafico_periodo = st.fragment(grafico_periodo, run_every=intervalo_atualizacao)
+
+    # --- Seção de Tensões ---
+    with perfilador.medir("Seção: Tensões"):
+        st.header("Tensões")
+        tab_fase, tab_linha, tab_harmonicos, tab_sequencias = st.tabs(["Tensão de Fase (V)", "Tensão de Linha (V)", "Harmônicos", "Componentes Simétricas"])
+
+        with tab_fase:
+            cols = ['Tensão Fase A', 'Tensão Fase B', 'Tensão Fase C']
+            colunas_para_plotar = filtrar_colunas(cols, sufixos_selecionados)
+            if colunas_para_plotar:
+                grafico_periodo("tensao_fase", colunas_para_plotar, "Tensões de Fase por Tempo", "Tensão (V)")
+
+        # ... e assim por diante para os outros gráficos ...
+        with tab_linha:
+            cols = ['Tensão Linha AB', 'Tensão Linha BC', 'Tensão Linha CA']
+            colunas_para_plotar = [c for c in cols if any(s in c for s in sufixos_selecionados)]
+            if colunas_para_plotar:
+                grafico_periodo("tensao_linha", colunas_para_plotar, "Tensões de Linha por Tempo", "Tensão (V)")
+
+        with tab_harmonicos:
+            grandeza_harmonica = st.radio("Grandeza:", ["Tensão", "Corrente"], horizontal=True, key="grandeza_harmonica")
+            cols_thd = [f'THD {grandeza_harmonica} {fase}' for fase in FASES]
+            colunas_para_plotar = filtrar_colunas(cols_thd, sufixos_selecionados)
+            if colunas_para_plotar:
+                grafico_periodo(f"thd_{grandeza_harmonica}", colunas_para_plotar, f"THD de {grandeza_harmonica} por Tempo", "THD (%)", auto=True)
+
+                # Espectro médio do período (2ª à 50ª ordem), em % da fundamental.
+                # Em períodos longos a média usa linhas espaçadas do arquivo mapeado.
+                prefixo = 'Tensão Fase ' if grandeza_harmonica == "Tensão" else 'Corrente '
+                canais_espectro = [prefixo + c.split()[-1] for c in colunas_para_plotar]
+                janela_espectro = servico.espectros.janela(inicio_periodo, agora, canais_espectro)
+                if len(janela_espectro):
+                    passo = max(1, len(janela_espectro) // LINHAS_ESPECTRO)
+                    espectro_medio = {}
+                    for canal in canais_espectro:
+                        media = np.nanmean(janela_espectro[canal][::passo], axis=0)
+                        espectro_medio[f"Fase {canal.split()[-1]}"] = media[1:] / media[0] * 100
+                    st.markdown(f"**Espectro harmônico médio de {grandeza_harmonica.lower()} (% da fundamental)**")
+                    st.bar_chart(pd.DataFrame(espectro_medio, index=pd.Index(range(2, ORDEM_MAXIMA + 1), name="Ordem")))
+
+        with tab_sequencias:
+            # Estimadas pela DFT deslizante a partir dos fasores das três fases
+            # (não dependem do filtro de fases).
+            st.markdown("**Desequilíbrio de tensão (|V2| / |V1|)**")
+            grafico_periodo("desequilibrio", ['Desequilíbrio de Tensão'], "", "Desequilíbrio (%)", auto=True)
+            st.markdown("**Componentes de sequência**")
+            grafico_periodo("sequencias_tensao", ['Tensão Sequência Negativa', 'Tensão Sequência Zero'], "", "Tensão (V)", auto=True)
+            grafico_periodo("sequencias_corrente", ['Corrente Sequência Negativa', 'Corrente Sequência Zero'], "", "Corrente (A)", auto=True)
+
+    # (O mesmo deve ser feito para os gráficos de Corrente e Potência)
+    st.divider()
+    with perfilador.medir("Seção: Corrente"):
+        st.header("Corrente (A)")
+        cols_corrente = ['Corrente A', 'Corrente B', 'Corrente C']
+        colunas_para_plotar_corrente = filtrar_colunas(cols_corrente, sufixos_selecionados)
+        if colunas_para_plotar_corrente:
+            grafico_periodo("corrente", colunas_para_plotar_corrente, "Correntes por Tempo", "Corrente (A)")
+    
+    st.divider()
+
+    # --- 5. Seção de Potências (com Colunas e Matplotlib) ---
+    with perfilador.medir("Seção: Potências"):
+        st.header("Potências")
+        # ### CORREÇÃO DE LAYOUT: Mudei para 3 colunas para acomodar todos os gráficos ###
+        col_ativa, col_reativa = st.columns(2)
+
+        with col_ativa:
+            st.subheader("Ativa (W)")
+            cols_pot_ativa = ['Potência Ativa A', 'Potência Ativa B', 'Potência Ativa C']
+            colunas_para_plotar = filtrar_colunas(cols_pot_ativa, sufixos_selecionados)
+            if colunas_para_plotar:
+                # Eixo Y automático para potências
+                grafico_periodo("potencia_ativa", colunas_para_plotar, "", "Potência (W)", auto=True)
+            else:
+                st.info("Nenhuma Potência Ativa selecionada.")
+
+        with col_reativa:
+            st.subheader("Reativa (VAr)")
+            cols_pot_reativa = ['Potência Reativa A', 'Potência Reativa B', 'Potência Reativa C']
+            colunas_para_plotar = filtrar_colunas(cols_pot_reativa, sufixos_selecionados)
+            if colunas_para_plotar:
+                grafico_periodo("potencia_reativa", colunas_para_plotar, "", "Potência (VAr)", auto=True)
+            else:
+                st.info("Nenhuma Potência Reativa selecionada.")
+            
+        st.subheader("Aparente (VA)")
+        cols_pot_aparente = ['Potência Aparente A', 'Potência Aparente B', 'Potência Aparente C']
+        colunas_para_plotar = filtrar_colunas(cols_pot_aparente, sufixos_selecionados)
+        if colunas_para_plotar:
+            grafico_periodo("potencia_aparente", colunas_para_plotar, "", "Potência (VA)", auto=True)
+        else:
+            st.info("Nenhuma Potência Aparente selecionada.")
+
+        st.subheader("Fator de Potência")
+        cols_fp = ['Fator de Potência A', 'Fator de Potência B', 'Fator de Potência C']
+        colunas_para_plotar = filtrar_colunas(cols_fp, sufixos_selecionados)
+        if colunas_para_plotar:
+            grafico_periodo("fator_potencia", colunas_para_plotar, "", "Fator de Potência", auto=True)
+        else:
+            st.info("Nenhum Fator de Potência selecionado.")
+
+    st.divider()
+
+    # --- Eventos de Qualidade de Energia ---
+    with perfilador.medir("Seção: Eventos"):
+        st.header("Eventos de Qualidade de Energia")
+        canais_eventos = [c for c in servico.eventos.canais if any(s in c.split()[-1] for s in sufixos_selecionados)]
+        with perfilador.medir("Consulta de eventos"):
+            eventos_periodo_todo = servico.eventos.consultar(inicio_periodo, agora, canais_eventos)
+        contagem_eventos = eventos_periodo_todo["Tipo"].value_counts()
+        cols_eventos = st.columns(len(TIPOS_EVENTO))
+        for col, tipo in zip(cols_eventos, TIPOS_EVENTO):
+            col.metric(tipo, int(contagem_eventos.get(tipo, 0)))
+        if eventos_periodo_todo.empty:
+            st.info("Nenhum evento no período.")
+        else:
+            st.caption(f"{len(eventos_periodo_todo)} eventos no período; os {min(len(eventos_periodo_todo), LINHAS_EVENTOS)} mais recentes abaixo (sem fim: evento em andamento).")
+            st.dataframe(eventos_periodo_todo.iloc[::-1].head(LINHAS_EVENTOS), hide_index=True, width="stretch")
@@ -0,0 +1,222 @@
+import glob
+import os
+
+import pandas as pd
+import streamlit as st
+
+from paginas import diretorio_dados
+from paginas.comum import abrir_servico
+from supervisorio.canais import CANAIS
+from supervisorio.exportacao import FORMATOS, Exportador
+from supervisorio.importacao import detectar_coluna_tempo, ler_blocos_csv, sugerir_mapeamento
+from supervisorio.piramide import NIVEIS
+
+PASSOS_IMPORTACAO = {
+    "Não alinhar": None,
+    "1 s": pd.Timedelta(seconds=1),
+    "10 s": pd.Timedelta(seconds=10),
+    "1 min": pd.Timedelta(minutes=1),
+    "15 min": pd.Timedelta(minutes=15),
+}
+# Maior arquivo exportado que o navegador baixa: o download passa inteiro
+# pela memória do servidor.
+LIMITE_DOWNLOAD = 200 * 2 ** 20
+
+
+# Pool de threads das exportações, compartilhado: arquivos grandes são
+# montados fora do script das sessões.
+@st.cache_resource
+def obter_exportador():
+    return Exportador(os.path.join(diretorio_dados(), "exportacoes"))
+
+
+# -----------------------------------------------------------------------
+# Outros
+# -----------------------------------------------------------------------
+def renderizar(perfilador):
+    # Um medidor ainda sem dados pode receber uma importação.
+    servico, instantaneo = abrir_servico(perfilador, exigir_dados=False)
+    piramide = servico.piramide
+
+    st.subheader("Controles dos Eixos Y")
+    # --- Controle para Tensão de Fase ---
+    st.markdown("**Tensão de Fase (V)**")
+    auto_tensao_fase = st.checkbox("Eixo Automático", key="auto_tf", value=False)
+    col1_tf, col2_tf = st.columns(2)
+    with col1_tf:
+        y_min_tf = st.number_input("Mínimo", key="y_min_tf", value=115.0, step=1.0, format="%.1f", disabled=auto_tensao_fase)
+    with col2_tf:
+        y_max_tf = st.number_input("Máximo", key="y_max_tf", value=130.0, step=1.0, format="%.1f", disabled=auto_tensao_fase)
+
+    # --- Controle para Tensão de Linha ---
+    st.markdown("**Tensão de Linha (V)**")
+    auto_tensao_linha = st.checkbox("Eixo Automático", key="auto_tl", value=False)
+    col1_tl, col2_tl = st.columns(2)
+    with col1_tl:
+        y_min_tl = st.number_input("Mínimo", key="y_min_tl", value=210.0, step=1.0, format="%.1f", disabled=auto_tensao_linha)
+    with col2_tl:
+        y_max_tl = st.number_input("Máximo", key="y_max_tl", value=225.0, step=1.0, format="%.1f", disabled=auto_tensao_linha)
+
+    # --- Controle para Corrente ---
+    st.markdown("**Corrente (A)**")
+    auto_corrente = st.checkbox("Eixo Automático", key="auto_corr", value=True) # Deixar automático por padrão
+    col1_c, col2_c = st.columns(2)
+    with col1_c:
+        st.number_input("Mínimo", key="y_min_c", value=8.0, step=0.5, format="%.1f", disabled=auto_corrente)
+    with col2_c:
+        y_max_c = st.number_input("Máximo", key="y_max_c", value=15.0, step=0.5, format="%.1f", disabled=auto_corrente)
+
+    st.divider()
+
+    # --- Detecção de Eventos ---
+    st.subheader("Detecção de Eventos")
+    st.markdown("Afundamentos e elevações usam os limites dos eixos de tensão acima e a sobrecorrente usa o máximo do eixo de corrente. Um afundamento que passa do limite de interrupção é classificado como interrupção.")
+    limites_atuais = servico.eventos.limites
+    col_int_tf, col_int_tl = st.columns(2)
+    with col_int_tf:
+        interrupcao_tf = st.number_input("Interrupção, tensão de fase (V)", key="ev_int_tf", value=float(limites_atuais["Tensão Fase"]["interrupcao"]), step=1.0, format="%.1f")
+    with col_int_tl:
+        interrupcao_tl = st.number_input("Interrupção, tensão de linha (V)", key="ev_int_tl", value=float(limites_atuais["Tensão Linha"]["interrupcao"]), step=1.0, format="%.1f")
+    novos_limites = {
+        "Tensão Fase": {"afundamento": y_min_tf, "elevacao": y_max_tf, "interrupcao": interrupcao_tf},
+        "Tensão Linha": {"afundamento": y_min_tl, "elevacao": y_max_tl, "interrupcao": interrupcao_tl},
+        "Corrente": {"sobrecorrente": y_max_c},
+    }
+    if servico.somente_leitura:
+        st.caption("Este medidor é gravado por outro processo: os limites só podem ser alterados lá.")
+    elif novos_limites != limites_atuais:
+        st.caption("Os limites acima diferem dos que estão em uso; aplicá-los reprocessa todo o histórico.")
+    if st.button("Aplicar limites aos eventos", disabled=servico.somente_leitura or novos_limites == limites_atuais, key="ev_aplicar"):
+        with st.spinner("Detectando os eventos de todo o histórico..."):
+            servico.redefinir_limites_eventos(novos_limites)
+        st.success(f"Limites aplicados: {len(servico.eventos.consultar())} eventos no histórico.")
+
+    st.divider()
+
+    # --- Exportação de Dados ---
+    st.subheader("Exportação de Dados")
+    st.markdown("O arquivo é escrito em blocos e em segundo plano: o tamanho do intervalo não afeta a memória nem as outras sessões.")
+    exportador = obter_exportador()
+    sem_dados = instantaneo.ultimo_timestamp is None
+    if sem_dados:
+        st.caption("Sem dados ainda.")
+        primeiro_dia = ultimo_dia = pd.Timestamp.now().date()
+    else:
+        primeiro_dia = servico.armazenamento.primeiro_timestamp().date()
+        ultimo_dia = instantaneo.ultimo_timestamp.date()
+    col_inicio, col_fim = st.columns(2)
+    with col_inicio:
+        data_inicio = st.date_input("Data inicial", value=ultimo_dia, min_value=primeiro_dia, max_value=ultimo_dia, key="exp_inicio")
+    with col_fim:
+        data_fim = st.date_input("Data final", value=ultimo_dia, min_value=primeiro_dia, max_value=ultimo_dia, key="exp_fim")
+    canais_exportacao = st.multiselect("Canais:", CANAIS, default=CANAIS[:3], key="exp_canais")
+    col_resolucao, col_formato = st.columns(2)
+    with col_resolucao:
+        resolucao_exportacao = st.selectbox("Resolução:", ["bruto"] + list(NIVEIS), key="exp_resolucao")
+    with col_formato:
+        formato_exportacao = st.radio("Formato:", list(FORMATOS), horizontal=True, key="exp_formato")
+
+    if st.button("Gerar arquivo", disabled=sem_dados or not canais_exportacao or data_fim < data_inicio):
+        st.session_state["exportacao"] = exportador.enviar(
+            piramide,
+            pd.Timestamp(data_inicio),
+            pd.Timestamp(data_fim) + pd.Timedelta(days=1),
+            canais_exportacao,
+            resolucao_exportacao,
+            formato_exportacao
+        )
+
+    tarefa_exportacao = st.session_state.get("exportacao")
+    exportacao_em_andamento = tarefa_exportacao is not None and not tarefa_exportacao.concluida
+
+    # Só consulta o andamento a cada segundo enquanto há exportação rodando.
+    @st.fragment(run_every=1 if exportacao_em_andamento else None)
+    def acompanhar_exportacao():
+        if tarefa_exportacao is None:
+            return
+        if not tarefa_exportacao.concluida:
+            st.progress(tarefa_exportacao.progresso, text=f"Exportando {tarefa_exportacao.nome}: {tarefa_exportacao.escritas} de {tarefa_exportacao.total} linhas")
+            return
+        if exportacao_em_andamento:
+            st.rerun()
+        if tarefa_exportacao.erro is not None:
+            st.error(f"Falha na exportação: {tarefa_exportacao.erro}")
+            return
+
+        tamanho = os.path.getsize(tarefa_exportacao.caminho)
+        st.success(f"{tarefa_exportacao.total} linhas exportadas para `{tarefa_exportacao.caminho}` ({tamanho / 2 ** 20:.1f} MB).")
+        if tamanho > LIMITE_DOWNLOAD:
+            st.info(f"Arquivos acima de {LIMITE_DOWNLOAD // 2 ** 20} MB não passam pelo navegador: copie-o direto do servidor.")
+            return
+        # O arquivo só é lido para a memória depois de pedido, e é solto
+        # assim que o download começa.
+        if st.session_state.get("exportacao_preparada") != tarefa_exportacao.caminho:
+            st.button("Preparar download", on_click=st.session_state.__setitem__, args=("exportacao_preparada", tarefa_exportacao.caminho))
+            return
+        with open(tarefa_exportacao.caminho, "rb") as f:
+            conteudo = f.read()
+        st.download_button(
+            label="Baixar arquivo",
+            data=conteudo,
+            file_name=tarefa_exportacao.nome,
+            mime="text/csv" if tarefa_exportacao.nome.endswith(".csv") else "application/octet-stream",
+            on_click=lambda: st.session_state.pop("exportacao_preparada", None),
+        )
+
+    acompanhar_exportacao()
+
+    st.divider()
+
+    # --- Importação de Históricos ---
+    st.subheader("Importação de Históricos")
+    st.markdown("Arquivos CSV ou log de medidores são lidos em blocos, com as colunas mapeadas para os canais do supervisório, e intercalados com o histórico já gravado. Em timestamps que já existem, só os canais sem valor são preenchidos. Todos os arquivos devem ter as mesmas colunas.")
+    arquivos_enviados = st.file_uploader("Envie os arquivos", type=["csv", "txt", "log"], accept_multiple_files=True, key="imp_arquivos")
+    padrao_servidor = st.text_input("Ou arquivos no servidor (padrão glob):", placeholder="/caminho/dos/logs/*.csv", key="imp_padrao")
+    fontes_importacao = list(arquivos_enviados or []) + (sorted(glob.glob(padrao_servidor)) if padrao_servidor else [])
+
+    if fontes_importacao and servico.somente_leitura:
+        st.info("Este medidor é gravado por outro processo: importe os históricos por lá.")
+    elif fontes_importacao:
+        col_sep, col_dec, col_formato = st.columns(3)
+        with col_sep:
+            separador = st.selectbox("Separador:", [",", ";", "\t", "|"], format_func=lambda s: "Tabulação" if s == "\t" else s, key="imp_separador")
+        with col_dec:
+            decimal = st.selectbox("Separador decimal:", [".", ","], key="imp_decimal")
+        with col_formato:
+            formato_tempo = st.text_input("Formato do tempo (opcional):", placeholder="%d/%m/%Y %H:%M:%S", key="imp_formato") or None
+        # Com grade, cada amostra vai para o instante da grade mais próximo (até
+        # meio passo); relógios com deriva e arquivos de canais diferentes se juntam.
+        passo_importacao = st.selectbox("Alinhar à grade:", list(PASSOS_IMPORTACAO), key="imp_passo")
+
+        colunas_arquivo = list(pd.read_csv(fontes_importacao[0], sep=separador, nrows=0).columns)
+        if hasattr(fontes_importacao[0], "seek"):
+            fontes_importacao[0].seek(0)
+        coluna_tempo = st.selectbox("Coluna de tempo:", colunas_arquivo, index=colunas_arquivo.index(detectar_coluna_tempo(colunas_arquivo)), key="imp_coluna_tempo")
+        colunas_valores = [c for c in colunas_arquivo if c != coluna_tempo]
+        # Só canais gravados: os derivados (potência aparente, FP) são calculados.
+        canais_importaveis = servico.armazenamento.canais
+        sugestao = sugerir_mapeamento(colunas_valores, canais_importaveis)
+        tabela_mapeamento = st.data_editor(
+            pd.DataFrame({"Coluna do arquivo": colunas_valores, "Canal": [sugestao[c] for c in colunas_valores]}),
+            column_config={
+                "Coluna do arquivo": st.column_config.TextColumn(disabled=True),
+                "Canal": st.column_config.SelectboxColumn(options=canais_importaveis),
+            },
+            hide_index=True,
+            key="imp_mapeamento"
+        )
+        mapeamento = {col: canal for col, canal in zip(tabela_mapeamento["Coluna do arquivo"], tabela_mapeamento["Canal"]) if isinstance(canal, str)}
+
+        if st.button("Importar", disabled=not mapeamento):
+            barra_importacao = st.progress(0.0, text="Preparando a importação")
+            for fonte in fontes_importacao:
+                if hasattr(fonte, "seek"):
+                    fonte.seek(0)
+            resultado = servico.importar(
+                [ler_blocos_csv(fonte, coluna_tempo, mapeamento, separador, decimal, formato_tempo) for fonte in fontes_importacao],
+                lambda texto, fracao: barra_importacao.progress(min(fracao, 1.0), text=texto),
+                PASSOS_IMPORTACAO[passo_importacao],
+            )
+            st.success(f"{resultado['importadas']} linhas importadas de {resultado['lidas']} lidas ({resultado['descartadas']} repetidas, fora de ordem ou juntadas no mesmo instante da grade).")
+            if resultado.get("lacunas"):
+                st.warning(f"{resultado['lacunas']} lacunas na grade ({resultado['pontos_sem_dados']} instantes sem dados): ficam sem valor, sem interpolação.")
@@ -0,0 +1,149 @@
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from supervisorio.potencia import CAPACITIVO, INDUTIVO
+
+# =======================================================================
+# AGREGADOS DE JANELA DESLIZANTE
+# Mínimo, máximo, média e último valor por canal sobre as janelas "última
+# hora", "último dia" e "último mês". As janelas são alimentadas pelos
+# intervalos que a pirâmide de rollups vai fechando (não pelas amostras
+# brutas), e usam deques monotônicas: cada intervalo entra e sai uma única
+# vez, então atualizar custa O(1) amortizado e ler custa O(1).
+# O intervalo ainda aberto na pirâmide não entra nas janelas.
+# =======================================================================
+
+# nome: (duração, nível da pirâmide que alimenta a janela)
+JANELAS = {
+    "Última Hora": (pd.Timedelta(hours=1), "1min"),
+    "Último Dia": (pd.Timedelta(days=1), "1min"),
+    "Último Mês": (pd.Timedelta(days=30), "15min"),
+}
+PREFIXO_FP = "Fator de Potência "
+PREFIXO_REATIVA = "Potência Reativa "
+
+
+class JanelaDeslizante:
+    def __init__(self, duracao):
+        self.duracao = pd.Timedelta(duracao).value
+        # (instante, valor, rótulo) com valores crescentes / decrescentes.
+        self._minimos = deque()
+        self._maximos = deque()
+        # (instante, soma, contagem) para a média.
+        self._somas = deque()
+        self._soma = 0.0
+        self._contagem = 0.0
+
+    def adicionar(self, instante, minimo, maximo, soma, contagem, rotulo=None):
+        if not np.isnan(minimo):
+            while self._minimos and self._minimos[-1][1] >= minimo:
+                self._minimos.pop()
+            self._minimos.append((instante, minimo, rotulo))
+        if not np.isnan(maximo):
+            while self._maximos and self._maximos[-1][1] <= maximo:
+                self._maximos.pop()
+            self._maximos.append((instante, maximo, rotulo))
+        if not np.isnan(soma):
+            self._somas.append((instante, soma, contagem))
+            self._soma += soma
+            self._contagem += contagem
+        self._expirar(instante - self.duracao)
+
+    def _expirar(self, limite):
+        while self._minimos and self._minimos[0][0] <= limite:
+            self._minimos.popleft()
+        while self._maximos and self._maximos[0][0] <= limite:
+            self._maximos.popleft()
+        while self._somas and self._somas[0][0] <= limite:
+            _, soma, contagem = self._somas.popleft()
+            self._soma -= soma
+            self._contagem -= contagem
+
+    @property
+    def minimo(self):
+        # (valor, instante, rótulo) ou None se a janela estiver vazia.
+        if not self._minimos:
+            return None
+        instante, valor, rotulo = self._minimos[0]
+        return valor, pd.Timestamp(instante), rotulo
+
+    @property
+    def maximo(self):
+        if not self._maximos:
+            return None
+        instante, valor, rotulo = self._maximos[0]
+        return valor, pd.Timestamp(instante), rotulo
+
+    @property
+    def media(self):
+        return self._soma / self._contagem if self._contagem > 0 else np.nan
+
+
+class AgregadosStreaming:
+    def __init__(self, canais, janelas=JANELAS):
+        self.canais = list(canais)
+        self.definicoes = dict(janelas)
+        self.janelas = {nome: {c: JanelaDeslizante(duracao) for c in self.canais} for nome, (duracao, _) in self.definicoes.items()}
+        self.ultimos = {}
+        self.ultimo_instante = None
+
+    def atualizar_ultimos(self, timestamps, dados):
+        if len(timestamps) == 0:
+            return
+        self.ultimo_instante = pd.Timestamp(timestamps[-1])
+        for canal in self.canais:
+            self.ultimos[canal] = float(np.asarray(dados[canal])[-1])
+
+    def anexar_intervalos(self, nome_nivel, inicios, blocos):
+        # blocos no formato da pirâmide: {canal: (min, max, soma, ultimo), None: contagem}.
+        contagem = blocos[None]
+        for nome, (_, origem) in self.definicoes.items():
+            if origem != nome_nivel:
+                continue
+            for canal in self.canais:
+                minimo, maximo, soma, _ = blocos[canal]
+                rotulos = self._naturezas(canal, blocos, len(inicios))
+                janela = self.janelas[nome][canal]
+                for k in range(len(inicios)):
+                    janela.adicionar(int(inicios[k]), minimo[k], maximo[k], soma[k], contagem[k], rotulos[k])
+
+    def _naturezas(self, canal, blocos, n):
+        # O FP mínimo guarda sua natureza, dada pelo sinal da potência reativa
+        # média no mesmo intervalo.
+        if not canal.startswith(PREFIXO_FP):
+            return [None] * n
+        reativa = blocos.get(PREFIXO_REATIVA + canal[len(PREFIXO_FP):])
+        if reativa is None:
+            return [None] * n
+        return np.where(reativa[2] >= 0, INDUTIVO, CAPACITIVO).tolist()
+
+    def sincronizar(self, piramide):
+        # Reconstrói as janelas a partir dos rollups já gravados; só é lido o
+        # trecho coberto pela maior janela de cada nível.
+        ultimo = piramide.armazenamento.ultimo_timestamp()
+        if ultimo is None:
+            return
+        for nome_nivel in {origem for _, origem in self.definicoes.values()}:
+            duracao = max(d for d, origem in self.definicoes.values() if origem == nome_nivel)
+            nivel = piramide.nivel(nome_nivel)
+            df = nivel.armazenamento.ler_janela(inicio=ultimo - duracao)
+            if len(df) == 0:
+                continue
+            blocos = {None: df["contagem"].to_numpy()}
+            for canal in self.canais:
+                media = df[f"{canal}|media"].to_numpy()
+                blocos[canal] = (df[f"{canal}|min"].to_numpy(), df[f"{canal}|max"].to_numpy(), media * blocos[None], df[f"{canal}|ultimo"].to_numpy())
+            self.anexar_intervalos(nome_nivel, df.index.asi8, blocos)
+        df = piramide.armazenamento.ler_linhas(len(piramide.armazenamento) - 1, len(piramide.armazenamento), self.canais)
+        self.atualizar_ultimos(df.index, df)
+
+    def resumo(self, janela, canal):
+        j = self.janelas[janela][canal]
+        return {
+            "minimo": j.minimo,
+            "maximo": j.maximo,
+            "media": j.media,
+            "ultimo": self.ultimos.get(canal, np.nan),
+        }
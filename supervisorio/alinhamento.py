@@ -0,0 +1,138 @@
+import numpy as np
+import pandas as pd
+
+# =======================================================================
+# ALINHAMENTO À GRADE E LACUNAS
+# Medidores que derivam, perdem amostras ou gravam em ritmos diferentes
+# são levados a uma grade comum: múltiplos de `passo` desde a época, então
+# todos os fluxos alinhados com o mesmo passo caem nos mesmos instantes.
+# Cada amostra vai para o ponto da grade mais próximo, se estiver a até
+# `tolerancia` dele (como merge_asof com direction="nearest"); se várias
+# caem no mesmo ponto, fica a mais próxima. Nada é interpolado: um ponto
+# sem amostra fica fora do resultado e entra nas lacunas.
+# Tudo é vetorizado e em O(n) (sem ordenação), sobre blocos já ordenados.
+# =======================================================================
+
+PASSO_PADRAO = pd.Timedelta(seconds=1)
+# Nos gráficos, um intervalo maior que FATOR_LACUNA vezes o passo típico
+# da janela é uma lacuna (falta de dados), não uma linha reta.
+FATOR_LACUNA = 3
+
+
+def ajustar_grade(tempos, passo, tolerancia=None, depois_de=None):
+    # tempos: int64 (ns) crescentes. Retorna (pontos da grade, índices das
+    # amostras escolhidas, desvio de cada uma). depois_de: só pontos
+    # posteriores a ele (continuação de um bloco anterior).
+    tempos = np.asarray(tempos, dtype=np.int64)
+    tolerancia = passo // 2 if tolerancia is None else min(tolerancia, passo // 2)
+    alvos = (tempos + passo // 2) // passo * passo
+    desvios = np.abs(tempos - alvos)
+    validas = desvios <= tolerancia
+    if depois_de is not None:
+        validas &= alvos > depois_de
+    indices = np.flatnonzero(validas)
+    if len(indices) == 0:
+        return np.zeros(0, dtype=np.int64), indices, np.zeros(0, dtype=np.int64)
+    alvos, desvios = alvos[indices], desvios[indices]
+    # Menor desvio de cada ponto (os alvos repetidos são consecutivos); nos
+    # empates, a primeira amostra.
+    inicios = np.flatnonzero(np.r_[True, alvos[1:] != alvos[:-1]])
+    tamanhos = np.diff(np.r_[inicios, len(alvos)])
+    minimos = np.repeat(np.minimum.reduceat(desvios, inicios), tamanhos)
+    candidatas = np.flatnonzero(desvios == minimos)
+    grupos = np.repeat(np.arange(len(inicios)), tamanhos)[candidatas]
+    escolhidas = candidatas[np.r_[True, grupos[1:] != grupos[:-1]]]
+    return alvos[escolhidas], indices[escolhidas], desvios[escolhidas]
+
+
+def lacunas(grade, passo, anterior=None):
+    # (inícios, fins) dos trechos da grade sem amostra, como [início, fim).
+    pontos = np.asarray(grade, dtype=np.int64)
+    if anterior is not None:
+        pontos = np.r_[np.int64(anterior), pontos]
+    saltos = np.flatnonzero(np.diff(pontos) > passo)
+    return pontos[saltos] + passo, pontos[saltos + 1]
+
+
+class AlinhadorGrade:
+    # Alinha os blocos sucessivos de um fluxo, com o mesmo resultado que
+    # alinhar tudo de uma vez: o último ponto de um bloco fica retido
+    # enquanto uma amostra do bloco seguinte ainda puder estar mais perto
+    # dele. Amostras exatamente na grade nunca esperam.
+    def __init__(self, passo=PASSO_PADRAO, tolerancia=None, ultimo=None):
+        self.passo = pd.Timedelta(passo).value
+        self.tolerancia = self.passo // 2 if tolerancia is None else min(pd.Timedelta(tolerancia).value, self.passo // 2)
+        # Último ponto da grade entregue (ns).
+        self.ultimo = None if ultimo is None else pd.Timestamp(ultimo).value
+        self._retido = None
+        # Amostras recebidas e lacunas encontradas até agora.
+        self.lidas = 0
+        self.pontos_faltantes = 0
+        self.trechos_faltantes = 0
+
+    def alinhar(self, tempos, dados):
+        # Retorna (pontos da grade int64, {canal: valores}) prontos para o
+        # armazenamento; pode ser vazio.
+        tempos = np.asarray(tempos, dtype=np.int64)
+        self.lidas += len(tempos)
+        if self._retido is not None:
+            tempo_retido, valores_retidos = self._retido
+            tempos = np.r_[np.int64(tempo_retido), tempos]
+            dados = {c: np.r_[valores_retidos[c], v] for c, v in dados.items()}
+            self._retido = None
+        if len(tempos) == 0:
+            return tempos, dados
+        grade, indices, desvios = ajustar_grade(tempos, self.passo, self.tolerancia, self.ultimo)
+        if len(grade) and desvios[-1] > 0 and tempos[-1] < grade[-1] + self.tolerancia:
+            k = indices[-1]
+            self._retido = (tempos[k], {c: np.asarray(v)[k] for c, v in dados.items()})
+            grade, indices = grade[:-1], indices[:-1]
+        return self._entregar(grade, {c: np.asarray(v)[indices] for c, v in dados.items()})
+
+    def concluir(self):
+        # Entrega o ponto retido (fim do fluxo).
+        if self._retido is None:
+            return np.zeros(0, dtype=np.int64), {}
+        tempo, valores = self._retido
+        self._retido = None
+        alvo = (tempo + self.passo // 2) // self.passo * self.passo
+        return self._entregar(np.array([alvo], dtype=np.int64), {c: np.asarray([v]) for c, v in valores.items()})
+
+    def _entregar(self, grade, dados):
+        if len(grade):
+            inicios, fins = lacunas(grade, self.passo, self.ultimo)
+            self.pontos_faltantes += int(((fins - inicios) // self.passo).sum())
+            self.trechos_faltantes += len(inicios)
+            self.ultimo = int(grade[-1])
+        return grade, dados
+
+    def blocos(self, blocos):
+        # Gerador: alinha blocos (tempos, {canal: valores}) de um arquivo.
+        for tempos, dados in blocos:
+            grade, alinhados = self.alinhar(tempos, dados)
+            if len(grade):
+                yield grade, alinhados
+        grade, alinhados = self.concluir()
+        if len(grade):
+            yield grade, alinhados
+
+
+def marcar_lacunas(df, largura=pd.Timedelta(0), fator=FATOR_LACUNA):
+    # Insere uma linha NaN logo depois de cada lacuna, para que as linhas dos
+    # gráficos sejam interrompidas em vez de ligar os dois lados da falta.
+    # largura: intervalo de um nível de rollup (0 nos dados brutos). Um
+    # nível denso tem lacuna onde falta um intervalo; dados mais esparsos
+    # que o nível (ou brutos), onde o salto passa de `fator` vezes o típico.
+    if len(df) < 3:
+        return df
+    tempos = df.index.asi8
+    saltos = np.diff(tempos)
+    tipico = int(np.median(saltos))
+    largura = pd.Timedelta(largura).value
+    limite = largura if tipico <= largura else fator * tipico
+    posicoes = np.flatnonzero(saltos > limite)
+    if len(posicoes) == 0:
+        return df
+    marcas = tempos[posicoes] + max(largura, tipico)
+    valores = np.insert(df.to_numpy(dtype=np.float64), posicoes + 1, np.nan, axis=0)
+    return pd.DataFrame(valores, index=pd.DatetimeIndex(np.insert(tempos, posicoes + 1, marcas)), columns=df.columns)
@@ -0,0 +1,51 @@
+import pandas as pd
+
+# =======================================================================
+# JANELA AO VIVO
+# Mantém, por sessão e por gráfico, a janela já lida da pirâmide. A cada
+# atualização só a cauda é relida: as linhas a partir do último intervalo
+# (que pode ainda estar aberto e mudando) são descartadas e lidas de novo,
+# e as linhas que saíram do início da janela são cortadas. Se a versão do
+# instantâneo não mudou, nada é lido e o gráfico sabe que pode reaproveitar
+# o desenho anterior.
+# A janela termina na última amostra publicada, e não no relógio, para que
+# ela só ande quando chegam dados novos.
+# =======================================================================
+
+
+class JanelaAoVivo:
+    def __init__(self):
+        self.chave = None
+        self.versao = None
+        self.df = None
+
+    def atualizar(self, piramide, instantaneo, duracao, canais, pontos_alvo=1000, estatistica="media"):
+        # Retorna (df, mudou).
+        if instantaneo.ultimo_timestamp is None:
+            return pd.DataFrame(columns=list(canais)), self.df is not None
+        fim = instantaneo.ultimo_timestamp + pd.Timedelta(1, "ns")
+        inicio = fim - pd.Timedelta(duracao)
+        resolucao = piramide.resolucao(inicio, fim, pontos_alvo)
+        chave = (tuple(canais), pd.Timedelta(duracao), resolucao, estatistica)
+        if chave == self.chave and instantaneo.versao == self.versao:
+            return self.df, False
+
+        if chave != self.chave or self.df is None or self.df.empty:
+            df = piramide.consultar(inicio, fim, canais, pontos_alvo, estatistica, instantaneo.series, resolucao)[1]
+        else:
+            # Os intervalos são alinhados à sua largura; no envelope o máximo
+            # fica no meio do intervalo, então arredondar para baixo acha o
+            # início do último intervalo nos dois casos.
+            # No início da janela vale o mesmo: só entram intervalos que começam
+            # depois de `inicio`.
+            largura = 1 if resolucao == "bruto" else piramide.nivel(resolucao).largura.value
+            recorte = pd.Timestamp(self.df.index[-1].value // largura * largura)
+            corte_inicial = pd.Timestamp(-(-inicio.value // largura) * largura)
+            cauda = piramide.consultar(recorte, fim, canais, pontos_alvo, estatistica, instantaneo.series, resolucao)[1]
+            anteriores = self.df.iloc[self.df.index.searchsorted(corte_inicial):self.df.index.searchsorted(recorte)]
+            df = pd.concat([anteriores, cauda]) if len(anteriores) else cauda
+
+        self.chave = chave
+        self.versao = instantaneo.versao
+        self.df = df
+        return df, True
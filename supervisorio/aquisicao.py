@@ -0,0 +1,258 @@
+import argparse
+import asyncio
+import logging
+import random
+import sys
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from supervisorio.canais import CANAIS_ARMAZENADOS
+from supervisorio.catalogo import carregar_dispositivos, registrar_medidores
+from supervisorio.modbus import CONEXOES_POR_ENDERECO, EM_VOO_POR_CONEXAO, ErroModbus, ErroProtocolo, PoolConexoes, decodificar, planejar_leituras
+
+# =======================================================================
+# AQUISIÇÃO POR MODBUS-TCP
+# Um laço asyncio, numa thread própria, consulta todos os dispositivos a
+# cada `intervalo`, ao mesmo tempo (até `concorrencia` dispositivos em
+# curso), sobre as conexões persistentes de modbus.py. Os ciclos são alinhados ao relógio e
+# o instante da amostra é o do ciclo, não o da resposta: os medidores de
+# um ciclo ficam com o mesmo timestamp. Um dispositivo que ainda não
+# terminou o ciclo anterior não é consultado de novo.
+# Cada falha (timeout, rede, exceção Modbus) põe o dispositivo em espera
+# exponencial com sorteio, de BACKOFF_INICIAL a BACKOFF_MAXIMO, para que
+# um medidor desligado não prenda conexões a cada ciclo; a primeira
+# resposta depois disso zera a espera.
+# As amostras decodificadas vão para uma FonteAquisicao por medidor, que
+# a frota (ou um ServicoIngestao) lê como qualquer outra fonte.
+#
+# Cada medidor gravado mantém dezenas de arquivos abertos (séries, rollups,
+# harmônicos); centenas de medidores cabem em poucos processos escritores,
+# cada um com uma parte dos dispositivos (--parte) e a mesma frota.
+#
+#   python -m supervisorio.aquisicao --dispositivos dispositivos.json --destino dados
+# =======================================================================
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_AQUISICAO = 1.0
+TIMEOUT = 0.5
+CONCORRENCIA = 256
+BACKOFF_INICIAL = 1.0
+BACKOFF_MAXIMO = 60.0
+# Amostras guardadas por medidor enquanto a ingestão não as lê.
+MAX_PENDENTES = 3600
+ERROS_DISPOSITIVO = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ErroModbus, ErroProtocolo)
+
+
+@dataclass
+class Dispositivo:
+    medidor: str
+    host: str
+    porta: int = 502
+    unidade: int = 1
+    falhas: int = 0
+    # time.monotonic() antes do qual o dispositivo não é consultado.
+    espera_ate: float = 0.0
+    em_curso: bool = False
+    ultimo_erro: str = None
+
+
+class FonteAquisicao:
+    # Fonte para o ServicoIngestao (mesma interface de FonteSintetica): as
+    # amostras de um medidor desde a última leitura. Canais que o mapa de
+    # registros não traz ficam NaN.
+    def __init__(self, canais=CANAIS_ARMAZENADOS, max_pendentes=MAX_PENDENTES):
+        self.canais = list(canais)
+        self._amostras = deque(maxlen=max_pendentes)
+        self._trava = threading.Lock()
+
+    def adicionar(self, instante, valores):
+        # instante em ns; valores: {canal: valor}.
+        with self._trava:
+            self._amostras.append((instante, valores))
+
+    def ler(self, ultimo):
+        with self._trava:
+            amostras = list(self._amostras)
+            self._amostras.clear()
+        # Só instantes crescentes e posteriores ao armazenamento (o relógio
+        # pode ter voltado).
+        limite = -1 if ultimo is None else ultimo.value
+        validas = []
+        for instante, valores in amostras:
+            if instante > limite:
+                validas.append((instante, valores))
+                limite = instante
+        if not validas:
+            return None
+        dados = {c: np.array([valores.get(c, np.nan) for _, valores in validas], dtype=np.float32) for c in self.canais}
+        return pd.DatetimeIndex(np.array([instante for instante, _ in validas], dtype="datetime64[ns]")), dados, None
+
+
+class ServicoAquisicao:
+    def __init__(self, dispositivos, intervalo=INTERVALO_AQUISICAO, timeout=TIMEOUT, concorrencia=CONCORRENCIA, conexoes_por_endereco=CONEXOES_POR_ENDERECO, em_voo=EM_VOO_POR_CONEXAO, leituras=None, semente=None):
+        # dispositivos: dicts como os de catalogo.carregar_dispositivos.
+        self.dispositivos = [Dispositivo(d["medidor"], d["host"], int(d.get("porta", 502)), int(d.get("unidade", 1))) for d in dispositivos]
+        self.fontes = {d.medidor: FonteAquisicao() for d in self.dispositivos}
+        self.intervalo = intervalo
+        self.timeout = timeout
+        self.concorrencia = concorrencia
+        self.conexoes_por_endereco = conexoes_por_endereco
+        self.em_voo = em_voo
+        self.leituras = planejar_leituras() if leituras is None else leituras
+        # Contagens do último ciclo concluído e acumuladas.
+        self.ultimo_ciclo = {}
+        self.totais = {"ciclos": 0, "respostas": 0, "falhas": 0}
+        self._aleatorio = random.Random(semente)
+        self._parar = threading.Event()
+        self._thread = None
+
+    # --- Um dispositivo ---
+    async def ler_dispositivo(self, dispositivo):
+        # As leituras de um dispositivo vão juntas (em paralelo na conexão).
+        respostas = await asyncio.gather(*(
+            self._pool.conexao(dispositivo.host, dispositivo.porta).ler(dispositivo.unidade, inicio, quantidade, self.timeout)
+            for inicio, quantidade, _ in self.leituras
+        ))
+        valores = {}
+        for (_, _, canais), dados in zip(self.leituras, respostas):
+            valores.update(decodificar(canais, dados))
+        return valores
+
+    async def _consultar(self, dispositivo, instante, ciclo):
+        dispositivo.em_curso = True
+        try:
+            async with self._semaforo:
+                valores = await self.ler_dispositivo(dispositivo)
+        except ERROS_DISPOSITIVO as erro:
+            self._falhou(dispositivo, erro)
+            ciclo["falhas"] += 1
+        else:
+            dispositivo.falhas = 0
+            self.fontes[dispositivo.medidor].adicionar(instante, valores)
+            ciclo["respostas"] += 1
+        finally:
+            dispositivo.em_curso = False
+
+    def _falhou(self, dispositivo, erro):
+        dispositivo.falhas += 1
+        dispositivo.ultimo_erro = f"{type(erro).__name__}: {erro}"
+        espera = min(BACKOFF_MAXIMO, BACKOFF_INICIAL * 2 ** (dispositivo.falhas - 1)) * self._aleatorio.uniform(0.8, 1.2)
+        dispositivo.espera_ate = time.monotonic() + espera
+        # Só a primeira falha de uma sequência vai para o log.
+        if dispositivo.falhas == 1:
+            logger.warning("Medidor %s sem leitura (%s); novas tentativas com espera crescente", dispositivo.medidor, dispositivo.ultimo_erro)
+
+    # --- Ciclos ---
+    async def _ciclo(self, instante):
+        inicio = time.monotonic()
+        ciclo = {"instante": pd.Timestamp(instante), "consultados": 0, "respostas": 0, "falhas": 0, "em_espera": 0, "atrasados": 0}
+        tarefas = []
+        for dispositivo in self.dispositivos:
+            if dispositivo.em_curso:
+                ciclo["atrasados"] += 1
+            elif dispositivo.espera_ate > inicio:
+                ciclo["em_espera"] += 1
+            else:
+                tarefas.append(self._consultar(dispositivo, instante, ciclo))
+        ciclo["consultados"] = len(tarefas)
+        await asyncio.gather(*tarefas)
+        ciclo["segundos"] = time.monotonic() - inicio
+        self.ultimo_ciclo = ciclo
+        self.totais["ciclos"] += 1
+        self.totais["respostas"] += ciclo["respostas"]
+        self.totais["falhas"] += ciclo["falhas"]
+
+    async def executar(self):
+        self._pool = PoolConexoes(self.conexoes_por_endereco, self.em_voo)
+        self._semaforo = asyncio.Semaphore(self.concorrencia)
+        ciclos = set()
+        proximo = (time.time() // self.intervalo + 1) * self.intervalo
+        try:
+            while not self._parar.is_set():
+                await asyncio.sleep(max(0.0, proximo - time.time()))
+                tarefa = asyncio.create_task(self._ciclo(pd.Timestamp(datetime.fromtimestamp(proximo)).value))
+                ciclos.add(tarefa)
+                tarefa.add_done_callback(ciclos.discard)
+                proximo += self.intervalo
+                # Ciclos perdidos (ex.: processo suspenso) não são recuperados.
+                if proximo < time.time():
+                    proximo = (time.time() // self.intervalo + 1) * self.intervalo
+        finally:
+            for tarefa in ciclos:
+                tarefa.cancel()
+            await asyncio.gather(*ciclos, return_exceptions=True)
+            self._pool.fechar()
+
+    # --- Thread em segundo plano ---
+    def iniciar(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=asyncio.run, args=(self.executar(),), name="aquisicao", daemon=True)
+        self._thread.start()
+
+    def parar(self, esperar=False):
+        # O laço para no próximo ciclo; os ciclos em curso são cancelados.
+        self._parar.set()
+        if esperar and self._thread is not None:
+            self._thread.join()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Aquisição Modbus-TCP: consulta os dispositivos e grava na frota.")
+    parser.add_argument("--dispositivos", required=True, help="JSON com a lista de dispositivos (ver catalogo.py).")
+    parser.add_argument("--destino", help="Diretório da frota; sem ele, só consulta e mostra as contagens.")
+    parser.add_argument("--parte", default="0/1", help="K/N: este processo fica com os dispositivos K, K + N, ... (vários escritores na mesma frota).")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO_AQUISICAO)
+    parser.add_argument("--timeout", type=float, default=TIMEOUT)
+    parser.add_argument("--concorrencia", type=int, default=CONCORRENCIA)
+    parser.add_argument("--conexoes-por-endereco", type=int, default=CONEXOES_POR_ENDERECO)
+    parser.add_argument("--em-voo", type=int, default=EM_VOO_POR_CONEXAO, help="Requisições em curso por conexão (1 para gateways que só aceitam uma).")
+    parser.add_argument("--duracao", type=float, help="Segundos até parar (padrão: até Ctrl+C).")
+    parser.add_argument("--relatorio", type=float, default=10.0, help="Segundos entre as linhas de contagem.")
+    args = parser.parse_args(argumentos)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+
+    todos = carregar_dispositivos(args.dispositivos)
+    parte, partes = (int(x) for x in args.parte.split("/"))
+    dispositivos = todos[parte::partes]
+    aquisicao = ServicoAquisicao(dispositivos, args.intervalo, args.timeout, args.concorrencia, args.conexoes_por_endereco, args.em_voo)
+    frota = None
+    if args.destino:
+        from supervisorio.frota import ServicoFrota
+
+        # Todas as partes registram o catálogo inteiro: gravações simultâneas
+        # dão o mesmo resultado.
+        registrar_medidores(args.destino, {d["medidor"]: {"site": d["site"]} for d in todos})
+        frota = ServicoFrota(args.destino, aquisicao.fontes, intervalo=args.intervalo)
+    aquisicao.iniciar()
+    if frota is not None:
+        frota.iniciar()
+
+    fim = None if args.duracao is None else time.monotonic() + args.duracao
+    try:
+        while fim is None or time.monotonic() < fim:
+            time.sleep(args.relatorio if fim is None else max(0.0, min(args.relatorio, fim - time.monotonic())))
+            c = aquisicao.ultimo_ciclo
+            if c:
+                print(f"{c['instante']:%H:%M:%S} {c['respostas']}/{len(dispositivos)} responderam em {c['segundos']:.3f} s "
+                      f"({c['falhas']} falhas, {c['em_espera']} em espera, {c['atrasados']} atrasados)", flush=True)
+    except KeyboardInterrupt:
+        pass
+    aquisicao.parar(esperar=True)
+    if frota is not None:
+        # Grava o que a aquisição leu depois da última passada.
+        frota.parar(esperar=True)
+        frota.ingerir_pendentes()
+    print(f"{aquisicao.totais['ciclos']} ciclos, {aquisicao.totais['respostas']} leituras, {aquisicao.totais['falhas']} falhas.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
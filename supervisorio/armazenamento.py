@@ -0,0 +1,451 @@
+import copy
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from supervisorio.compressao import gravar_bloco, ler_bloco, resolucao
+from supervisorio.janelas import ColunaEmBlocos, IndiceTemporal, Janela, SeriesIndexadas
+
+# =======================================================================
+# ARMAZENAMENTO COLUNAR EM DISCO
+# Um arquivo binário por canal (mapeado em memória com np.memmap) mais um
+# arquivo de timestamps (int64, nanossegundos). Os arquivos só crescem:
+# novos blocos são anexados ao final e a leitura de uma janela de tempo
+# toca apenas as páginas do trecho pedido.
+# As linhas antigas podem ser arquivadas (arquivar): blocos de
+# LINHAS_POR_BLOCO_ARQUIVO linhas comprimidos em DIRETORIO_ARQUIVO (ver
+# compressao.py), e só as recentes ficam nos arquivos mapeados. Cada
+# arquivamento grava uma nova geração dos arquivos mapeados, sem as linhas
+# arquivadas, e troca o meta.json de uma vez; os arquivos da geração
+# anterior só são apagados PRAZO_ANTERIORES segundos depois, então quem
+# ainda lê pelo meta anterior continua consistente. As leituras juntam blocos e arquivos
+# mapeados (janelas.ColunaEmBlocos) e só decodificam os blocos tocados.
+# =======================================================================
+
+ARQUIVO_META = "meta.json"
+ARQUIVO_TEMPO = "tempo.i64"
+ARQUIVO_SUBSTITUICAO = "substituicao.json"
+DIRETORIO_ARQUIVO = "arquivo"
+BYTES_POR_COPIA = 16 * 1024 * 1024
+# Cerca de 9 h de dados brutos a 1 s, 4 dias do rollup de 10 s e 23 do de
+# 1 min: os gráficos de dias ou mais (rollups de 1 min para cima) quase
+# sempre leem só a parte mapeada.
+LINHAS_POR_BLOCO_ARQUIVO = 32_768
+PRAZO_ANTERIORES = 60
+
+
+def nome_arquivo(canal):
+    # 'Tensão Fase A' -> 'tensao_fase_a'
+    texto = unicodedata.normalize("NFKD", canal).encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]+", "_", texto.lower()).strip("_")
+
+
+def _nomear_geracao(meta, geracao):
+    # Arquivos mapeados da geração (a 0 mantém os nomes sem sufixo).
+    sufixo = f".g{geracao}" if geracao else ""
+    meta["geracao"] = geracao
+    meta["tempo"] = f"tempo{sufixo}.i64"
+    for canal, info in meta["canais"].items():
+        info["arquivo"] = f"{nome_arquivo(canal)}{sufixo}.bin"
+
+
+def _arquivo_tempo(meta):
+    return meta.get("tempo", ARQUIVO_TEMPO)
+
+
+def _blocos(meta):
+    return meta.get("arquivo", {}).get("blocos", [])
+
+
+def _anteriores_vencidos(meta):
+    return bool(meta.get("anteriores")) and time.time() - meta["anteriores_desde"] > PRAZO_ANTERIORES
+
+
+class ArmazenamentoSeries:
+    def __init__(self, diretorio, canais=None, dtype="float64", largura=1, somente_leitura=False):
+        # largura > 1 cria canais vetoriais: cada linha guarda `largura` valores
+        # (ex.: um espectro harmônico inteiro por instante).
+        # somente_leitura: para ler (ex.: de outro processo) um armazenamento
+        # que pode estar recebendo anexações. Nada é criado nem reparado; como
+        # os timestamps são gravados por último, as linhas contadas por eles
+        # já estão completas em todos os canais. Um arquivamento feito pelo
+        # escritor é percebido pela mudança do meta.json.
+        self.diretorio = diretorio
+        self.somente_leitura = somente_leitura
+        self._trava = threading.Lock()
+        self._trava_arquivamento = threading.Lock()
+        self._mapas = {}
+        self._limites = None
+        if somente_leitura:
+            self._carregar_meta()
+            return
+
+        os.makedirs(diretorio, exist_ok=True)
+        self._concluir_substituicao()
+        self._carregar_meta()
+        novos = [c for c in canais or [] if c not in self._meta["canais"]]
+        for canal in novos:
+            self._meta["canais"][canal] = {"arquivo": nome_arquivo(canal) + ".bin", "dtype": dtype, "largura": largura}
+        if self._meta.get("geracao"):
+            _nomear_geracao(self._meta, self._meta["geracao"])
+        self._salvar_meta()
+        self._reparar()
+        # Canais criados depois que já há histórico começam preenchidos com NaN
+        # (nos blocos arquivados, a falta do canal é lida como NaN).
+        n = self._n_mapeadas(self._meta)
+        for canal in novos:
+            if n and np.issubdtype(np.dtype(dtype), np.floating):
+                with open(self._caminho(self._meta["canais"][canal]["arquivo"]), "r+b") as f:
+                    f.write(np.full(n * largura, np.nan, dtype=dtype).tobytes())
+
+    # --- Metadados ---
+    def _carregar_meta(self):
+        caminho = os.path.join(self.diretorio, ARQUIVO_META)
+        try:
+            with open(caminho, encoding="utf-8") as f:
+                self._assinatura_meta = os.fstat(f.fileno()).st_mtime_ns, os.fstat(f.fileno()).st_ino
+                self._meta = json.load(f)
+        except FileNotFoundError:
+            self._assinatura_meta = None
+            self._meta = {"canais": {}}
+
+    def _salvar_meta(self):
+        caminho = os.path.join(self.diretorio, ARQUIVO_META)
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self._meta, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, caminho)
+
+    def _trocar_meta(self, novo, anteriores):
+        # Grava o novo meta. `anteriores` (arquivos que só o meta atual usa)
+        # esperam PRAZO_ANTERIORES antes de serem apagados, junto com os que
+        # já esperavam e ainda não venceram.
+        em_uso = set(self._arquivos(novo)) | {b["arquivo"] for b in _blocos(novo)}
+        esperando = [] if _anteriores_vencidos(self._meta) else self._meta.get("anteriores", [])
+        self._apagar_anteriores(em_uso | set(esperando))
+        novo["anteriores"] = [a for a in esperando + anteriores if a not in em_uso]
+        novo["anteriores_desde"] = time.time()
+        self._meta = novo
+        self._salvar_meta()
+        self._mapas.clear()
+
+    def _apagar_anteriores(self, manter=()):
+        for arquivo in self._meta.get("anteriores", []):
+            if arquivo not in manter and os.path.exists(self._caminho(arquivo)):
+                os.remove(self._caminho(arquivo))
+
+    def _estado(self):
+        # (meta, linhas arquivadas, linhas mapeadas), todos da mesma versão do meta.
+        if self.somente_leitura:
+            try:
+                estado = os.stat(os.path.join(self.diretorio, ARQUIVO_META))
+                assinatura = estado.st_mtime_ns, estado.st_ino
+            except FileNotFoundError:
+                assinatura = None
+            if assinatura != self._assinatura_meta:
+                self._carregar_meta()
+                self._mapas = {}
+        meta = self._meta
+        return meta, int(self._indice_blocos(meta)[0][-1]), self._n_mapeadas(meta)
+
+    def _indice_blocos(self, meta):
+        # (limites, caminhos, primeiros timestamps) dos blocos, refeito só
+        # quando a lista de blocos do meta muda.
+        blocos = _blocos(meta)
+        if self._limites is None or self._limites[0] is not blocos:
+            limites = np.cumsum([0] + [b["linhas"] for b in blocos])
+            primeiros = np.array([b["primeiro"] for b in blocos], dtype=np.int64)
+            self._limites = (blocos, limites, [self._caminho(b["arquivo"]) for b in blocos], primeiros)
+        return self._limites[1:]
+
+    def _caminho(self, arquivo):
+        return os.path.join(self.diretorio, arquivo)
+
+    def _n_mapeadas(self, meta):
+        caminho = self._caminho(_arquivo_tempo(meta))
+        if not os.path.exists(caminho):
+            return 0
+        return os.path.getsize(caminho) // 8
+
+    def _reparar(self):
+        # O arquivo de timestamps é gravado por último em cada anexação; se o
+        # processo caiu no meio de uma escrita, os canais podem ter linhas a
+        # mais. Elas são descartadas para manter todas as colunas alinhadas.
+        n = self._n_mapeadas(self._meta)
+        for info in self._meta["canais"].values():
+            caminho = self._caminho(info["arquivo"])
+            tamanho = n * np.dtype(info["dtype"]).itemsize * info.get("largura", 1)
+            if not os.path.exists(caminho):
+                open(caminho, "wb").close()
+            if os.path.getsize(caminho) != tamanho:
+                with open(caminho, "r+b") as f:
+                    f.truncate(tamanho)
+
+    @property
+    def canais(self):
+        return list(self._meta["canais"])
+
+    def __len__(self):
+        _, arquivadas, mapeadas = self._estado()
+        return arquivadas + mapeadas
+
+    @property
+    def versao(self):
+        # Como o armazenamento só cresce, o número de linhas identifica o conteúdo.
+        return len(self)
+
+    def _arquivos(self, meta=None):
+        # Arquivos mapeados; o de timestamps vem por último, como na anexação.
+        meta = self._meta if meta is None else meta
+        return [info["arquivo"] for info in meta["canais"].values()] + [_arquivo_tempo(meta)]
+
+    def _bytes_por_linha(self, meta):
+        tamanhos = {info["arquivo"]: np.dtype(info["dtype"]).itemsize * info.get("largura", 1) for info in meta["canais"].values()}
+        tamanhos[_arquivo_tempo(meta)] = 8
+        return tamanhos
+
+    # --- Reconstrução ---
+    def clonar(self, diretorio, linhas=0):
+        # Novo armazenamento com os mesmos canais e as primeiras `linhas` linhas.
+        # Os blocos arquivados inteiros são ligados (ou copiados); o resto vai
+        # para os arquivos mapeados do clone, copiado em pedaços. O clone já
+        # usa a geração seguinte, para substituir_por não sobrepor arquivos
+        # em uso.
+        shutil.rmtree(diretorio, ignore_errors=True)
+        os.makedirs(diretorio)
+        series = self.series()
+        meta = copy.deepcopy(self._meta)
+        meta.pop("anteriores", None)
+        _nomear_geracao(meta, meta.get("geracao", 0) + 1)
+        blocos, copiadas = [], 0
+        for bloco in _blocos(meta):
+            if copiadas + bloco["linhas"] > linhas:
+                break
+            os.makedirs(os.path.join(diretorio, DIRETORIO_ARQUIVO), exist_ok=True)
+            try:
+                os.link(self._caminho(bloco["arquivo"]), os.path.join(diretorio, bloco["arquivo"]))
+            except OSError:
+                shutil.copyfile(self._caminho(bloco["arquivo"]), os.path.join(diretorio, bloco["arquivo"]))
+            blocos.append(bloco)
+            copiadas += bloco["linhas"]
+        if blocos:
+            meta["arquivo"] = {"blocos": blocos}
+        else:
+            meta.pop("arquivo", None)
+        with open(os.path.join(diretorio, ARQUIVO_META), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        colunas = [series.colunas[c] for c in meta["canais"]] + [series.indice.tempos]
+        for arquivo, coluna, tamanho in zip(self._arquivos(meta), colunas, self._bytes_por_linha(meta).values()):
+            passo = max(1, BYTES_POR_COPIA // tamanho)
+            with open(os.path.join(diretorio, arquivo), "wb") as destino:
+                for a in range(copiadas, linhas, passo):
+                    destino.write(np.ascontiguousarray(coluna[a:min(a + passo, linhas)]).tobytes())
+        return ArmazenamentoSeries(diretorio)
+
+    def substituir_por(self, outro):
+        # Troca o conteúdo pelo de um clone reconstruído (ex.: após importar
+        # dados antigos). Os arquivos do clone (de outra geração, com nomes
+        # novos) são movidos com os.replace e o meta.json vai por último, então
+        # quem ainda mapeia os arquivos antigos continua lendo a versão
+        # anterior. Um diário registra a troca para que uma queda no meio dela
+        # seja concluída na próxima abertura.
+        with self._trava_arquivamento, self._trava:
+            arquivos = outro._arquivos() + [b["arquivo"] for b in _blocos(outro._meta)] + [ARQUIVO_META]
+            anteriores = self._arquivos() + [b["arquivo"] for b in _blocos(self._meta)]
+            diario = {"origem": os.path.abspath(outro.diretorio), "arquivos": arquivos}
+            caminho = self._caminho(ARQUIVO_SUBSTITUICAO)
+            with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(diario, f, ensure_ascii=False)
+            os.replace(caminho + ".tmp", caminho)
+            self._concluir_substituicao()
+            with open(self._caminho(ARQUIVO_META), encoding="utf-8") as f:
+                self._trocar_meta(json.load(f), anteriores)
+
+    def _concluir_substituicao(self):
+        caminho = self._caminho(ARQUIVO_SUBSTITUICAO)
+        if not os.path.exists(caminho):
+            return
+        with open(caminho, encoding="utf-8") as f:
+            diario = json.load(f)
+        for arquivo in diario["arquivos"]:
+            origem = os.path.join(diario["origem"], arquivo)
+            if os.path.exists(origem):
+                os.makedirs(os.path.dirname(self._caminho(arquivo)), exist_ok=True)
+                os.replace(origem, self._caminho(arquivo))
+        os.remove(caminho)
+        shutil.rmtree(diario["origem"], ignore_errors=True)
+
+    # --- Arquivamento ---
+    def blocos_a_arquivar(self, linhas_por_bloco=LINHAS_POR_BLOCO_ARQUIVO):
+        # Blocos completos além dos `linhas_por_bloco` mais recentes, que
+        # continuam mapeados (são os mais lidos).
+        return max(0, self._n_mapeadas(self._meta) // linhas_por_bloco - 1)
+
+    def arquivamento_pendente(self, linhas_por_bloco=LINHAS_POR_BLOCO_ARQUIVO):
+        # Há blocos a comprimir ou arquivos anteriores com o prazo vencido.
+        return _anteriores_vencidos(self._meta) or self.blocos_a_arquivar(linhas_por_bloco) > 0
+
+    def arquivar(self, linhas_por_bloco=LINHAS_POR_BLOCO_ARQUIVO):
+        # Comprime as linhas mapeadas mais antigas em blocos. Pode rodar junto
+        # com anexar: as linhas arquivadas não mudam mais, e só a troca de
+        # geração segura a trava. Retorna o número de blocos criados.
+        with self._trava_arquivamento:
+            meta, _, _ = self._estado()
+            if _anteriores_vencidos(meta):
+                with self._trava:
+                    self._apagar_anteriores(self._arquivos())
+                    self._meta = {c: v for c, v in self._meta.items() if c not in ("anteriores", "anteriores_desde")}
+                    self._salvar_meta()
+                meta = self._meta
+            quantidade = self.blocos_a_arquivar(linhas_por_bloco)
+            if quantidade == 0:
+                return 0
+            geracao = meta.get("geracao", 0) + 1
+            series = self.series()
+            base = len(_blocos(meta))
+            # As linhas mapeadas começam depois das já arquivadas.
+            arquivadas = int(self._indice_blocos(meta)[0][-1])
+            os.makedirs(self._caminho(DIRETORIO_ARQUIVO), exist_ok=True)
+            novos = []
+            for k in range(quantidade):
+                a = arquivadas + k * linhas_por_bloco
+                b = a + linhas_por_bloco
+                tempos = series.indice.tempos[a:b].view(np.int64)
+                arquivo = os.path.join(DIRETORIO_ARQUIVO, f"g{geracao}_{base + k:06d}.bloco")
+                gravar_bloco(self._caminho(arquivo), tempos, {c: v[a:b] for c, v in series.colunas.items()},
+                             {c: resolucao(c) for c in meta["canais"]})
+                novos.append({"arquivo": arquivo, "linhas": linhas_por_bloco, "primeiro": int(tempos[0]), "ultimo": int(tempos[-1])})
+
+            with self._trava:
+                # Nova geração com as linhas mapeadas que sobraram, incluindo
+                # as anexadas durante a compressão.
+                novo = copy.deepcopy(self._meta)
+                _nomear_geracao(novo, geracao)
+                novo["arquivo"] = {"blocos": _blocos(meta) + novos}
+                movidas = quantidade * linhas_por_bloco
+                mapeadas = self._n_mapeadas(self._meta)
+                origens = self._bytes_por_linha(self._meta)
+                for origem, destino in zip(origens, self._arquivos(novo)):
+                    restante = (mapeadas - movidas) * origens[origem]
+                    with open(self._caminho(origem), "rb") as f, open(self._caminho(destino), "wb") as g:
+                        f.seek(movidas * origens[origem])
+                        while restante > 0:
+                            pedaco = f.read(min(restante, BYTES_POR_COPIA))
+                            g.write(pedaco)
+                            restante -= len(pedaco)
+                self._trocar_meta(novo, self._arquivos())
+            return quantidade
+
+    # --- Escrita ---
+    def anexar(self, timestamps, dados):
+        tempos = np.asarray(pd.DatetimeIndex(timestamps).asi8, dtype=np.int64)
+        if len(tempos) == 0:
+            return 0
+        if np.any(np.diff(tempos) <= 0):
+            raise ValueError("Os timestamps de um bloco devem ser estritamente crescentes.")
+        faltando = set(self.canais) - set(dados)
+        if faltando:
+            raise ValueError(f"Canais ausentes no bloco: {sorted(faltando)}")
+
+        with self._trava:
+            ultimo = self.ultimo_timestamp()
+            if ultimo is not None and tempos[0] <= ultimo.value:
+                raise ValueError("O armazenamento é somente de anexação: o bloco começa antes do último timestamp gravado.")
+            # Todos os canais são conferidos antes de gravar o primeiro: um
+            # bloco recusado não deixa linhas a mais em parte das colunas.
+            convertidos = {}
+            for canal, info in self._meta["canais"].items():
+                valores = np.asarray(dados[canal], dtype=info["dtype"])
+                if info.get("largura", 1) > 1 and valores.shape[1:] != (info["largura"],):
+                    raise ValueError(f"Canal '{canal}' espera linhas com {info['largura']} valores.")
+                if len(valores) != len(tempos):
+                    raise ValueError(f"Canal '{canal}' tem {len(valores)} valores para {len(tempos)} timestamps.")
+                convertidos[info["arquivo"]] = valores
+            for arquivo, valores in convertidos.items():
+                with open(self._caminho(arquivo), "ab") as f:
+                    f.write(valores.tobytes())
+            with open(self._caminho(_arquivo_tempo(self._meta)), "ab") as f:
+                f.write(tempos.tobytes())
+        return len(tempos)
+
+    # --- Leitura ---
+    def _mapa(self, arquivo, dtype, n, largura=1):
+        # Reaproveita o memmap enquanto o arquivo não cresceu.
+        em_cache = self._mapas.get(arquivo)
+        if em_cache is not None and len(em_cache) == n:
+            return em_cache
+        forma = (n,) if largura == 1 else (n, largura)
+        if n == 0:
+            mapa = np.empty(forma, dtype=dtype)
+        else:
+            mapa = np.memmap(self._caminho(arquivo), dtype=dtype, mode="r", shape=forma)
+        self._mapas[arquivo] = mapa
+        return mapa
+
+    def _coluna(self, meta, mapeadas, nome, arquivo, dtype, largura=1):
+        # Sem blocos arquivados, a coluna é o próprio memmap.
+        mapa = self._mapa(arquivo, dtype, mapeadas, largura)
+        if not _blocos(meta):
+            return mapa
+        limites, caminhos, primeiros = self._indice_blocos(meta)
+        return ColunaEmBlocos(limites, lambda k: ler_bloco(caminhos[k], nome, dtype, largura), mapa, primeiros if nome is None else None)
+
+    def _tempos(self, meta, mapeadas):
+        return self._coluna(meta, mapeadas, None, _arquivo_tempo(meta), np.int64).view("datetime64[ns]")
+
+    def tempos(self):
+        meta, _, mapeadas = self._estado()
+        return self._tempos(meta, mapeadas)
+
+    def canal(self, canal, n=None):
+        meta, arquivadas, mapeadas = self._estado()
+        info = meta["canais"][canal]
+        mapeadas = mapeadas if n is None else n - arquivadas
+        return self._coluna(meta, mapeadas, canal, info["arquivo"], info["dtype"], info.get("largura", 1))
+
+    def ultimo_timestamp(self):
+        meta, _, mapeadas = self._estado()
+        if mapeadas:
+            return pd.Timestamp(self._mapa(_arquivo_tempo(meta), np.int64, mapeadas)[mapeadas - 1])
+        blocos = _blocos(meta)
+        return pd.Timestamp(blocos[-1]["ultimo"]) if blocos else None
+
+    def primeiro_timestamp(self):
+        meta, _, mapeadas = self._estado()
+        blocos = _blocos(meta)
+        if blocos:
+            return pd.Timestamp(blocos[0]["primeiro"])
+        return pd.Timestamp(self._mapa(_arquivo_tempo(meta), np.int64, mapeadas)[0]) if mapeadas else None
+
+    def series(self, canais=None):
+        # Retrato do conteúdo atual: índice e colunas são visões dos memmaps
+        # (e dos blocos arquivados), e várias janelas podem ser recortadas
+        # dele sem cópia.
+        meta, _, mapeadas = self._estado()
+        canais = list(meta["canais"]) if canais is None else canais
+        colunas = {}
+        for c in canais:
+            info = meta["canais"][c]
+            colunas[c] = self._coluna(meta, mapeadas, c, info["arquivo"], info["dtype"], info.get("largura", 1))
+        return SeriesIndexadas(IndiceTemporal(self._tempos(meta, mapeadas)), colunas, meta.get("geracao", 0))
+
+    def localizar(self, inicio=None, fim=None):
+        fatia = IndiceTemporal(self.tempos()).fatia(inicio, fim)
+        return fatia.start, fatia.stop
+
+    def janela(self, inicio=None, fim=None, canais=None):
+        return self.series(canais).janela(inicio, fim)
+
+    def ler_janela(self, inicio=None, fim=None, canais=None):
+        return self.janela(inicio, fim, canais).para_dataframe()
+
+    def ler_linhas(self, a, b, canais=None):
+        series = self.series(canais)
+        return Janela(series.indice.tempos[a:b], {c: v[a:b] for c, v in series.colunas.items()}).para_dataframe()
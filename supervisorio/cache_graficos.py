@@ -0,0 +1,78 @@
+import io
+import threading
+from collections import OrderedDict
+
+# =======================================================================
+# CACHE DE GRÁFICOS RENDERIZADOS
+# Guarda as imagens PNG já rasterizadas, indexadas por uma chave que
+# descreve tudo o que influencia o desenho (canais, janela de tempo,
+# versão dos dados, formato do eixo...). Tem limite de itens e de bytes
+# e descarta primeiro o item usado há mais tempo (LRU).
+# =======================================================================
+
+DPI_PADRAO = 200
+# st.image reduz e recodifica, a cada rerun, imagens mais largas que isso.
+LARGURA_MAXIMA_PX = 1460
+
+
+def figura_para_png(fig, dpi=DPI_PADRAO):
+    # Rasteriza e libera a figura; nada fica preso ao registro do pyplot.
+    # A resolução é limitada para a imagem já sair na largura exibida (o
+    # recorte 'tight' só estreita a figura).
+    dpi = min(dpi, LARGURA_MAXIMA_PX / fig.get_figwidth())
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    fig.clear()
+    return buffer.getvalue()
+
+
+class CacheGraficos:
+    def __init__(self, max_itens=64, max_bytes=64 * 1024 * 1024):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+        self.acertos = 0
+        self.falhas = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+    @property
+    def bytes_ocupados(self):
+        return self._bytes
+
+    def obter(self, chave):
+        with self._trava:
+            imagem = self._itens.get(chave)
+            if imagem is None:
+                self.falhas += 1
+                return None
+            self._itens.move_to_end(chave)
+            self.acertos += 1
+            return imagem
+
+    def guardar(self, chave, imagem):
+        with self._trava:
+            antiga = self._itens.pop(chave, None)
+            if antiga is not None:
+                self._bytes -= len(antiga)
+            self._itens[chave] = imagem
+            self._bytes += len(imagem)
+            while self._itens and (len(self._itens) > self.max_itens or self._bytes > self.max_bytes):
+                _, descartada = self._itens.popitem(last=False)
+                self._bytes -= len(descartada)
+
+    def obter_ou_renderizar(self, chave, renderizar):
+        # renderizar() deve devolver uma figura do matplotlib.
+        imagem = self.obter(chave)
+        if imagem is None:
+            imagem = figura_para_png(renderizar())
+            self.guardar(chave, imagem)
+        return imagem
+
+    def limpar(self):
+        with self._trava:
+            self._itens.clear()
+            self._bytes = 0
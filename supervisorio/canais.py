@@ -0,0 +1,34 @@
+# =======================================================================
+# CANAIS MEDIDOS
+# Nomes dos canais como aparecem no dashboard. O último termo do nome é a
+# fase (ou par de fases), usado pelo filtro de fases das páginas.
+# =======================================================================
+
+FASES = ['A', 'B', 'C']
+
+CANAIS = [
+    'Tensão Fase A', 'Tensão Fase B', 'Tensão Fase C',
+    'Tensão Linha AB', 'Tensão Linha BC', 'Tensão Linha CA',
+    'Corrente A', 'Corrente B', 'Corrente C',
+] + [f'Potência {tipo} {fase}' for fase in FASES for tipo in ['Ativa', 'Reativa', 'Aparente']] + [
+    'Fator de Potência A', 'Fator de Potência B', 'Fator de Potência C',
+    'THD Tensão A', 'THD Tensão B', 'THD Tensão C',
+    'THD Corrente A', 'THD Corrente B', 'THD Corrente C',
+]
+
+# Fasores da fundamental (ver supervisorio/fasores.py): módulo e ângulo de
+# cada fase, em relação à Tensão Fase A, e componentes simétricas.
+CANAIS_FASORES = [
+    f'{grandeza} {fase}' for grandeza in ['Tensão Fundamental', 'Ângulo Tensão', 'Corrente Fundamental', 'Ângulo Corrente'] for fase in FASES
+] + [
+    f'{grandeza} Sequência {sequencia}' for grandeza in ['Tensão', 'Corrente'] for sequencia in ['Positiva', 'Negativa', 'Zero']
+] + ['Desequilíbrio de Tensão']
+CANAIS += CANAIS_FASORES
+
+# Canais com espectro harmônico completo (um vetor de ordens por instante).
+CANAIS_ESPECTRO = ['Tensão Fase A', 'Tensão Fase B', 'Tensão Fase C', 'Corrente A', 'Corrente B', 'Corrente C']
+
+# Canais calculados a partir de outros (ver supervisorio/derivados.py): não
+# são gravados no armazenamento bruto.
+CANAIS_DERIVADOS = [f'Potência Aparente {fase}' for fase in FASES] + [f'Fator de Potência {fase}' for fase in FASES]
+CANAIS_ARMAZENADOS = [c for c in CANAIS if c not in CANAIS_DERIVADOS]
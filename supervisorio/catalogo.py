@@ -0,0 +1,80 @@
+import json
+import os
+import threading
+
+# =======================================================================
+# CATÁLOGO DA FROTA
+# Os dados são particionados por medidor: cada um tem seu diretório (o
+# layout de um ServicoIngestao) dentro do diretório da frota. O catálogo
+# (frota.json) diz a que site cada medidor pertence; um subdiretório com
+# resumo (gravado pelo serviço de ingestão a cada publicação) que não está
+# no catálogo entra no site padrão.
+# Os medidores lidos por Modbus-TCP vêm de um arquivo de dispositivos:
+#   [{"medidor": "medidor_000", "host": "10.0.0.5", "porta": 502, "unidade": 1, "site": "..."}]
+# Só usa a biblioteca padrão: a barra lateral o lê antes da primeira pintura.
+# =======================================================================
+
+ARQUIVO_CATALOGO = "frota.json"
+ARQUIVO_RESUMO = "resumo.json"
+SITE_PADRAO = "Sem site"
+MEDIDORES_POR_SITE = 10
+_trava = threading.Lock()
+
+
+def nome_medidor(indice):
+    return f"medidor_{indice:03d}"
+
+
+def nome_site(indice, medidores_por_site=MEDIDORES_POR_SITE):
+    return f"site_{indice // medidores_por_site:02d}"
+
+
+def carregar_catalogo(diretorio):
+    # {medidor: {"site": ..., outros atributos}}
+    caminho = os.path.join(diretorio, ARQUIVO_CATALOGO)
+    if not os.path.exists(caminho):
+        return {}
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)["medidores"]
+
+
+def registrar_medidores(diretorio, medidores):
+    # Acrescenta ou atualiza medidores ({nome: atributos}) no catálogo.
+    with _trava:
+        catalogo = carregar_catalogo(diretorio)
+        novo = {nome: {**catalogo.get(nome, {}), **atributos} for nome, atributos in medidores.items()}
+        if all(catalogo.get(nome) == atributos for nome, atributos in novo.items()):
+            return
+        catalogo.update(novo)
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, ARQUIVO_CATALOGO)
+        # Temporário por processo: vários escritores podem registrar juntos.
+        temporario = f"{caminho}.{os.getpid()}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"medidores": dict(sorted(catalogo.items()))}, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, caminho)
+
+
+def listar_medidores(diretorio):
+    # {medidor: site}, em ordem de nome: os do catálogo e os subdiretórios
+    # que já têm resumo.
+    catalogo = carregar_catalogo(diretorio)
+    sites = {nome: atributos.get("site", SITE_PADRAO) for nome, atributos in catalogo.items()}
+    if os.path.isdir(diretorio):
+        for entrada in os.scandir(diretorio):
+            if entrada.is_dir() and os.path.exists(os.path.join(entrada.path, ARQUIVO_RESUMO)):
+                sites.setdefault(entrada.name, SITE_PADRAO)
+    return dict(sorted(sites.items()))
+
+
+def carregar_dispositivos(caminho):
+    # Lista de dispositivos; "porta" (502), "unidade" (1) e "site" são opcionais.
+    with open(caminho, encoding="utf-8") as f:
+        dispositivos = json.load(f)
+    return [{"porta": 502, "unidade": 1, "site": SITE_PADRAO, **d} for d in dispositivos]
+
+
+def salvar_dispositivos(caminho, dispositivos):
+    with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(dispositivos, f, ensure_ascii=False, indent=2)
+    os.replace(caminho + ".tmp", caminho)
@@ -0,0 +1,206 @@
+import json
+import os
+import struct
+import zlib
+
+import numpy as np
+
+from supervisorio.derivados import CacheJanelas
+
+# =======================================================================
+# COMPRESSÃO DOS BLOCOS ARQUIVADOS
+# Um bloco arquivado é um arquivo com as linhas de um trecho antigo do
+# armazenamento, cada coluna comprimida à parte (lê-se só a dos canais
+# pedidos):
+# - timestamps: delta do delta (zero em amostragem regular), sem perda;
+# - canais com resolução conhecida (RESOLUCOES): inteiros em unidades da
+#   resolução e a diferença entre linhas vizinhas, pequena porque as
+#   amostras mudam pouco. O erro fica em meia resolução, bem abaixo da
+#   exatidão dos medidores;
+# - os demais: XOR dos bits de cada valor com o anterior, sem perda.
+# Os inteiros resultantes vão em zigue-zague, no menor tipo que os comporta
+# e com os bytes separados por posição (os mais altos, quase sempre zero,
+# ficam juntos) antes do zlib. A decodificação é só zlib e somas
+# acumuladas (ou XOR acumulado) vetorizadas; os blocos decodificados ficam
+# num cache LRU limitado em bytes.
+# =======================================================================
+
+NIVEL_ZLIB = 6
+MAX_BYTES_CACHE_BLOCOS = 64 * 1024 * 1024
+# Valores maiores que isto em unidades da resolução vão pelo XOR.
+LIMITE_ESCALA = 2**52
+# Prefixo do canal (antes do '|' das colunas de rollup): resolução.
+RESOLUCOES = {
+    "Fator de Potência": 1e-4,
+    "Desequilíbrio": 1e-3,
+    "Tensão": 1e-2,
+    "Corrente": 1e-3,
+    "Potência": 1e-1,
+    "THD": 1e-2,
+    "Ângulo": 1e-2,
+    "contagem": 1,
+}
+
+_cache = CacheJanelas(MAX_BYTES_CACHE_BLOCOS)
+
+
+def resolucao(coluna):
+    canal = coluna.split("|")[0]
+    return next((r for prefixo, r in RESOLUCOES.items() if canal.startswith(prefixo)), None)
+
+
+# --- Inteiros ---
+def _zigue_zague(inteiros):
+    inteiros = inteiros.astype(np.int64, copy=False)
+    return ((inteiros << 1) ^ (inteiros >> 63)).view(np.uint64)
+
+
+def _desfazer_zigue_zague(naturais):
+    naturais = naturais.astype(np.uint64, copy=False)
+    return (naturais >> np.uint64(1)).view(np.int64) ^ -(naturais & np.uint64(1)).view(np.int64)
+
+
+def _comprimir(naturais):
+    # (dtype, bytes): menor tipo sem sinal e bytes agrupados por posição.
+    maximo = int(naturais.max()) if len(naturais) else 0
+    dtype = next(np.dtype(t) for t in (np.uint8, np.uint16, np.uint32, np.uint64) if maximo <= np.iinfo(t).max)
+    planos = naturais.astype(dtype).view(np.uint8).reshape(len(naturais), dtype.itemsize).T
+    return dtype.str, zlib.compress(planos.tobytes(), NIVEL_ZLIB)
+
+
+def _descomprimir(dtype, dados, n):
+    dtype = np.dtype(dtype)
+    planos = np.frombuffer(zlib.decompress(dados), dtype=np.uint8).reshape(dtype.itemsize, n)
+    return planos.T.copy().view(dtype).ravel()
+
+
+# --- Colunas ---
+def codificar_tempos(tempos):
+    # tempos: int64 crescentes. (parâmetros, partes)
+    tempos = np.asarray(tempos, dtype=np.int64)
+    deltas = np.diff(tempos)
+    parametros = {"modo": "delta_do_delta", "primeiro": int(tempos[0]), "delta": int(deltas[0]) if len(deltas) else 0}
+    parametros["inteiros"], dados = _comprimir(_zigue_zague(np.diff(deltas)))
+    return parametros, [dados]
+
+
+def _decodificar_tempos(parametros, partes, n):
+    deltas = np.empty(n, dtype=np.int64)
+    deltas[0] = parametros["primeiro"]
+    if n > 1:
+        deltas[1] = parametros["delta"]
+        deltas[2:] = _desfazer_zigue_zague(_descomprimir(parametros["inteiros"], partes[0], n - 2))
+        np.cumsum(deltas[1:], out=deltas[1:])
+    return np.cumsum(deltas)
+
+
+def codificar_valores(valores, resolucao=None):
+    # valores: (n,) ou (n, largura). (parâmetros, partes)
+    valores = np.asarray(valores)
+    colunas = valores.reshape(len(valores), -1)
+    finitos = np.isfinite(colunas)
+    escala = None if resolucao is None or not finitos.any() else np.abs(colunas[finitos]).max() / resolucao
+    if escala is None or escala >= LIMITE_ESCALA:
+        # XOR com o valor anterior da mesma coluna.
+        bits = colunas.view(f"u{colunas.dtype.itemsize}").T
+        anteriores = np.zeros_like(bits)
+        anteriores[:, 1:] = bits[:, :-1]
+        parametros = {"modo": "xor"}
+        parametros["inteiros"], dados = _comprimir((bits ^ anteriores).ravel())
+        return parametros, [dados]
+
+    # Os não finitos (NaN de canais sem dado) repetem o último valor finito
+    # da coluna (os do começo, o primeiro), para não criar saltos, e são
+    # guardados à parte.
+    posicoes = np.where(finitos, np.arange(len(colunas))[:, None], finitos.argmax(axis=0))
+    np.maximum.accumulate(posicoes, axis=0, out=posicoes)
+    preenchidas = np.where(finitos.any(axis=0), colunas[posicoes, np.arange(colunas.shape[1])], 0)
+    inteiros = np.rint(preenchidas.astype(np.float64) / resolucao).astype(np.int64).T
+    diferencas = np.diff(inteiros, axis=1, prepend=0).ravel()
+    parametros = {"modo": "escala", "resolucao": resolucao}
+    parametros["inteiros"], dados = _comprimir(_zigue_zague(diferencas))
+    partes = [dados]
+    if not finitos.all():
+        partes += [zlib.compress(np.packbits(~finitos.T).tobytes(), NIVEL_ZLIB), zlib.compress(colunas.T[~finitos.T].tobytes(), NIVEL_ZLIB)]
+    return parametros, partes
+
+
+def _decodificar_valores(parametros, partes, dtype, forma):
+    n, largura = forma[0], int(np.prod(forma[1:], dtype=np.int64))
+    naturais = _descomprimir(parametros["inteiros"], partes[0], n * largura)
+    if parametros["modo"] == "xor":
+        bits = np.bitwise_xor.accumulate(naturais.astype(f"u{dtype.itemsize}").reshape(largura, n), axis=1)
+        return np.ascontiguousarray(bits.view(dtype).T).reshape(forma)
+    inteiros = np.cumsum(_desfazer_zigue_zague(naturais).reshape(largura, n), axis=1)
+    valores = (inteiros * parametros["resolucao"]).astype(dtype)
+    if len(partes) > 1:
+        faltantes = np.unpackbits(np.frombuffer(zlib.decompress(partes[1]), dtype=np.uint8), count=n * largura).reshape(largura, n).astype(bool)
+        valores[faltantes] = np.frombuffer(zlib.decompress(partes[2]), dtype=dtype)
+    return np.ascontiguousarray(valores.T).reshape(forma)
+
+
+# --- Arquivo de um bloco ---
+# Cabeçalho JSON (precedido do seu tamanho em 4 bytes) com os parâmetros e
+# a posição das partes de cada coluna; depois as partes.
+def gravar_bloco(caminho, tempos, colunas, resolucoes=None):
+    # colunas: {canal: valores}; resolucoes: {canal: resolução ou None}.
+    resolucoes = resolucoes or {}
+    cabecalho = {"linhas": len(tempos), "colunas": {}}
+    partes = []
+    posicao = 0
+
+    def registrar(nome, parametros, dados):
+        nonlocal posicao
+        parametros["partes"] = []
+        for parte in dados:
+            parametros["partes"].append([posicao, len(parte)])
+            posicao += len(parte)
+        cabecalho["colunas"][nome] = parametros
+        partes.extend(dados)
+
+    registrar(None, *codificar_tempos(tempos))
+    for canal, valores in colunas.items():
+        valores = np.asarray(valores)
+        parametros, dados = codificar_valores(valores, resolucoes.get(canal))
+        registrar(canal, {**parametros, "dtype": valores.dtype.str, "forma": list(valores.shape)}, dados)
+    # A chave None (tempos) vira "null" no JSON.
+    texto = json.dumps(cabecalho, ensure_ascii=False).encode("utf-8")
+    temporario = caminho + ".tmp"
+    with open(temporario, "wb") as f:
+        f.write(struct.pack("<I", len(texto)) + texto)
+        for parte in partes:
+            f.write(parte)
+    os.replace(temporario, caminho)
+    return os.path.getsize(caminho)
+
+
+def _ler_coluna(caminho, nome, dtype, largura):
+    with open(caminho, "rb") as f:
+        tamanho, = struct.unpack("<I", f.read(4))
+        cabecalho = json.loads(f.read(tamanho))
+        inicio = 4 + tamanho
+        parametros = cabecalho["colunas"].get("null" if nome is None else nome)
+        if parametros is None:
+            # Canal criado depois que o bloco foi arquivado.
+            return np.full((cabecalho["linhas"],) if largura == 1 else (cabecalho["linhas"], largura), np.nan, dtype=dtype)
+        partes = []
+        for posicao, comprimento in parametros["partes"]:
+            f.seek(inicio + posicao)
+            partes.append(f.read(comprimento))
+    if nome is None:
+        return _decodificar_tempos(parametros, partes, cabecalho["linhas"])
+    return _decodificar_valores(parametros, partes, np.dtype(parametros["dtype"]), tuple(parametros["forma"]))
+
+
+def ler_bloco(caminho, nome=None, dtype="float64", largura=1):
+    # Coluna `nome` (None: timestamps int64) do bloco, decodificada e somente
+    # leitura. Um armazenamento recriado no mesmo diretório (ex.: os rollups
+    # refeitos numa importação) reaproveita os nomes dos blocos, então o
+    # cache identifica o arquivo também pelo inode, tamanho e mtime.
+    def decodificar():
+        valores = _ler_coluna(caminho, nome, dtype, largura)
+        valores.flags.writeable = False
+        return valores
+
+    estado = os.stat(caminho)
+    return _cache.obter_ou_calcular((caminho, estado.st_ino, estado.st_size, estado.st_mtime_ns, nome), decodificar)
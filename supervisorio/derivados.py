@@ -0,0 +1,192 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from supervisorio.canais import FASES
+from supervisorio.janelas import Janela
+
+# =======================================================================
+# CANAIS DERIVADOS
+# A potência aparente (Vrms·Irms) e o fator de potência (|P|/S) são funções
+# exatas dos canais medidos, então não ocupam espaço no armazenamento bruto:
+# são calculados de forma vetorizada só para a janela pedida, e o resultado
+# fica em um cache LRU por janela. As tensões de linha são gravadas, mas
+# onde faltarem (NaN, ex.: históricos importados) são completadas a partir
+# das tensões de fase, supondo o sistema equilibrado (defasagem de 120°).
+# A potência reativa continua gravada: com harmônicos ela não sai de V, I
+# e FP.
+# =======================================================================
+
+MAX_BYTES_CACHE = 64 * 1024 * 1024
+
+
+def _aparente(tensao, corrente):
+    return tensao * corrente
+
+
+def _fator_potencia(ativa, tensao, corrente):
+    # Mesma definição de potencia.calcular_grandezas.
+    aparente = tensao * corrente
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fp = np.where(aparente > 0, np.abs(ativa) / aparente, 1.0)
+    return np.clip(fp, 0.0, 1.0).astype(aparente.dtype, copy=False)
+
+
+def _tensao_linha(fase_1, fase_2):
+    return np.sqrt(fase_1 * fase_1 + fase_2 * fase_2 + fase_1 * fase_2)
+
+
+# canal: (função, canais de entrada)
+DERIVADOS = {}
+for _fase in FASES:
+    DERIVADOS[f'Potência Aparente {_fase}'] = (_aparente, [f'Tensão Fase {_fase}', f'Corrente {_fase}'])
+    DERIVADOS[f'Fator de Potência {_fase}'] = (_fator_potencia, [f'Potência Ativa {_fase}', f'Tensão Fase {_fase}', f'Corrente {_fase}'])
+# Canais gravados cujas lacunas são completadas.
+COMPLETADOS = {
+    f'Tensão Linha {a}{b}': (_tensao_linha, [f'Tensão Fase {a}', f'Tensão Fase {b}'])
+    for a, b in (('A', 'B'), ('B', 'C'), ('C', 'A'))
+}
+
+
+def derivaveis(canais):
+    # Derivados que ainda não estão em `canais` e têm todas as entradas nele.
+    return [c for c, (_, entradas) in DERIVADOS.items() if c not in canais and all(e in canais for e in entradas)]
+
+
+def _calcular(canal, colunas):
+    funcao, entradas = DERIVADOS.get(canal) or COMPLETADOS[canal]
+    return funcao(*(np.asarray(colunas[e]) for e in entradas))
+
+
+def _completar(canal, valores, colunas):
+    faltando = np.isnan(valores)
+    if not faltando.any():
+        return valores
+    return np.where(faltando, _calcular(canal, colunas), valores).astype(valores.dtype, copy=False)
+
+
+def completar_derivados(dados):
+    # Para um bloco que vai ser ingerido: acrescenta os derivados ausentes e
+    # completa as lacunas dos canais de COMPLETADOS.
+    completos = dict(dados)
+    for canal in derivaveis(completos):
+        completos[canal] = _calcular(canal, completos)
+    for canal, (_, entradas) in COMPLETADOS.items():
+        if all(e in completos for e in entradas):
+            atual = completos.get(canal)
+            completos[canal] = _calcular(canal, completos) if atual is None else _completar(canal, np.asarray(atual), completos)
+    return completos
+
+
+class CacheJanelas:
+    # LRU limitado em bytes para as colunas derivadas de cada janela.
+    def __init__(self, max_bytes=MAX_BYTES_CACHE):
+        self.max_bytes = max_bytes
+        self._itens = OrderedDict()
+        self._bytes = 0
+        self._trava = threading.Lock()
+
+    def obter_ou_calcular(self, chave, calcular):
+        with self._trava:
+            valores = self._itens.get(chave)
+            if valores is not None:
+                self._itens.move_to_end(chave)
+                return valores
+        valores = calcular()
+        if valores.nbytes > self.max_bytes // 4:
+            return valores
+        with self._trava:
+            if chave not in self._itens:
+                self._itens[chave] = valores
+                self._bytes += valores.nbytes
+            while self._bytes > self.max_bytes:
+                _, descartado = self._itens.popitem(last=False)
+                self._bytes -= descartado.nbytes
+        return valores
+
+
+class SeriesDerivadas:
+    # Mesma interface de janelas.SeriesIndexadas; os canais derivados são
+    # calculados no recorte. Como o armazenamento só cresce e não repete
+    # timestamps, (canal, primeiro e último instante, número de linhas)
+    # identifica o conteúdo de uma janela e serve de chave do cache, junto
+    # com a geração: uma importação que preenche timestamps já gravados
+    # substitui o armazenamento sem mudar esses números.
+    def __init__(self, base, canais, cache):
+        self.base = base
+        self.indice = base.indice
+        self.geracao = base.geracao
+        self.canais = list(canais)
+        self.cache = cache
+
+    def _recortar(self, fatia, canais):
+        canais = self.canais if canais is None else canais
+        tempos = self.indice.tempos[fatia]
+        # Só as colunas usadas pelos canais pedidos: recortar uma coluna
+        # arquivada custa decodificar seus blocos.
+        usadas = set()
+        for canal in canais:
+            usadas.update(DERIVADOS[canal][1] if canal in DERIVADOS and canal not in self.base.colunas else [canal] + COMPLETADOS.get(canal, (None, []))[1])
+        colunas_base = {c: v[fatia] for c, v in self.base.colunas.items() if c in usadas}
+        colunas = {}
+        for canal in canais:
+            if canal in DERIVADOS and canal not in colunas_base:
+                calcular = lambda canal=canal: _calcular(canal, colunas_base)
+            elif canal in COMPLETADOS and all(e in colunas_base for e in COMPLETADOS[canal][1]):
+                calcular = lambda canal=canal: _completar(canal, colunas_base[canal], colunas_base)
+            else:
+                colunas[canal] = colunas_base[canal]
+                continue
+            if len(tempos) == 0:
+                colunas[canal] = calcular()
+            else:
+                chave = (canal, self.geracao, int(tempos[0].view(np.int64)), int(tempos[-1].view(np.int64)), len(tempos))
+                colunas[canal] = self.cache.obter_ou_calcular(chave, calcular)
+        return Janela(tempos, colunas)
+
+    def janela(self, inicio=None, fim=None, canais=None):
+        return self._recortar(self.indice.fatia(inicio, fim), canais)
+
+    def janelas(self, intervalos, canais=None):
+        return [self._recortar(f, canais) for f in self.indice.fatias(intervalos)]
+
+
+class ArmazenamentoDerivado:
+    # Visão de leitura de um ArmazenamentoSeries que inclui os canais derivados.
+    # A escrita continua sendo feita direto no armazenamento.
+    def __init__(self, armazenamento, cache=None):
+        self.armazenamento = armazenamento
+        self.cache = CacheJanelas() if cache is None else cache
+
+    def __getattr__(self, nome):
+        return getattr(self.armazenamento, nome)
+
+    def __len__(self):
+        return len(self.armazenamento)
+
+    @property
+    def canais(self):
+        return self.armazenamento.canais + derivaveis(self.armazenamento.canais)
+
+    def _entradas(self, canais):
+        # Canais gravados necessários para montar `canais`.
+        gravados = self.armazenamento.canais
+        necessarios = []
+        for canal in canais:
+            extras = DERIVADOS[canal][1] if canal not in gravados else [canal] + COMPLETADOS.get(canal, (None, []))[1]
+            necessarios += [c for c in extras if c in gravados and c not in necessarios]
+        return necessarios
+
+    def series(self, canais=None):
+        canais = self.canais if canais is None else list(canais)
+        return SeriesDerivadas(self.armazenamento.series(self._entradas(canais)), canais, self.cache)
+
+    def janela(self, inicio=None, fim=None, canais=None):
+        return self.series(canais).janela(inicio, fim)
+
+    def ler_janela(self, inicio=None, fim=None, canais=None):
+        return self.janela(inicio, fim, canais).para_dataframe()
+
+    def ler_linhas(self, a, b, canais=None):
+        return self.series(canais)._recortar(slice(a, b), None).para_dataframe()
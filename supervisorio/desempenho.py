@@ -0,0 +1,237 @@
+import json
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# =======================================================================
+# INSTRUMENTAÇÃO DE DESEMPENHO
+# Cada execução do script (rerun) abre uma Execucao; os trechos medidos
+# com `perfilador.medir(etapa)` somam tempo de parede, saldo de blocos
+# alocados pelo Python e número de chamadas. Ao concluir, os tempos entram
+# em janelas rolantes por etapa (p50/p95) e, se pedido, viram uma linha
+# JSON no arquivo de métricas.
+# Desligado, `medir` devolve sempre o mesmo objeto vazio: nem relógio nem
+# alocação. Ligado, cada medição custa dezenas de µs, quase tudo no saldo
+# de blocos (sys.getallocatedblocks), que só conta objetos do alocador do
+# Python: os buffers grandes do numpy ficam de fora (para isso servem os
+# benchmarks, com tracemalloc).
+# numpy e pandas só são importados no resumo: o módulo é carregado pelo
+# script antes de qualquer página e não pesa na partida do processo.
+# =======================================================================
+
+JANELA_ROLANTE = 200
+_trava_arquivo = threading.Lock()
+
+
+class _Desligado:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        return False
+
+
+DESLIGADO = _Desligado()
+
+
+class _Cronometro:
+    __slots__ = ("execucao", "etapa", "t0", "b0")
+
+    def __init__(self, execucao, etapa):
+        self.execucao = execucao
+        self.etapa = etapa
+
+    def __enter__(self):
+        self.b0 = sys.getallocatedblocks()
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *excecao):
+        segundos = time.perf_counter() - self.t0
+        self.execucao.somar(self.etapa, segundos, sys.getallocatedblocks() - self.b0)
+        return False
+
+
+class Execucao:
+    def __init__(self, rotulo):
+        self.rotulo = rotulo
+        self.instante = datetime.now()
+        self.t0 = time.perf_counter()
+        self.total = None
+        # etapa: [segundos, blocos, chamadas]
+        self.etapas = {}
+
+    def somar(self, etapa, segundos, blocos):
+        medida = self.etapas.setdefault(etapa, [0.0, 0, 0])
+        medida[0] += segundos
+        medida[1] += blocos
+        medida[2] += 1
+
+    def como_dict(self):
+        return {
+            "instante": self.instante.isoformat(),
+            "rotulo": self.rotulo,
+            "total_ms": round(self.total * 1000, 3),
+            "etapas": {e: {"ms": round(s * 1000, 3), "blocos": b, "chamadas": n} for e, (s, b, n) in self.etapas.items()},
+        }
+
+
+class Perfilador:
+    # Um por sessão (e um do serviço de ingestão). `ativo` e `arquivo` podem
+    # mudar a qualquer rerun.
+    def __init__(self, ativo=False, arquivo=None, janela=JANELA_ROLANTE):
+        self.ativo = ativo
+        self.arquivo = arquivo
+        self.janela = janela
+        self.ultima = None
+        self._historico = {}
+        self._atual = None
+        self._trava = threading.Lock()
+        # Marcos de partida da execução atual (streamlit_app.py), para a
+        # página marcar sua primeira pintura.
+        self.marcos = SEM_MARCOS
+
+    def iniciar(self, rotulo):
+        # Uma execução não concluída (ex.: st.stop()) é descartada.
+        self._atual = Execucao(rotulo) if self.ativo else None
+
+    def medir(self, etapa):
+        if self._atual is None:
+            return DESLIGADO
+        return _Cronometro(self._atual, etapa)
+
+    def concluir(self):
+        execucao, self._atual = self._atual, None
+        if execucao is None:
+            return None
+        execucao.total = time.perf_counter() - execucao.t0
+        with self._trava:
+            self._guardar(f"Total ({execucao.rotulo})", execucao.total)
+            for etapa, (segundos, _, _) in execucao.etapas.items():
+                self._guardar(etapa, segundos)
+            self.ultima = execucao
+        if self.arquivo:
+            linha = json.dumps(execucao.como_dict(), ensure_ascii=False)
+            with _trava_arquivo, open(self.arquivo, "a", encoding="utf-8") as f:
+                f.write(linha + "\n")
+        return execucao
+
+    @contextmanager
+    def execucao(self, rotulo):
+        # Para trechos que também rodam sozinhos (fragmentos): dentro de uma
+        # execução já aberta só somam nela; fora, são uma execução própria.
+        if self._atual is not None or not self.ativo:
+            yield
+            return
+        self.iniciar(rotulo)
+        try:
+            yield
+        finally:
+            self.concluir()
+
+    def _guardar(self, etapa, segundos):
+        historico = self._historico.get(etapa)
+        if historico is None:
+            historico = self._historico[etapa] = deque(maxlen=self.janela)
+        historico.append(segundos)
+
+    def resumo(self):
+        # Uma linha por etapa: última execução e percentis da janela rolante, em ms.
+        import numpy as np
+        import pandas as pd
+
+        with self._trava:
+            ultima = self.ultima
+            historicos = {e: np.fromiter(h, float) * 1000 for e, h in self._historico.items()}
+        etapas = {} if ultima is None else ultima.etapas
+        linhas = []
+        for etapa, valores in historicos.items():
+            segundos, blocos, chamadas = etapas.get(etapa, (None, None, None))
+            if etapa == f"Total ({getattr(ultima, 'rotulo', None)})":
+                segundos = ultima.total
+            linhas.append({
+                "Etapa": etapa,
+                "Última (ms)": None if segundos is None else segundos * 1000,
+                "p50 (ms)": np.percentile(valores, 50),
+                "p95 (ms)": np.percentile(valores, 95),
+                "Δ blocos": blocos,
+                "Chamadas": chamadas,
+                "Amostras": len(valores),
+            })
+        return pd.DataFrame(linhas, columns=["Etapa", "Última (ms)", "p50 (ms)", "p95 (ms)", "Δ blocos", "Chamadas", "Amostras"])
+
+
+# =======================================================================
+# PARTIDA DO PROCESSO
+# As primeiras execuções do script depois que o servidor sobe têm seus
+# marcos (importação da página, conteúdo...) impressos no log do servidor:
+# a primeira mostra o custo a frio, com as importações pesadas, e as
+# seguintes o custo fixo de cada rerun. Depois disso `iniciar` devolve
+# marcos vazios, que não medem nada.
+# =======================================================================
+
+EXECUCOES_PARTIDA = 3
+META_PRIMEIRA_PINTURA = 1.0
+
+
+class _SemMarcos:
+    def marcar(self, etapa):
+        pass
+
+    def pintar(self):
+        pass
+
+    def concluir(self, rotulo):
+        pass
+
+
+SEM_MARCOS = _SemMarcos()
+
+
+class _Marcos:
+    def __init__(self, numero, t0):
+        self.numero = numero
+        self.t0 = self.anterior = t0
+        self.pintura = None
+        self.etapas = []
+
+    def marcar(self, etapa):
+        agora = time.perf_counter()
+        self.etapas.append((etapa, agora - self.anterior))
+        self.anterior = agora
+
+    def pintar(self):
+        # A página acabou de mandar seu primeiro gráfico; só a primeira
+        # chamada da execução conta.
+        if self.pintura is None:
+            self.pintura = time.perf_counter() - self.t0
+
+    def concluir(self, rotulo):
+        total = time.perf_counter() - self.t0
+        tipo = "a frio" if self.numero == 1 else "rerun"
+        partes = ", ".join(f"{etapa} {s * 1000:.0f} ms" for etapa, s in self.etapas)
+        linha = f"[partida] execução {self.numero} ({tipo}, {rotulo}): {total * 1000:.0f} ms ({partes})"
+        if self.pintura is not None:
+            linha += f"; primeira pintura em {self.pintura * 1000:.0f} ms"
+            if self.pintura > META_PRIMEIRA_PINTURA:
+                linha += f" (acima da meta de {META_PRIMEIRA_PINTURA * 1000:.0f} ms)"
+        print(linha, flush=True)
+
+
+class Partida:
+    # Uma por processo (st.cache_resource no script).
+    def __init__(self, execucoes=EXECUCOES_PARTIDA):
+        self.execucoes = execucoes
+        self._contador = 0
+        self._trava = threading.Lock()
+
+    def iniciar(self, t0=None):
+        with self._trava:
+            if self._contador >= self.execucoes:
+                return SEM_MARCOS
+            self._contador += 1
+            numero = self._contador
+        return _Marcos(numero, time.perf_counter() if t0 is None else t0)
@@ -0,0 +1,240 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from supervisorio.armazenamento import ArmazenamentoSeries, nome_arquivo
+
+# =======================================================================
+# EVENTOS DE QUALIDADE DE ENERGIA
+# Afundamentos, elevações e interrupções de tensão e sobrecorrentes, por
+# canal. Cada bloco ingerido é varrido de forma vetorizada: as amostras
+# fora dos limites formam trechos contíguos (run-length) e cada trecho é
+# um evento com início, duração e valor extremo. Um trecho abaixo do
+# limite de afundamento cujo mínimo passa do limite de interrupção é uma
+# interrupção. O evento termina na primeira amostra que volta para dentro
+# dos limites (amostras sem valor também encerram); o que ainda está
+# aberto no fim do bloco continua no próximo, guardado em um estado
+# pendente em JSON, como nos rollups.
+# Os eventos encerrados vão para um armazenamento colunar por canal,
+# indexado pelo instante de encerramento, que em cada canal é estritamente
+# crescente: consultar um intervalo é uma busca binária, qualquer que seja
+# o tamanho do histórico.
+# =======================================================================
+
+DIRETORIO_EVENTOS = "eventos"
+ARQUIVO_PENDENTE = "pendente.json"
+LINHAS_POR_BLOCO = 500_000
+
+TIPOS_EVENTO = ["Afundamento", "Interrupção", "Elevação", "Sobrecorrente"]
+COLUNAS_EVENTO = ["duracao", "extremo", "tipo"]
+
+# Por grupo de canais (o nome do canal sem a fase). Os limites de tensão são
+# os mesmos dos eixos da página Outros; a interrupção é 10% da nominal
+# (127/220 V).
+LIMITES_PADRAO = {
+    "Tensão Fase": {"afundamento": 115.0, "elevacao": 130.0, "interrupcao": 12.7},
+    "Tensão Linha": {"afundamento": 210.0, "elevacao": 225.0, "interrupcao": 22.0},
+    "Corrente": {"sobrecorrente": 15.0},
+}
+
+
+def carregar_limites(caminho):
+    if os.path.exists(caminho):
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+    return LIMITES_PADRAO
+
+
+def salvar_limites(caminho, limites):
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(limites, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def _grupo(canal):
+    return canal.rsplit(" ", 1)[0]
+
+
+def _condicoes(limites):
+    # [(nome, acima?, limite, tipo)] de um grupo de canais.
+    condicoes = []
+    if "afundamento" in limites:
+        condicoes.append(("abaixo", False, limites["afundamento"], "Afundamento"))
+    if "elevacao" in limites:
+        condicoes.append(("acima", True, limites["elevacao"], "Elevação"))
+    if "sobrecorrente" in limites:
+        condicoes.append(("acima", True, limites["sobrecorrente"], "Sobrecorrente"))
+    return condicoes
+
+
+def trechos(condicao):
+    # Índices [início, fim) dos trechos contíguos em que `condicao` vale.
+    borda = np.diff(np.r_[False, condicao, False].astype(np.int8))
+    return np.flatnonzero(borda == 1), np.flatnonzero(borda == -1)
+
+
+def varrer(tempos, valores, acima, limite, aberto=None):
+    # tempos: int64 (ns); aberto: {"inicio", "extremo"} do evento que veio do
+    # bloco anterior. Retorna (inícios, fins, extremos) dos eventos
+    # encerrados neste bloco e o evento que continua aberto (ou None).
+    condicao = valores > limite if acima else valores < limite
+    inicios, fins = trechos(condicao)
+    reduzir = np.fmax if acima else np.fmin
+    if len(inicios):
+        # Fora da condição o valor vira neutro, então cada segmento do
+        # reduceat (de um início ao próximo) só enxerga o seu trecho.
+        extremos = reduzir.reduceat(np.where(condicao, valores, -np.inf if acima else np.inf), inicios)
+    else:
+        extremos = np.zeros(0)
+    t_inicios = tempos[inicios]
+    t_fins = tempos[np.minimum(fins, len(tempos) - 1)]
+
+    fechados_inicio, fechados_fim, fechados_extremo = [], [], []
+    if aberto is not None:
+        if len(inicios) and inicios[0] == 0:
+            t_inicios[0] = aberto["inicio"]
+            extremos[0] = reduzir(extremos[0], aberto["extremo"])
+        else:
+            fechados_inicio.append(aberto["inicio"])
+            fechados_fim.append(tempos[0])
+            fechados_extremo.append(aberto["extremo"])
+
+    novo_aberto = None
+    if len(fins) and fins[-1] == len(tempos):
+        novo_aberto = {"inicio": int(t_inicios[-1]), "extremo": float(extremos[-1])}
+        t_inicios, t_fins, extremos = t_inicios[:-1], t_fins[:-1], extremos[:-1]
+    return (
+        np.r_[np.array(fechados_inicio, dtype=np.int64), t_inicios],
+        np.r_[np.array(fechados_fim, dtype=np.int64), t_fins],
+        np.r_[np.array(fechados_extremo, dtype=np.float64), extremos],
+    ), novo_aberto
+
+
+class DetectorEventos:
+    def __init__(self, diretorio, canais, limites=LIMITES_PADRAO, somente_leitura=False):
+        # somente_leitura: só consultar os eventos que outro processo grava.
+        self.diretorio = diretorio
+        self.limites = limites
+        self.canais = [c for c in canais if _grupo(c) in limites]
+        self.armazenamentos = {
+            c: ArmazenamentoSeries(os.path.join(diretorio, nome_arquivo(c)), canais=COLUNAS_EVENTO, somente_leitura=somente_leitura)
+            for c in self.canais
+        }
+        self._caminho_pendente = os.path.join(diretorio, ARQUIVO_PENDENTE)
+        if os.path.exists(self._caminho_pendente):
+            with open(self._caminho_pendente, encoding="utf-8") as f:
+                self.pendente = json.load(f)
+        else:
+            self.pendente = {"ultimo": None, "abertos": {}, "duracao_maxima": {}}
+
+    @property
+    def ultimo_processado(self):
+        ultimo = self.pendente["ultimo"]
+        return None if ultimo is None else pd.Timestamp(ultimo)
+
+    def _salvar_pendente(self):
+        temporario = self._caminho_pendente + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.pendente, f, ensure_ascii=False)
+        os.replace(temporario, self._caminho_pendente)
+
+    def sincronizar(self, armazenamento, linhas_por_bloco=LINHAS_POR_BLOCO):
+        # Varre só as linhas gravadas depois da última processada.
+        ultimo = self.ultimo_processado
+        inicio = None if ultimo is None else ultimo + pd.Timedelta(1, "ns")
+        a, n = armazenamento.localizar(inicio=inicio)
+        for b in range(a, n, linhas_por_bloco):
+            df = armazenamento.ler_linhas(b, min(b + linhas_por_bloco, n), self.canais)
+            self.anexar(df.index, {c: df[c].to_numpy() for c in df.columns})
+
+    def anexar(self, timestamps, dados):
+        tempos = np.asarray(pd.DatetimeIndex(timestamps).asi8, dtype=np.int64)
+        if len(tempos) == 0:
+            return
+        # Novos dicionários: quem está lendo o estado anterior não o vê mudar.
+        abertos = dict(self.pendente["abertos"])
+        duracao_maxima = dict(self.pendente["duracao_maxima"])
+        for canal in self.canais:
+            valores = np.asarray(dados[canal], dtype=np.float64)
+            limites = self.limites[_grupo(canal)]
+            aberto_antes = abertos.pop(canal, None)
+            encerrados = []
+            for nome, acima, limite, tipo in _condicoes(limites):
+                aberto = aberto_antes if aberto_antes is not None and aberto_antes["condicao"] == nome else None
+                (inicios, fins, extremos), novo = varrer(tempos, valores, acima, limite, aberto)
+                if novo is not None:
+                    abertos[canal] = dict(novo, condicao=nome)
+                codigos = np.full(len(inicios), float(TIPOS_EVENTO.index(tipo)))
+                if not acima and "interrupcao" in limites:
+                    codigos[extremos < limites["interrupcao"]] = TIPOS_EVENTO.index("Interrupção")
+                encerrados.append((inicios, fins, extremos, codigos))
+            inicios, fins, extremos, codigos = (np.concatenate(partes) for partes in zip(*encerrados))
+            if len(fins) == 0:
+                continue
+            # Em um canal só uma condição pode estar ativa por amostra, então
+            # os encerramentos nunca coincidem.
+            ordem = np.argsort(fins)
+            duracoes = (fins - inicios)[ordem] / 1e9
+            # Se o processo caiu entre gravar os eventos e salvar o estado
+            # pendente, a sincronização encontra de novo os já gravados.
+            gravado = self.armazenamentos[canal].ultimo_timestamp()
+            novos = slice(None) if gravado is None else fins[ordem] > gravado.value
+            self.armazenamentos[canal].anexar(
+                pd.DatetimeIndex(fins[ordem][novos]), {"duracao": duracoes[novos], "extremo": extremos[ordem][novos], "tipo": codigos[ordem][novos]}
+            )
+            duracao_maxima[canal] = max(duracao_maxima.get(canal, 0.0), float(duracoes.max()))
+        self.pendente = {"ultimo": int(tempos[-1]), "abertos": abertos, "duracao_maxima": duracao_maxima}
+        self._salvar_pendente()
+
+    @property
+    def versao(self):
+        # Muda a cada bloco processado e a cada evento encerrado.
+        return (self.pendente["ultimo"], sum(len(a) for a in self.armazenamentos.values()))
+
+    def consultar(self, inicio=None, fim=None, canais=None, tipos=None):
+        # Eventos que se sobrepõem a [inicio, fim), do mais antigo ao mais novo.
+        # Os que ainda estão abertos vêm com 'Fim' vazio e duração até a última
+        # amostra processada.
+        pendente = self.pendente
+        canais = self.canais if canais is None else [c for c in canais if c in self.armazenamentos]
+        inicio_ns = None if inicio is None else pd.Timestamp(inicio).value
+        fim_ns = None if fim is None else pd.Timestamp(fim).value
+        partes = []
+        for k, canal in enumerate(canais):
+            armazenamento = self.armazenamentos[canal]
+            # Só quem encerrou depois de `inicio` se sobrepõe; dos encerrados até
+            # fim + maior duração, ficam os que começaram antes de `fim`.
+            depois = None if inicio_ns is None else pd.Timestamp(inicio_ns + 1)
+            limite = None if fim_ns is None else pd.Timestamp(fim_ns) + pd.Timedelta(seconds=pendente["duracao_maxima"].get(canal, 0.0) + 1e-6)
+            a, b = armazenamento.localizar(depois, limite)
+            fins = armazenamento.tempos()[a:b].view(np.int64)
+            duracoes = np.asarray(armazenamento.canal("duracao")[a:b])
+            inicios = fins - np.round(duracoes * 1e9).astype(np.int64)
+            validos = slice(None) if fim_ns is None else inicios < fim_ns
+            partes.append((inicios[validos], fins[validos], duracoes[validos], np.full(len(inicios[validos]), k),
+                           np.asarray(armazenamento.canal("tipo")[a:b])[validos].astype(np.int64), np.asarray(armazenamento.canal("extremo")[a:b])[validos]))
+            aberto = pendente["abertos"].get(canal)
+            if aberto is not None and (fim_ns is None or aberto["inicio"] < fim_ns):
+                limites = self.limites[_grupo(canal)]
+                tipo = next(t for nome, _, _, t in _condicoes(limites) if nome == aberto["condicao"])
+                if tipo == "Afundamento" and aberto["extremo"] < limites.get("interrupcao", -np.inf):
+                    tipo = "Interrupção"
+                partes.append(([aberto["inicio"]], [np.datetime64("NaT").astype(np.int64)], [(pendente["ultimo"] - aberto["inicio"]) / 1e9], [k], [TIPOS_EVENTO.index(tipo)], [aberto["extremo"]]))
+        inicios, fins, duracoes, codigos_canal, codigos_tipo, extremos = (
+            np.concatenate([np.asarray(p[j]) for p in partes]) if partes else np.zeros(0, dtype=np.int64) for j in range(6)
+        )
+        eventos = pd.DataFrame({
+            "Início": inicios.astype(np.int64).view("datetime64[ns]"),
+            "Fim": fins.astype(np.int64).view("datetime64[ns]"),
+            "Duração (s)": duracoes.astype(np.float64),
+            "Canal": pd.Categorical.from_codes(codigos_canal.astype(np.int64), canais) if canais else pd.Categorical([]),
+            "Tipo": pd.Categorical.from_codes(codigos_tipo.astype(np.int64), TIPOS_EVENTO),
+            "Extremo": extremos.astype(np.float64),
+        })
+        if tipos is not None:
+            eventos = eventos[eventos["Tipo"].isin(tipos)]
+        ordem = np.argsort(eventos["Início"].to_numpy(), kind="stable")
+        return eventos.iloc[ordem].reset_index(drop=True)
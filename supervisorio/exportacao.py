@@ -0,0 +1,141 @@
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# =======================================================================
+# EXPORTAÇÃO EM BLOCOS
+# Qualquer intervalo de tempo e subconjunto de canais, dos dados brutos ou
+# de um nível da pirâmide, é lido do disco em blocos de linhas e escrito
+# bloco a bloco (CSV com cabeçalho só no primeiro bloco, Parquet com um
+# row group por bloco). A memória usada depende do tamanho do bloco, e não
+# do intervalo. As exportações rodam em um pool de threads próprio, fora
+# do script das sessões, e gravam em arquivo temporário que só recebe o
+# nome final quando termina.
+# =======================================================================
+
+LINHAS_POR_BLOCO = 100_000
+FORMATOS = {"CSV": ".csv"}
+if pq is not None:
+    FORMATOS["Parquet"] = ".parquet"
+
+
+def _origem(piramide, canais, resolucao):
+    # Nos níveis da pirâmide saem as quatro estatísticas e a contagem de cada
+    # intervalo fechado; o intervalo ainda aberto não é exportado.
+    if resolucao == "bruto":
+        return piramide.armazenamento, list(canais)
+    nivel = piramide.nivel(resolucao)
+    return nivel.armazenamento, nivel.colunas(canais) + ["contagem"]
+
+
+def blocos_exportacao(piramide, inicio, fim, canais, resolucao="bruto", linhas_por_bloco=LINHAS_POR_BLOCO):
+    armazenamento, colunas = _origem(piramide, canais, resolucao)
+    a, b = armazenamento.localizar(inicio, fim)
+    for i in range(a, b, linhas_por_bloco):
+        df = armazenamento.ler_linhas(i, min(i + linhas_por_bloco, b), colunas)
+        df.index.name = "timestamp"
+        yield df
+
+
+def gerar_csv(blocos):
+    # Gerador de bytes: cada bloco vira um pedaço do CSV.
+    cabecalho = True
+    for df in blocos:
+        yield df.to_csv(header=cabecalho).encode("utf-8")
+        cabecalho = False
+
+
+def _contar(blocos, ao_escrever):
+    # O retorno ao gerador só acontece depois que o bloco anterior foi escrito.
+    for df in blocos:
+        yield df
+        if ao_escrever is not None:
+            ao_escrever(len(df))
+
+
+def exportar_csv(blocos, caminho, ao_escrever=None):
+    with open(caminho, "wb") as f:
+        for pedaco in gerar_csv(_contar(blocos, ao_escrever)):
+            f.write(pedaco)
+
+
+def exportar_parquet(blocos, caminho, ao_escrever=None):
+    if pq is None:
+        raise RuntimeError("A exportação em Parquet requer o pacote pyarrow.")
+    escritor = None
+    try:
+        for df in _contar(blocos, ao_escrever):
+            tabela = pa.Table.from_pandas(df, preserve_index=True)
+            if escritor is None:
+                escritor = pq.ParquetWriter(caminho, tabela.schema)
+            escritor.write_table(tabela)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    if escritor is None:
+        # Intervalo vazio: arquivo só com a coluna de tempo.
+        pq.write_table(pa.table({"timestamp": pa.array([], pa.timestamp("ns"))}), caminho)
+
+
+EXPORTADORES = {"CSV": exportar_csv, "Parquet": exportar_parquet}
+
+
+class TarefaExportacao:
+    def __init__(self, caminho, total):
+        self.caminho = caminho
+        self.nome = os.path.basename(caminho)
+        self.total = total
+        self.escritas = 0
+        self.futuro = None
+
+    def _contar(self, linhas):
+        self.escritas += linhas
+
+    @property
+    def progresso(self):
+        return 1.0 if self.total == 0 else min(1.0, self.escritas / self.total)
+
+    @property
+    def concluida(self):
+        return self.futuro.done()
+
+    @property
+    def erro(self):
+        return self.futuro.exception() if self.futuro.done() else None
+
+
+class Exportador:
+    def __init__(self, diretorio, max_trabalhadores=2, linhas_por_bloco=LINHAS_POR_BLOCO):
+        self.diretorio = diretorio
+        self.linhas_por_bloco = linhas_por_bloco
+        os.makedirs(diretorio, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=max_trabalhadores, thread_name_prefix="exportacao")
+
+    def enviar(self, piramide, inicio, fim, canais, resolucao="bruto", formato="CSV"):
+        inicio, fim = pd.Timestamp(inicio), pd.Timestamp(fim)
+        armazenamento, _ = _origem(piramide, canais, resolucao)
+        a, b = armazenamento.localizar(inicio, fim)
+        nome = f"exportacao_{resolucao}_{inicio:%Y%m%d%H%M}_{fim:%Y%m%d%H%M}_{uuid.uuid4().hex[:8]}{FORMATOS[formato]}"
+        tarefa = TarefaExportacao(os.path.join(self.diretorio, nome), b - a)
+        tarefa.futuro = self._executor.submit(self._executar, tarefa, piramide, inicio, fim, list(canais), resolucao, formato)
+        return tarefa
+
+    def _executar(self, tarefa, piramide, inicio, fim, canais, resolucao, formato):
+        parcial = tarefa.caminho + ".parcial"
+        try:
+            blocos = blocos_exportacao(piramide, inicio, fim, canais, resolucao, self.linhas_por_bloco)
+            EXPORTADORES[formato](blocos, parcial, tarefa._contar)
+            os.replace(parcial, tarefa.caminho)
+        except Exception:
+            if os.path.exists(parcial):
+                os.remove(parcial)
+            raise
+        return tarefa.caminho
@@ -0,0 +1,93 @@
+import numpy as np
+
+from supervisorio.canais import FASES
+from supervisorio.potencia import AMOSTRAS_POR_CICLO
+
+# =======================================================================
+# ESTIMAÇÃO DE FASORES POR DFT DESLIZANTE
+# O fasor da fundamental é o bin 1 de uma DFT sobre o último ciclo. Em
+# vez de uma FFT por janela, a soma é atualizada a cada amostra: entra
+# x(n)·w(n) e sai x(n-N)·w(n-N), com w(n) = e^(-j2πn/N) tirado de uma
+# tabela pelo índice n mod N. Como a rotação é exata (referência fixa),
+# só o arredondamento da soma se acumula; ela é recalculada do zero a
+# cada AMOSTRAS_RESSINCRONIA, o que mantém o custo O(1) por amostra.
+# Um bloco de amostras é processado de uma vez (diferenças + cumsum), com
+# medidores e fases nos eixos iniciais, como em potencia.py. Com janela
+# de um ciclo inteiro as harmônicas caem em outros bins e não vazam.
+# Os ângulos são dados em relação à Tensão Fase A, o que não depende do
+# instante em que a aquisição começou.
+# =======================================================================
+
+AMOSTRAS_RESSINCRONIA = 60 * AMOSTRAS_POR_CICLO
+# Operador de rotação de 120° das componentes simétricas.
+OPERADOR_A = np.exp(2j * np.pi / 3)
+
+
+class DFTDeslizante:
+    def __init__(self, forma=(), amostras_por_ciclo=AMOSTRAS_POR_CICLO, ressincronia=AMOSTRAS_RESSINCRONIA):
+        # forma: eixos iniciais dos blocos (ex.: (medidores, grandezas, fases)).
+        self.amostras_por_ciclo = amostras_por_ciclo
+        self.ressincronia = ressincronia
+        self._giro = np.exp(-2j * np.pi * np.arange(amostras_por_ciclo) / amostras_por_ciclo)
+        # Último ciclo de amostras, em ordem cronológica.
+        self._ciclo = np.zeros(tuple(forma) + (amostras_por_ciclo,))
+        self._soma = np.zeros(tuple(forma), dtype=complex)
+        self._posicao = 0
+        self._desde_ressincronia = 0
+
+    def processar(self, amostras, passo=None):
+        # amostras: forma + (m,). Retorna os fasores eficazes (complexos, com
+        # referência seno) a cada `passo` amostras, no fim de cada passo:
+        # forma + (m // passo,). Sem `passo`, um fasor por amostra.
+        amostras = np.asarray(amostras, dtype=np.float64)
+        n, m = self.amostras_por_ciclo, amostras.shape[-1]
+        passo = passo or 1
+        trecho = np.concatenate([self._ciclo, amostras], axis=-1)
+        giro = self._giro[(self._posicao + np.arange(m)) % n]
+        variacoes = (amostras - trecho[..., :m]) * giro
+        if passo > 1:
+            # Só as somas no fim de cada passo importam: cada passo é somado
+            # antes, e a soma acumulada fica com m / passo termos.
+            variacoes = np.add.reduceat(variacoes, np.arange(0, m, passo), axis=-1) if m else variacoes
+        somas = self._soma[..., None] + np.cumsum(variacoes, axis=-1)
+        fasores = somas[..., :m // passo] * (1j * np.sqrt(2) / n)
+
+        self._ciclo = trecho[..., -n:].copy()
+        self._posicao = (self._posicao + m) % n
+        self._desde_ressincronia += m
+        if self._desde_ressincronia >= self.ressincronia:
+            self._soma = self._ciclo @ self._giro[(self._posicao + np.arange(n)) % n]
+            self._desde_ressincronia = 0
+        elif m:
+            self._soma = somas[..., -1]
+        return fasores
+
+
+def componentes_simetricas(fasores):
+    # fasores: (3, ...) das fases A, B e C. Retorna (positiva, negativa, zero).
+    a, b, c = fasores
+    a2 = OPERADOR_A * OPERADOR_A
+    positiva = (a + OPERADOR_A * b + a2 * c) / 3
+    negativa = (a + a2 * b + OPERADOR_A * c) / 3
+    zero = (a + b + c) / 3
+    return positiva, negativa, zero
+
+
+def canais_fasoriais(tensoes, correntes):
+    # tensoes, correntes: fasores (3, ...) das fases A, B e C. Retorna os
+    # canais de CANAIS_FASORES: módulos em valor eficaz, ângulos em graus
+    # (-180 a 180) em relação à Tensão Fase A e desequilíbrio (|V2|/|V1|) em %.
+    referencia = np.exp(-1j * np.angle(tensoes[0]))
+    canais = {}
+    for k, fase in enumerate(FASES):
+        canais[f'Tensão Fundamental {fase}'] = np.abs(tensoes[k])
+        canais[f'Ângulo Tensão {fase}'] = np.angle(tensoes[k] * referencia, deg=True)
+        canais[f'Corrente Fundamental {fase}'] = np.abs(correntes[k])
+        canais[f'Ângulo Corrente {fase}'] = np.angle(correntes[k] * referencia, deg=True)
+    for grandeza, fasores in (('Tensão', tensoes), ('Corrente', correntes)):
+        for sequencia, componente in zip(['Positiva', 'Negativa', 'Zero'], componentes_simetricas(fasores)):
+            canais[f'{grandeza} Sequência {sequencia}'] = np.abs(componente)
+    positiva, negativa = canais['Tensão Sequência Positiva'], canais['Tensão Sequência Negativa']
+    with np.errstate(invalid="ignore", divide="ignore"):
+        canais['Desequilíbrio de Tensão'] = np.where(positiva > 0, negativa / positiva * 100, np.nan)
+    return canais
@@ -0,0 +1,288 @@
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+from supervisorio.armazenamento import ArmazenamentoSeries
+from supervisorio.canais import FASES
+from supervisorio.catalogo import ARQUIVO_RESUMO, SITE_PADRAO, listar_medidores, registrar_medidores
+from supervisorio.desempenho import Perfilador
+from supervisorio.piramide import DIRETORIO_ROLLUP, NIVEIS
+from supervisorio.servico import INTERVALO_INGESTAO, ServicoIngestao
+
+# =======================================================================
+# FROTA DE MEDIDORES
+# Um único ServicoFrota por processo é dono da escrita dos medidores que
+# têm fonte: um laço em segundo plano passa por eles e ingere o que cada
+# fonte tem de novo. Os outros medidores do catálogo (ex.: gravados pelo
+# simulador) só são abertos, somente para leitura, quando alguém os
+# escolhe, e no máximo
+# MEDIDORES_ABERTOS ficam abertos: abrir um medidor reconstrói suas janelas
+# deslizantes e mapeia dezenas de arquivos.
+# As visões da frota e dos sites não abrem medidores: combinam os resumos
+# que cada serviço de ingestão grava ao publicar, relidos só quando o
+# arquivo muda. Os totais de um conjunto de medidores ao longo do tempo
+# vêm dos rollups: cada processo de um pool soma os intervalos de um lote
+# de medidores, lidos em modo somente leitura, e o processo principal soma
+# os lotes. O intervalo ainda aberto de cada rollup fica de fora.
+# =======================================================================
+
+logger = logging.getLogger(__name__)
+
+MEDIDORES_ABERTOS = 4
+# Lotes menores que um por processo equilibram medidores de tamanhos diferentes.
+LOTES_POR_PROCESSO = 4
+TOTAIS_EM_CACHE = 16
+GRANDEZAS_TOTAIS = ["Potência Ativa", "Potência Reativa", "Potência Aparente"]
+COLUNAS_RESUMO = [
+    "Site", "Último Instante", "Linhas", "Potência Ativa", "Potência Reativa", "Potência Aparente",
+    "Demanda Máxima", "Energia Ativa", "Potência Ativa Média", "FP Mínimo", "FP Mínimo Fase",
+    "FP Mínimo Instante", "FP Mínimo Natureza", "Tensão Mínima", "Tensão Máxima", "Desequilíbrio Máximo",
+]
+SOMAS = ["Potência Ativa", "Potência Reativa", "Potência Aparente", "Demanda Máxima", "Energia Ativa", "Potência Ativa Média"]
+MINIMOS = ["FP Mínimo", "Tensão Mínima"]
+MAXIMOS = ["Tensão Máxima", "Desequilíbrio Máximo"]
+
+
+def escolher_nivel(inicio, fim, pontos_alvo=1000):
+    # Como PiramideRollup.escolher_nivel, mas sem dados brutos: se nenhum
+    # nível tiver `pontos_alvo` intervalos, usa o mais fino.
+    duracao = pd.Timestamp(fim) - pd.Timestamp(inicio)
+    for nome, largura in reversed(NIVEIS.items()):
+        if duracao / largura >= pontos_alvo:
+            return nome
+    return next(iter(NIVEIS))
+
+
+def somar_lote(diretorios, nivel, inicio, intervalos, largura):
+    # Roda nos processos do pool. inicio e largura em ns. Retorna
+    # ({grandeza: soma por intervalo}, medidores por intervalo).
+    somas = {grandeza: np.zeros(intervalos) for grandeza in GRANDEZAS_TOTAIS}
+    medidores = np.zeros(intervalos)
+    colunas = {grandeza: [f"{grandeza} {fase}|media" for fase in FASES] for grandeza in GRANDEZAS_TOTAIS}
+    fim = pd.Timestamp(inicio + intervalos * largura)
+    for diretorio in diretorios:
+        armazenamento = ArmazenamentoSeries(os.path.join(diretorio, DIRETORIO_ROLLUP, nivel), somente_leitura=True)
+        if not set(sum(colunas.values(), [])) <= set(armazenamento.canais):
+            continue
+        janela = armazenamento.janela(pd.Timestamp(inicio), fim, sum(colunas.values(), []))
+        # Um intervalo do rollup por posição: os índices não se repetem.
+        posicoes = (janela.tempos.view(np.int64) - inicio) // largura
+        for grandeza, canais in colunas.items():
+            valores = sum(np.asarray(janela[c], dtype=np.float64) for c in canais)
+            validos = ~np.isnan(valores)
+            somas[grandeza][posicoes[validos]] += valores[validos]
+        medidores[posicoes] += 1
+    return somas, medidores
+
+
+def agregar_resumos(resumos, por="Site"):
+    # Uma linha por grupo (site, ou a frota inteira com por=None) a partir
+    # das linhas de ServicoFrota.resumos: potências, demandas e energia
+    # somadas, extremos e o medidor com o pior FP.
+    chave = resumos[por] if por else pd.Series("Frota", index=resumos.index)
+    grupos = resumos.groupby(chave)
+    df = grupos.agg({**{c: "sum" for c in SOMAS}, **{c: "min" for c in MINIMOS}, **{c: "max" for c in MAXIMOS}})
+    df.insert(0, "Medidores", grupos.size())
+    fp = resumos["FP Mínimo"].dropna()
+    df["Medidor com Pior FP"] = fp.groupby(chave[fp.index]).idxmin().reindex(df.index)
+    return df
+
+
+class ServicoFrota:
+    def __init__(self, diretorio, fontes=None, sites=None, intervalo=INTERVALO_INGESTAO, abertos=MEDIDORES_ABERTOS, processos=None):
+        # fontes: {medidor: fonte} dos medidores ingeridos por este processo.
+        # sites: {medidor: site}, registrados no catálogo.
+        self.diretorio = diretorio
+        self.fontes = dict(fontes or {})
+        self.intervalo = intervalo
+        self.abertos = abertos
+        self.processos = processos or os.cpu_count() or 1
+        if sites:
+            registrar_medidores(diretorio, {medidor: {"site": site} for medidor, site in sites.items()})
+        self._vivos = {}
+        self._lidos = OrderedDict()
+        # medidor com fonte: trava da sua abertura
+        self._abrindo = {}
+        self._trava = threading.Lock()
+        # medidor: (mtime do resumo.json, resumo)
+        self._resumos = {}
+        self._totais = OrderedDict()
+        self._trava_totais = threading.Lock()
+        self._pool = None
+        self._parar = threading.Event()
+        self._thread = None
+        # Tempos de cada passada do laço por todos os medidores com fonte.
+        self.perfilador = Perfilador(ativo=True)
+
+    def diretorio_medidor(self, medidor):
+        return os.path.join(self.diretorio, medidor)
+
+    def medidores(self):
+        # {medidor: site}
+        sites = listar_medidores(self.diretorio)
+        for medidor in self.fontes:
+            sites.setdefault(medidor, SITE_PADRAO)
+        return dict(sorted(sites.items()))
+
+    def servico(self, medidor):
+        # Os medidores com fonte ficam abertos; ao abrir, já ingerem o que a
+        # fonte tem, como ServicoIngestao.iniciar. Os outros entram num LRU e
+        # são abertos somente para leitura: podem estar sendo gravados por
+        # outro processo (ex.: aquisicao --destino).
+        # Abrir um medidor leva segundos; a trava da frota só protege os
+        # dicionários, para não fazer esperar quem pede outro medidor.
+        if medidor in self.fontes:
+            return self._servico_vivo(medidor)
+        with self._trava:
+            servico = self._lidos.get(medidor)
+            if servico is not None:
+                self._lidos.move_to_end(medidor)
+                return servico
+        novo = ServicoIngestao(self.diretorio_medidor(medidor), fonte=None, somente_leitura=True)
+        # O instantâneo de um serviço somente leitura é o da abertura: um
+        # medidor ainda vazio não fica no LRU, para mostrar os dados assim
+        # que o escritor gravar os primeiros.
+        if novo.instantaneo.ultimo_timestamp is None:
+            return novo
+        with self._trava:
+            # Se outra thread abriu o mesmo medidor nesse meio tempo, fica o dela.
+            servico = self._lidos.setdefault(medidor, novo)
+            self._lidos.move_to_end(medidor)
+            while len(self._lidos) > self.abertos:
+                self._lidos.popitem(last=False)
+            return servico
+
+    def _servico_vivo(self, medidor):
+        # Um medidor com fonte tem um único escritor: quem chega durante a
+        # abertura espera por ela na trava do medidor em vez de abrir outro.
+        with self._trava:
+            servico = self._vivos.get(medidor)
+            if servico is not None:
+                return servico
+            abrindo = self._abrindo.setdefault(medidor, threading.Lock())
+        with abrindo:
+            with self._trava:
+                servico = self._vivos.get(medidor)
+            if servico is None:
+                servico = ServicoIngestao(self.diretorio_medidor(medidor), self.fontes[medidor])
+                servico.ingerir_pendentes()
+                with self._trava:
+                    self._vivos[medidor] = servico
+            return servico
+
+    # --- Resumos (sem abrir medidores) ---
+    def _ler_resumo(self, medidor):
+        caminho = os.path.join(self.diretorio_medidor(medidor), ARQUIVO_RESUMO)
+        try:
+            versao = os.stat(caminho).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        em_cache = self._resumos.get(medidor)
+        if em_cache is None or em_cache[0] != versao:
+            with open(caminho, encoding="utf-8") as f:
+                em_cache = self._resumos[medidor] = (versao, json.load(f))
+        return em_cache[1]
+
+    def resumos(self, janela, medidores=None):
+        # Uma linha por medidor (índice) com COLUNAS_RESUMO; as estatísticas
+        # de janela são as de `janela`. Medidores sem resumo ficam com NaN.
+        sites = self.medidores()
+        linhas = {}
+        for medidor in sites if medidores is None else medidores:
+            linha = {"Site": sites.get(medidor, SITE_PADRAO)}
+            resumo = self._ler_resumo(medidor)
+            if resumo is not None:
+                linha.update({c: v for c, v in resumo.items() if c != "janelas"})
+                linha.update(resumo["janelas"].get(janela, {}))
+            linhas[medidor] = linha
+        df = pd.DataFrame.from_dict(linhas, orient="index").reindex(columns=COLUNAS_RESUMO)
+        df["Último Instante"] = pd.to_datetime(df["Último Instante"])
+        df[SOMAS + MINIMOS + MAXIMOS] = df[SOMAS + MINIMOS + MAXIMOS].astype(float)
+        return df
+
+    # --- Totais por intervalo (pool de processos) ---
+    def totais(self, medidores, inicio, fim, pontos_alvo=1000):
+        # Potências somadas dos `medidores` por intervalo do rollup, o fator
+        # de potência do conjunto (|P| / S) e quantos medidores entraram em
+        # cada intervalo. Retorna (nível, DataFrame).
+        nivel = escolher_nivel(inicio, fim, pontos_alvo)
+        largura = NIVEIS[nivel].value
+        primeiro = pd.Timestamp(inicio).value // largura * largura
+        intervalos = max(0, -(-(pd.Timestamp(fim).value - primeiro) // largura))
+        medidores = list(medidores)
+        # Os rollups só mudam quando o medidor publica um resumo novo.
+        versoes = tuple((self._ler_resumo(m) or {}).get("Linhas") for m in medidores)
+        chave = (tuple(medidores), nivel, primeiro, intervalos, versoes)
+        with self._trava_totais:
+            if chave in self._totais:
+                self._totais.move_to_end(chave)
+                return nivel, self._totais[chave]
+
+        diretorios = [self.diretorio_medidor(m) for m in medidores]
+        n_lotes = min(len(diretorios), self.processos * LOTES_POR_PROCESSO)
+        if self.processos > 1 and n_lotes > 1:
+            lotes = [diretorios[k::n_lotes] for k in range(n_lotes)]
+            partes = list(self._obter_pool().map(somar_lote, lotes, repeat(nivel), repeat(primeiro), repeat(intervalos), repeat(largura)))
+        else:
+            partes = [somar_lote(diretorios, nivel, primeiro, intervalos, largura)]
+
+        df = pd.DataFrame(
+            {grandeza: sum(somas[grandeza] for somas, _ in partes) for grandeza in GRANDEZAS_TOTAIS},
+            index=pd.DatetimeIndex(primeiro + np.arange(intervalos, dtype=np.int64) * largura),
+        )
+        contagem = sum(c for _, c in partes) if partes else np.zeros(intervalos)
+        df[contagem == 0] = np.nan
+        with np.errstate(invalid="ignore", divide="ignore"):
+            df["Fator de Potência"] = np.where(df["Potência Aparente"] > 0, np.abs(df["Potência Ativa"]) / df["Potência Aparente"], np.nan)
+        df["Medidores"] = contagem
+        with self._trava_totais:
+            self._totais[chave] = df
+            while len(self._totais) > TOTAIS_EM_CACHE:
+                self._totais.popitem(last=False)
+        return nivel, df
+
+    def _obter_pool(self):
+        # spawn: o processo principal tem threads (ingestão, Streamlit).
+        with self._trava_totais:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(self.processos, mp_context=multiprocessing.get_context("spawn"))
+            return self._pool
+
+    # --- Laço em segundo plano ---
+    def ingerir_pendentes(self):
+        with self.perfilador.execucao("Ciclo da frota"):
+            for medidor in self.fontes:
+                with self.perfilador.medir("Frota: ingestão dos medidores"):
+                    try:
+                        self.servico(medidor).ingerir_pendentes()
+                    except Exception:
+                        # Um medidor com falha não para os outros.
+                        logger.exception("Falha na ingestão do medidor %s", medidor)
+
+    def iniciar(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._executar, name="ingestao_frota", daemon=True)
+        self._thread.start()
+
+    def parar(self, esperar=False):
+        # esperar: aguarda a passada em curso terminar.
+        self._parar.set()
+        if esperar and self._thread is not None:
+            self._thread.join()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _executar(self):
+        while True:
+            self.ingerir_pendentes()
+            if self._parar.wait(self.intervalo):
+                return
@@ -0,0 +1,133 @@
+import numpy as np
+
+from supervisorio.reducao import reduzir
+
+try:
+    import plotly.graph_objects as go
+except ImportError:
+    go = None
+
+# =======================================================================
+# DESENHO DOS GRÁFICOS DE SÉRIES
+# Figure() em vez de plt.subplots(): a figura não entra no registro global
+# do pyplot e é liberada assim que vira PNG (ver cache_graficos). Fica fora
+# do script do Streamlit para poder ser medida pelos benchmarks.
+# No modo interativo (Plotly, traços WebGL) o navegador recebe só os pontos
+# da janela pedida, já reduzidos; ampliar é pedir uma janela menor ao
+# servidor, que a busca na resolução certa da pirâmide.
+# O matplotlib só é importado no primeiro desenho estático: sozinho ele
+# custa meio segundo na partida do processo.
+# =======================================================================
+
+PONTOS_GRAFICO = 1000
+PONTOS_INTERATIVO = 2000
+PONTOS_EVENTOS_INTERATIVO = 300
+# As cores "tab:" do matplotlib, em hexadecimal para servirem também ao Plotly.
+CORES_EVENTO = {"Afundamento": "#ff7f0e", "Interrupção": "#d62728", "Elevação": "#9467bd", "Sobrecorrente": "#8c564b"}
+COR_EVENTO_PADRAO = "#7f7f7f"
+
+
+def faixas_eventos(eventos, inicio, fim, pontos=PONTOS_GRAFICO):
+    # Uma faixa (x0, x1 em ns) por evento (ver supervisorio/eventos.py), por
+    # tipo. Eventos que começam na mesma coluna de pixels viram uma faixa só,
+    # então um ano de histórico custa o mesmo que uma hora. Os abertos vão
+    # até `fim`.
+    inicio, fim = np.datetime64(inicio, "ns").astype(np.int64), np.datetime64(fim, "ns").astype(np.int64)
+    coluna = max((fim - inicio) // pontos, 1)
+    for tipo, grupo in eventos.groupby("Tipo", sort=False, observed=True):
+        inicios = grupo["Início"].to_numpy("datetime64[ns]").astype(np.int64)
+        fins = grupo["Fim"].to_numpy("datetime64[ns]")
+        fins = np.where(np.isnat(fins), fim, fins.astype(np.int64))
+        ordem = np.argsort(inicios, kind="stable")
+        inicios, fins = inicios[ordem], fins[ordem]
+        colunas = (inicios - inicio) // coluna
+        primeiros = np.flatnonzero(np.r_[True, colunas[1:] != colunas[:-1]])
+        x0 = np.maximum(inicios[primeiros], inicio)
+        x1 = np.minimum(np.maximum(np.maximum.reduceat(fins, primeiros), x0 + coluna), fim)
+        yield tipo, x0.view("datetime64[ns]"), x1.view("datetime64[ns]")
+
+
+def marcar_eventos(ax, eventos, inicio, fim, pontos=PONTOS_GRAFICO):
+    import matplotlib.dates as mdates
+    from matplotlib.collections import PolyCollection
+
+    for tipo, x0, x1 in faixas_eventos(eventos, inicio, fim, pontos):
+        x0, x1 = mdates.date2num(x0), mdates.date2num(x1)
+        # x em dados, y de 0 a 1 na altura dos eixos.
+        faixas = np.stack([np.c_[x0, np.zeros_like(x0)], np.c_[x0, np.ones_like(x0)], np.c_[x1, np.ones_like(x0)], np.c_[x1, np.zeros_like(x0)]], axis=1)
+        colecao = PolyCollection(faixas, transform=ax.get_xaxis_transform(), facecolors=CORES_EVENTO.get(tipo, COR_EVENTO_PADRAO), edgecolors="none", alpha=0.3, label=tipo)
+        ax.add_collection(colecao, autolim=False)
+
+
+def desenhar_serie(df_data, titulo, y_label, date_format="%d/%m %H:%M", y_min=None, y_max=None, auto=False, modo_reducao="minmax", pontos=PONTOS_GRAFICO, eventos=None):
+    import matplotlib.dates as mdates
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=(10, 4))
+    ax = fig.subplots()
+    if df_data.empty:
+        ax.text(0.5, 0.5, "Nenhum dado para exibir.", horizontalalignment='center', verticalalignment='center', transform=ax.transAxes)
+        return fig
+
+    # Reduz para ~1 ponto por posição horizontal antes de desenhar.
+    x, y = reduzir(df_data.index.values, df_data.to_numpy(), pontos, modo_reducao)
+    for j, col in enumerate(df_data.columns):
+        ax.plot(x[:, j], y[:, j], label=col)
+    if eventos is not None and len(eventos):
+        marcar_eventos(ax, eventos, df_data.index[0], df_data.index[-1], pontos)
+
+    ax.xaxis.set_major_formatter(mdates.DateFormatter(date_format))
+    ax.set_title(titulo)
+    ax.set_xlabel("Tempo")
+    ax.set_ylabel(y_label)
+
+    # Os limites só valem quando o modo 'auto' NÃO está ativado.
+    if not auto and y_min is not None and y_max is not None:
+        ax.set_ylim(y_min, y_max)
+
+    ax.legend(loc='upper left', bbox_to_anchor=(1.02, 1))
+    ax.grid(True, linestyle='--', alpha=0.7)
+    for rotulo in ax.get_xticklabels():
+        rotulo.set_rotation(45)
+        rotulo.set_horizontalalignment('right')
+    fig.tight_layout(rect=[0, 0, 0.85, 1])
+    return fig
+
+
+def figura_interativa(df_data, titulo, y_label, inicio, fim, modo_reducao="minmax", pontos=PONTOS_INTERATIVO, eventos=None):
+    # Arrastar seleciona um intervalo de tempo (dragmode "select"); quem
+    # desenha a figura usa a seleção para buscar a nova janela.
+    if go is None:
+        raise RuntimeError("O modo interativo requer o pacote plotly.")
+    fig = go.Figure()
+    if df_data.empty:
+        fig.add_annotation(text="Nenhum dado para exibir.", showarrow=False, xref="paper", yref="paper", x=0.5, y=0.5)
+    else:
+        x, y = reduzir(df_data.index.values, df_data.to_numpy(), pontos, modo_reducao)
+        for j, col in enumerate(df_data.columns):
+            fig.add_trace(go.Scattergl(x=x[:, j], y=y[:, j], mode="lines", name=col))
+    if eventos is not None and len(eventos):
+        # Um traço por tipo com todas as faixas, separadas por lacunas, num
+        # eixo y próprio de 0 a 1.
+        for tipo, x0, x1 in faixas_eventos(eventos, inicio, fim, PONTOS_EVENTOS_INTERATIVO):
+            xs = np.full(len(x0) * 5, np.datetime64("NaT"), dtype="datetime64[ns]")
+            xs[0::5], xs[1::5], xs[2::5], xs[3::5] = x0, x0, x1, x1
+            cor = CORES_EVENTO.get(tipo, COR_EVENTO_PADRAO)
+            r, g, b = (int(cor[i:i + 2], 16) for i in (1, 3, 5))
+            fig.add_trace(go.Scatter(
+                x=xs, y=np.tile([0, 1, 1, 0, np.nan], len(x0)), yaxis="y2", mode="none", fill="toself",
+                fillcolor=f"rgba({r},{g},{b},0.3)", name=tipo, hoverinfo="skip",
+            ))
+    fig.update_layout(
+        title=titulo or None,
+        yaxis_title=y_label,
+        xaxis=dict(range=[str(np.datetime64(inicio, "ms")), str(np.datetime64(fim, "ms"))], title="Tempo"),
+        yaxis2=dict(overlaying="y", range=[0, 1], visible=False, fixedrange=True),
+        dragmode="select",
+        selectdirection="h",
+        hovermode="x unified",
+        height=380,
+        margin=dict(l=10, r=10, t=40 if titulo else 10, b=10),
+        legend=dict(orientation="h", y=-0.25),
+    )
+    return fig
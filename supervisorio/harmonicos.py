@@ -0,0 +1,33 @@
+import numpy as np
+
+from supervisorio.potencia import AMOSTRAS_POR_CICLO, CICLOS_POR_JANELA, dividir_em_janelas
+
+# =======================================================================
+# ANÁLISE HARMÔNICA
+# Espectro até a 50ª ordem e THD em janelas de 12 ciclos (60 Hz), como na
+# IEC 61000-4-7 (10 ciclos em 50 Hz). Com a janela cobrindo ciclos
+# inteiros, a harmônica de ordem h cai exatamente no bin h·ciclos da FFT,
+# sem vazamento espectral. Uma única chamada de numpy.fft.rfft processa
+# todos os medidores, fases e janelas do bloco.
+# =======================================================================
+
+ORDEM_MAXIMA = 50
+
+
+def analisar_harmonicos(sinais, amostras_por_ciclo=AMOSTRAS_POR_CICLO, ciclos_por_janela=CICLOS_POR_JANELA, ordem_maxima=ORDEM_MAXIMA):
+    # sinais: (..., n_amostras). Retorna:
+    #   espectro: (..., n_janelas, ordem_maxima) com o valor eficaz de cada
+    #             ordem (coluna 0 = fundamental);
+    #   thd:      (..., n_janelas) em % da fundamental.
+    amostras = amostras_por_ciclo * ciclos_por_janela
+    if ordem_maxima >= amostras_por_ciclo // 2:
+        raise ValueError("A ordem máxima deve ficar abaixo da frequência de Nyquist.")
+    janelas = dividir_em_janelas(sinais, amostras)
+    fft = np.fft.rfft(janelas, axis=-1)
+    bins = np.arange(1, ordem_maxima + 1) * ciclos_por_janela
+    # Amplitude de pico -> valor eficaz: |X|·2/N/√2.
+    espectro = np.abs(fft[..., bins]) * (np.sqrt(2) / amostras)
+    fundamental = espectro[..., 0]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        thd = np.where(fundamental > 0, np.sqrt(np.sum(espectro[..., 1:] ** 2, axis=-1)) / fundamental * 100, np.nan)
+    return espectro, thd
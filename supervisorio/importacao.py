@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+from supervisorio.armazenamento import nome_arquivo
+from supervisorio.canais import FASES
+
+# =======================================================================
+# IMPORTAÇÃO EM LOTE DE HISTÓRICOS
+# Arquivos CSV/log exportados por medidores são lidos em blocos de linhas,
+# só com as colunas mapeadas e já como float32, então a memória depende do
+# tamanho do bloco e não do arquivo. Cada bloco sai ordenado e sem
+# timestamps repetidos (fica a última ocorrência). `intercalar` junta
+# vários armazenamentos ordenados em um fluxo único, também em blocos;
+# em timestamps iguais vale, canal a canal, o primeiro armazenamento da
+# lista que tem valor (arquivos com canais diferentes se completam).
+# =======================================================================
+
+LINHAS_POR_BLOCO = 1_000_000
+DTYPE_IMPORTACAO = "float32"
+NOMES_TEMPO = {"timestamp", "tempo", "datahora", "datetime", "time", "data", "hora"}
+
+
+def _chave(nome):
+    # 'Tensão Fase A', 'TENSAO_FASE_A' e 'tensao fase a' -> 'tensaofasea'
+    return nome_arquivo(nome).replace("_", "")
+
+
+def _apelidos():
+    # Nomes curtos usados por medidores: Va, Vab, Ia, Pa, Qa, Sa, FPa/PFa...
+    apelidos = {}
+    for fase in FASES:
+        f = fase.lower()
+        apelidos[f"v{f}"] = apelidos[f"v{f}n"] = apelidos[f"u{f}"] = f"Tensão Fase {fase}"
+        apelidos[f"i{f}"] = f"Corrente {fase}"
+        apelidos[f"p{f}"] = f"Potência Ativa {fase}"
+        apelidos[f"q{f}"] = f"Potência Reativa {fase}"
+        apelidos[f"s{f}"] = f"Potência Aparente {fase}"
+        apelidos[f"fp{f}"] = apelidos[f"pf{f}"] = f"Fator de Potência {fase}"
+        apelidos[f"thdv{f}"] = apelidos[f"thdu{f}"] = f"THD Tensão {fase}"
+        apelidos[f"thdi{f}"] = f"THD Corrente {fase}"
+    for linha in ("AB", "BC", "CA"):
+        apelidos[f"v{linha.lower()}"] = apelidos[f"u{linha.lower()}"] = f"Tensão Linha {linha}"
+    return apelidos
+
+
+APELIDOS = _apelidos()
+
+
+def sugerir_mapeamento(colunas, canais):
+    # {coluna do arquivo: canal ou None}, pelo nome normalizado ou por apelido.
+    nomes = dict(APELIDOS)
+    nomes.update({_chave(c): c for c in canais})
+    sugestao = {}
+    for col in colunas:
+        canal = nomes.get(_chave(col))
+        sugestao[col] = canal if canal in canais else None
+    return sugestao
+
+
+def detectar_coluna_tempo(colunas):
+    for col in colunas:
+        if _chave(col) in NOMES_TEMPO:
+            return col
+    return colunas[0]
+
+
+def ler_blocos_csv(arquivo, coluna_tempo, mapeamento, separador=",", decimal=".", formato_tempo=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    # mapeamento: {coluna do arquivo: canal}. Gera (tempos int64 em ns, {canal: float32})
+    # por bloco; linhas com timestamp inválido são descartadas.
+    colunas = {col: canal for col, canal in mapeamento.items() if canal}
+    leitor = pd.read_csv(
+        arquivo,
+        sep=separador,
+        decimal=decimal,
+        usecols=[coluna_tempo, *colunas],
+        dtype={col: DTYPE_IMPORTACAO for col in colunas},
+        chunksize=linhas_por_bloco,
+    )
+    for bloco in leitor:
+        instantes = pd.to_datetime(bloco[coluna_tempo], format=formato_tempo, errors="coerce")
+        if instantes.dt.tz is not None:
+            instantes = instantes.dt.tz_convert(None)
+        marcas = instantes.to_numpy("datetime64[ns]")
+        validas = ~np.isnat(marcas)
+        tempos = marcas.view(np.int64)
+        ordem = np.flatnonzero(validas)[np.argsort(tempos[validas], kind="stable")]
+        tempos = tempos[ordem]
+        ultimas = np.r_[tempos[1:] != tempos[:-1], True] if len(tempos) else np.zeros(0, dtype=bool)
+        ordem = ordem[ultimas]
+        yield tempos[ultimas], {canal: bloco[col].to_numpy()[ordem] for col, canal in colunas.items()}
+
+
+def anexar_blocos(destino, blocos):
+    # Grava os blocos de um arquivo em um armazenamento vazio. Linhas que não
+    # avançam no tempo em relação ao que já foi gravado (arquivo fora de ordem
+    # entre blocos) são descartadas. Retorna (linhas lidas, linhas gravadas).
+    lidas = gravadas = 0
+    for tempos, dados in blocos:
+        lidas += len(tempos)
+        ultimo = destino.ultimo_timestamp()
+        if ultimo is not None:
+            novas = tempos > ultimo.value
+            tempos = tempos[novas]
+            dados = {c: v[novas] for c, v in dados.items()}
+        if len(tempos) == 0:
+            continue
+        completos = {c: dados.get(c, np.full(len(tempos), np.nan, dtype=DTYPE_IMPORTACAO)) for c in destino.canais}
+        gravadas += destino.anexar(pd.DatetimeIndex(tempos), completos)
+    return lidas, gravadas
+
+
+def intercalar(fontes, canais, inicios=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+    # fontes: armazenamentos ordenados, em ordem de prioridade; inicios: linha
+    # inicial de cada um. Cada passo lê no máximo `linhas_por_bloco` linhas por
+    # fonte: o corte é o menor dos timestamps alcançados, e todas as linhas até
+    # ele (inclusive) entram no bloco, então repetidos nunca ficam divididos.
+    tempos = [f.tempos().view(np.int64) for f in fontes]
+    posicoes = list(inicios or [0] * len(fontes))
+    while True:
+        ativas = [k for k in range(len(fontes)) if posicoes[k] < len(tempos[k])]
+        if not ativas:
+            return
+        corte = min(tempos[k][min(posicoes[k] + linhas_por_bloco, len(tempos[k])) - 1] for k in ativas)
+        trechos = []
+        for k in ativas:
+            a = posicoes[k]
+            b = a + int(np.searchsorted(tempos[k][a:a + linhas_por_bloco], corte, side="right"))
+            trechos.append((k, a, b))
+            posicoes[k] = b
+        t = np.concatenate([tempos[k][a:b] for k, a, b in trechos])
+        prioridade = np.concatenate([np.full(b - a, k) for k, a, b in trechos])
+        ordem = np.lexsort((prioridade, t))
+        t = t[ordem]
+        primeiras = np.flatnonzero(np.r_[True, t[1:] != t[:-1]])
+        dados = {}
+        for c in canais:
+            valores = np.concatenate([fontes[k].canal(c)[a:b] for k, a, b in trechos])[ordem]
+            if len(primeiras) == len(t):
+                dados[c] = valores
+                continue
+            # Em cada instante, o primeiro valor (por prioridade) que não é NaN.
+            validas = np.where(np.isnan(valores), len(valores), np.arange(len(valores)))
+            dados[c] = np.r_[valores, np.nan].astype(valores.dtype)[np.minimum.reduceat(validas, primeiras)]
+        yield t[primeiras], dados
@@ -0,0 +1,133 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# =======================================================================
+# INTEGRADORES DE ENERGIA E DEMANDA
+# Registradores acumulados por fase, atualizados amostra a amostra:
+#   - energias ativa (Wh), reativa (varh) e aparente (VAh);
+#   - demanda integrada em intervalos de 15 minutos (energia do intervalo
+#     dividida pela sua duração) e a demanda máxima já ocorrida, com o
+#     instante em que foi registrada.
+# Cada amostra integra a potência pelo tempo decorrido desde a anterior;
+# intervalos maiores que `lacuna_maxima` são tratados como falta de dados
+# e não acumulam energia. O estado vai para um JSON pequeno, então um
+# reinício continua de onde parou sem reler o histórico.
+# =======================================================================
+
+TIPOS = {"Ativa": "Potência Ativa", "Reativa": "Potência Reativa", "Aparente": "Potência Aparente"}
+INTERVALO_DEMANDA = pd.Timedelta(minutes=15)
+LACUNA_MAXIMA = pd.Timedelta(minutes=5)
+
+
+class IntegradorEnergia:
+    def __init__(self, caminho_estado, fases=("A", "B", "C"), intervalo_demanda=INTERVALO_DEMANDA, lacuna_maxima=LACUNA_MAXIMA):
+        self.caminho_estado = caminho_estado
+        self.fases = list(fases)
+        self.intervalo_demanda = pd.Timedelta(intervalo_demanda)
+        self.lacuna_maxima = pd.Timedelta(lacuna_maxima)
+        if os.path.exists(caminho_estado):
+            with open(caminho_estado, encoding="utf-8") as f:
+                self.estado = json.load(f)
+        else:
+            zeros = {tipo: {fase: 0.0 for fase in self.fases} for tipo in TIPOS}
+            self.estado = {
+                "ultimo_instante": None,
+                "intervalo_atual": None,
+                "energia": zeros,
+                "energia_intervalo": json.loads(json.dumps(zeros)),
+                "demanda_ultima": json.loads(json.dumps(zeros)),
+                "demanda_maxima": {tipo: {fase: {"valor": 0.0, "instante": None} for fase in self.fases} for tipo in TIPOS},
+            }
+
+    @property
+    def ultimo_instante(self):
+        valor = self.estado["ultimo_instante"]
+        return None if valor is None else pd.Timestamp(valor)
+
+    def salvar(self):
+        temporario = self.caminho_estado + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.estado, f, ensure_ascii=False, indent=2)
+        os.replace(temporario, self.caminho_estado)
+
+    def sincronizar(self, armazenamento, linhas_por_bloco=500_000):
+        # Integra apenas as linhas gravadas depois do último estado salvo.
+        inicio = None if self.ultimo_instante is None else self.ultimo_instante + pd.Timedelta(1, "ns")
+        a, n = armazenamento.localizar(inicio=inicio)
+        canais = [f"{prefixo} {fase}" for prefixo in TIPOS.values() for fase in self.fases]
+        for b in range(a, n, linhas_por_bloco):
+            df = armazenamento.ler_linhas(b, min(b + linhas_por_bloco, n), canais)
+            self.atualizar_bloco(df.index, df)
+
+    def atualizar(self, instante, potencias):
+        # Uma amostra: potencias = {'Potência Ativa A': valor, ...}.
+        self.atualizar_bloco(pd.DatetimeIndex([instante]), {c: [v] for c, v in potencias.items()})
+
+    def atualizar_bloco(self, timestamps, dados):
+        tempos = np.asarray(pd.DatetimeIndex(timestamps).asi8, dtype=np.int64)
+        if len(tempos) == 0:
+            return
+        e = self.estado
+        if e["ultimo_instante"] is not None and tempos[0] <= e["ultimo_instante"]:
+            raise ValueError("Amostras já integradas não podem ser reenviadas.")
+        ultimo = tempos[0] if e["ultimo_instante"] is None else e["ultimo_instante"]
+
+        # Tempo (h) que cada amostra representa; lacunas longas não acumulam.
+        dt = np.diff(np.r_[ultimo, tempos]).astype(np.float64)
+        dt[dt > self.lacuna_maxima.value] = 0.0
+        horas = dt / pd.Timedelta(hours=1).value
+
+        # Trechos do bloco que caem em cada intervalo de demanda.
+        largura = self.intervalo_demanda.value
+        ids = tempos // largura
+        inicios = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+        ids_trechos = ids[inicios]
+        atual = ids_trechos[0] if e["intervalo_atual"] is None else e["intervalo_atual"]
+        horas_intervalo = self.intervalo_demanda / pd.Timedelta(hours=1)
+
+        for tipo, prefixo in TIPOS.items():
+            for fase in self.fases:
+                # Amostras sem valor (NaN, ex.: históricos importados sem esse canal) não acumulam.
+                energia = np.nan_to_num(np.asarray(dados[f"{prefixo} {fase}"], dtype=np.float64)) * horas
+                e["energia"][tipo][fase] += float(energia.sum())
+                acumulado = e["energia_intervalo"][tipo][fase]
+                intervalo = atual
+                for id_trecho, parcela in zip(ids_trechos, np.add.reduceat(energia, inicios)):
+                    if id_trecho != intervalo:
+                        self._fechar_intervalo(tipo, fase, acumulado / horas_intervalo, intervalo, largura)
+                        acumulado = 0.0
+                        intervalo = id_trecho
+                    acumulado += float(parcela)
+                e["energia_intervalo"][tipo][fase] = acumulado
+        e["intervalo_atual"] = int(ids_trechos[-1])
+        e["ultimo_instante"] = int(tempos[-1])
+        self.salvar()
+
+    def _fechar_intervalo(self, tipo, fase, demanda, intervalo, largura):
+        e = self.estado
+        e["demanda_ultima"][tipo][fase] = demanda
+        maxima = e["demanda_maxima"][tipo][fase]
+        if abs(demanda) > abs(maxima["valor"]):
+            maxima["valor"] = demanda
+            maxima["instante"] = int(intervalo) * largura
+
+    # --- Leitura dos registradores ---
+    def energia(self, tipo, fase=None):
+        registros = self.estado["energia"][tipo]
+        return sum(registros.values()) if fase is None else registros[fase]
+
+    def demanda_ultima(self, tipo, fase=None):
+        registros = self.estado["demanda_ultima"][tipo]
+        return sum(registros.values()) if fase is None else registros[fase]
+
+    def demanda_parcial(self, tipo, fase):
+        # Demanda do intervalo em andamento, com a energia acumulada até agora.
+        return self.estado["energia_intervalo"][tipo][fase] / (self.intervalo_demanda / pd.Timedelta(hours=1))
+
+    def demanda_maxima(self, tipo, fase):
+        maxima = self.estado["demanda_maxima"][tipo][fase]
+        instante = None if maxima["instante"] is None else pd.Timestamp(maxima["instante"])
+        return maxima["valor"], instante
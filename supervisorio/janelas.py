@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+# =======================================================================
+# JANELAS DE TEMPO SOBRE UM ÍNDICE ORDENADO
+# Os timestamps ficam ordenados, então achar [inicio, fim) é uma busca
+# binária (O(log n)) e o resultado é uma fatia: as colunas devolvidas são
+# visões dos arrays originais (memmap ou memória), sem cópia. O mesmo
+# índice atende várias janelas ao mesmo tempo, pois nunca é modificado.
+# =======================================================================
+
+
+def _para_datetime64(instante):
+    if instante is None:
+        return None
+    return pd.Timestamp(instante).to_datetime64()
+
+
+class ColunaEmBlocos:
+    # Coluna longa feita de blocos lidos sob demanda (ex.: os arquivados e
+    # comprimidos do armazenamento) seguidos de uma cauda em array (o memmap
+    # da parte ainda não arquivada). Recortar lê só os blocos tocados; um
+    # recorte dentro de um bloco ou da cauda é visão dele, sem cópia.
+    # limites: linha inicial de cada bloco e o fim do último; primeiros:
+    # primeiro valor de cada bloco, para buscar em colunas ordenadas.
+    def __init__(self, limites, ler_bloco, cauda, primeiros=None):
+        self.limites = np.asarray(limites, dtype=np.int64)
+        self._ler_bloco = ler_bloco
+        self.cauda = cauda
+        self.primeiros = primeiros
+
+    def __len__(self):
+        return int(self.limites[-1]) + len(self.cauda)
+
+    @property
+    def dtype(self):
+        return self.cauda.dtype
+
+    @property
+    def shape(self):
+        return (len(self),) + self.cauda.shape[1:]
+
+    @property
+    def ndim(self):
+        return self.cauda.ndim
+
+    def _linhas(self, a, b):
+        base = int(self.limites[-1])
+        if b <= a:
+            return self.cauda[:0]
+        if a >= base:
+            return self.cauda[a - base:b - base]
+        partes = []
+        k = int(np.searchsorted(self.limites, a, side="right")) - 1
+        while k < len(self.limites) - 1 and self.limites[k] < b:
+            inicio = int(self.limites[k])
+            partes.append(self._ler_bloco(k)[max(a - inicio, 0):b - inicio])
+            k += 1
+        if b > base:
+            partes.append(self.cauda[:b - base])
+        return partes[0] if len(partes) == 1 else np.concatenate(partes)
+
+    def __getitem__(self, chave):
+        if isinstance(chave, slice):
+            a, b, passo = chave.indices(len(self))
+            linhas = self._linhas(a, max(a, b)) if passo > 0 else self._linhas(b + 1, a + 1)
+            return linhas if passo == 1 else (linhas[::passo] if passo > 0 else linhas[::-1][::-passo])
+        if isinstance(chave, (int, np.integer)):
+            k = int(chave) + (len(self) if chave < 0 else 0)
+            if not 0 <= k < len(self):
+                raise IndexError(chave)
+            return self._linhas(k, k + 1)[0]
+        return np.asarray(self)[chave]
+
+    def __array__(self, dtype=None, copy=None):
+        valores = np.asarray(self._linhas(0, len(self)))
+        return valores if dtype is None else valores.astype(dtype)
+
+    def view(self, dtype):
+        ler = self._ler_bloco
+        primeiros = None if self.primeiros is None else np.asarray(self.primeiros).view(dtype)
+        return ColunaEmBlocos(self.limites, lambda k: ler(k).view(dtype), self.cauda.view(dtype), primeiros)
+
+    def searchsorted(self, valores, side="left"):
+        # Só para colunas crescentes: o bloco vem dos primeiros valores e só
+        # ele é lido.
+        escalar = np.ndim(valores) == 0
+        valores = np.atleast_1d(np.asarray(valores, dtype=self.dtype))
+        primeiros = np.asarray(self.primeiros, dtype=self.dtype)
+        if len(self.cauda):
+            primeiros = np.r_[primeiros, self.cauda[:1]]
+        blocos = np.searchsorted(primeiros, valores, side=side) - 1
+        posicoes = np.zeros(len(valores), dtype=np.int64)
+        base = int(self.limites[-1])
+        for i, (k, valor) in enumerate(zip(blocos, valores)):
+            if k < 0:
+                continue
+            if k == len(self.limites) - 1:
+                posicoes[i] = base + int(np.searchsorted(self.cauda, valor, side=side))
+            else:
+                posicoes[i] = self.limites[k] + int(np.searchsorted(self._ler_bloco(k), valor, side=side))
+        return int(posicoes[0]) if escalar else posicoes
+
+
+class IndiceTemporal:
+    def __init__(self, tempos):
+        if not isinstance(tempos, ColunaEmBlocos):
+            tempos = np.asarray(tempos)
+        if tempos.dtype != "datetime64[ns]":
+            tempos = tempos.astype("datetime64[ns]")
+        self.tempos = tempos
+
+    def __len__(self):
+        return len(self.tempos)
+
+    def fatia(self, inicio=None, fim=None):
+        a = 0 if inicio is None else int(self.tempos.searchsorted(_para_datetime64(inicio), side="left"))
+        b = len(self.tempos) if fim is None else int(self.tempos.searchsorted(_para_datetime64(fim), side="left"))
+        return slice(a, max(a, b))
+
+    def fatias(self, intervalos):
+        # Várias janelas com uma única chamada vetorizada de searchsorted.
+        if not intervalos:
+            return []
+        inicios = np.array([_para_datetime64(i) for i, _ in intervalos], dtype="datetime64[ns]")
+        fins = np.array([_para_datetime64(f) for _, f in intervalos], dtype="datetime64[ns]")
+        a = self.tempos.searchsorted(inicios, side="left")
+        b = self.tempos.searchsorted(fins, side="left")
+        return [slice(int(x), int(max(x, y))) for x, y in zip(a, b)]
+
+
+class Janela:
+    def __init__(self, tempos, colunas):
+        self.tempos = tempos
+        self.colunas = colunas
+
+    def __len__(self):
+        return len(self.tempos)
+
+    def __getitem__(self, canal):
+        return self.colunas[canal]
+
+    def para_dataframe(self):
+        # copy=False mantém um bloco por coluna apontando para os arrays originais.
+        return pd.DataFrame(self.colunas, index=pd.DatetimeIndex(self.tempos), columns=list(self.colunas), copy=False)
+
+
+class SeriesIndexadas:
+    def __init__(self, indice, colunas, geracao=0):
+        self.indice = indice
+        self.colunas = colunas
+        # Geração do armazenamento de origem: muda quando o conteúdo é
+        # substituído (ex.: reconstruído numa importação).
+        self.geracao = geracao
+
+    @classmethod
+    def de_dataframe(cls, df):
+        return cls(IndiceTemporal(df.index.values), {c: df[c].to_numpy() for c in df.columns})
+
+    def _recortar(self, fatia, canais):
+        canais = list(self.colunas) if canais is None else canais
+        return Janela(self.indice.tempos[fatia], {c: self.colunas[c][fatia] for c in canais})
+
+    def janela(self, inicio=None, fim=None, canais=None):
+        return self._recortar(self.indice.fatia(inicio, fim), canais)
+
+    def janelas(self, intervalos, canais=None):
+        return [self._recortar(f, canais) for f in self.indice.fatias(intervalos)]
@@ -0,0 +1,190 @@
+import asyncio
+import struct
+from itertools import count
+
+from supervisorio.canais import CANAIS_FASORES, FASES
+
+# =======================================================================
+# MODBUS-TCP: MAPA DE REGISTROS E CLIENTE
+# Só o necessário para ler medidores: Read Holding Registers (função 3)
+# sobre TCP, com o cabeçalho MBAP (transação, protocolo 0, tamanho,
+# unidade). Cada canal é um float32 big-endian em dois registros, nos
+# blocos de MAPA_REGISTROS. As leituras são planejadas uma vez: registros
+# contíguos (ou separados por até LACUNA_MAXIMA registros, que custam
+# menos que outra ida e volta) vão numa única requisição de até
+# MAX_REGISTROS, o limite do protocolo.
+# As conexões são persistentes e compartilhadas por endereço: os
+# medidores atrás de um gateway (unidades diferentes na mesma porta) usam
+# o mesmo pool. Numa conexão vão até EM_VOO_POR_CONEXAO requisições ao
+# mesmo tempo, casadas às respostas pelo número da transação: uma resposta
+# perdida custa o timeout só da sua requisição. Em falha de rede a conexão
+# é fechada, as requisições em curso falham e a próxima leitura reabre.
+# =======================================================================
+
+LER_REGISTROS = 0x03
+MAX_REGISTROS = 125
+LACUNA_MAXIMA = 100
+CONEXOES_POR_ENDERECO = 2
+# Requisições em curso numa conexão (1: uma por vez, para gateways que
+# não aceitam mais) e timeouts seguidos, sem nenhuma resposta, que fazem
+# a conexão ser considerada morta.
+EM_VOO_POR_CONEXAO = 16
+EXPIRADAS_PARA_FECHAR = 3
+# Exceções do protocolo usadas pelo simulador.
+FUNCAO_INVALIDA = 0x01
+ENDERECO_INVALIDO = 0x02
+GATEWAY_SEM_RESPOSTA = 0x0B
+
+# Endereço inicial: canais, em registros consecutivos de 2 em 2.
+BLOCOS_REGISTROS = {
+    0: [f'Tensão Fase {fase}' for fase in FASES] + ['Tensão Linha AB', 'Tensão Linha BC', 'Tensão Linha CA'] + [f'Corrente {fase}' for fase in FASES],
+    100: [f'Potência {tipo} {fase}' for tipo in ['Ativa', 'Reativa'] for fase in FASES],
+    200: [f'THD {grandeza} {fase}' for grandeza in ['Tensão', 'Corrente'] for fase in FASES],
+    300: CANAIS_FASORES,
+}
+MAPA_REGISTROS = {canal: inicio + 2 * k for inicio, canais in BLOCOS_REGISTROS.items() for k, canal in enumerate(canais)}
+TOTAL_REGISTROS = max(MAPA_REGISTROS.values()) + 2
+
+
+class ErroModbus(Exception):
+    # Resposta de exceção do medidor: a conexão continua válida.
+    def __init__(self, codigo):
+        super().__init__(f"exceção Modbus {codigo:#04x}")
+        self.codigo = codigo
+
+
+class ErroProtocolo(Exception):
+    # Resposta que não corresponde à requisição: a conexão é descartada.
+    pass
+
+
+def planejar_leituras(mapa=MAPA_REGISTROS, max_registros=MAX_REGISTROS, lacuna_maxima=LACUNA_MAXIMA):
+    # [(início, quantidade, [(canal, deslocamento em registros)])]
+    leituras = []
+    for endereco, canal in sorted((endereco, canal) for canal, endereco in mapa.items()):
+        if leituras:
+            inicio, quantidade, canais = leituras[-1]
+            if endereco - (inicio + quantidade) <= lacuna_maxima and endereco + 2 - inicio <= max_registros:
+                leituras[-1] = (inicio, endereco + 2 - inicio, canais + [(canal, endereco - inicio)])
+                continue
+        leituras.append((endereco, 2, [(canal, 0)]))
+    return leituras
+
+
+def decodificar(canais, dados):
+    # dados: bytes dos registros de uma leitura.
+    return {canal: struct.unpack_from(">f", dados, 2 * deslocamento)[0] for canal, deslocamento in canais}
+
+
+def requisicao(transacao, unidade, inicio, quantidade):
+    return struct.pack(">HHHBBHH", transacao, 0, 6, unidade, LER_REGISTROS, inicio, quantidade)
+
+
+async def ler_quadro(leitor):
+    # (transação, unidade, PDU) de um quadro MBAP.
+    transacao, protocolo, tamanho, unidade = struct.unpack(">HHHB", await leitor.readexactly(7))
+    if protocolo != 0 or tamanho < 2:
+        raise ErroProtocolo(f"cabeçalho MBAP inválido (protocolo {protocolo}, tamanho {tamanho})")
+    return transacao, unidade, await leitor.readexactly(tamanho - 1)
+
+
+class ConexaoModbus:
+    def __init__(self, host, porta, em_voo=EM_VOO_POR_CONEXAO):
+        self.host = host
+        self.porta = porta
+        self._vagas = asyncio.Semaphore(em_voo)
+        self._abrindo = asyncio.Lock()
+        self._escritor = None
+        self._recepcao = None
+        # transação: (unidade, quantidade, future da resposta)
+        self._pendentes = {}
+        self._transacoes = count(1)
+        self._expiradas = 0
+
+    @property
+    def em_voo(self):
+        return len(self._pendentes)
+
+    async def ler(self, unidade, inicio, quantidade, timeout):
+        # Bytes dos `quantidade` registros a partir de `inicio`. O timeout
+        # vale para a troca inteira, incluindo abrir a conexão.
+        async with self._vagas:
+            try:
+                return await asyncio.wait_for(self._trocar(unidade, inicio, quantidade), timeout)
+            except asyncio.TimeoutError:
+                self._expiradas += 1
+                if self._expiradas >= EXPIRADAS_PARA_FECHAR:
+                    self.fechar()
+                raise
+
+    async def _trocar(self, unidade, inicio, quantidade):
+        async with self._abrindo:
+            if self._escritor is None:
+                leitor, self._escritor = await asyncio.open_connection(self.host, self.porta)
+                self._recepcao = asyncio.create_task(self._receber(leitor, self._escritor))
+        transacao = next(self._transacoes) & 0xFFFF
+        resposta = asyncio.get_running_loop().create_future()
+        self._pendentes[transacao] = (unidade, quantidade, resposta)
+        try:
+            self._escritor.write(requisicao(transacao, unidade, inicio, quantidade))
+            return await resposta
+        finally:
+            self._pendentes.pop(transacao, None)
+
+    async def _receber(self, leitor, escritor):
+        # Entrega cada resposta à requisição da mesma transação; respostas
+        # de requisições que já expiraram são descartadas.
+        try:
+            while True:
+                transacao, unidade, pdu = await ler_quadro(leitor)
+                self._expiradas = 0
+                unidade_esperada, quantidade, resposta = self._pendentes.get(transacao, (None, None, None))
+                if resposta is None or resposta.done():
+                    continue
+                if unidade != unidade_esperada:
+                    resposta.set_exception(ErroProtocolo(f"resposta da unidade {unidade} para a {unidade_esperada}"))
+                elif pdu[0] == LER_REGISTROS | 0x80 and len(pdu) == 2:
+                    resposta.set_exception(ErroModbus(pdu[1]))
+                elif pdu[0] != LER_REGISTROS or pdu[1] != 2 * quantidade or len(pdu) != 2 + 2 * quantidade:
+                    resposta.set_exception(ErroProtocolo(f"resposta inesperada (função {pdu[0]}, {len(pdu)} bytes)"))
+                else:
+                    resposta.set_result(pdu[2:])
+        except (OSError, EOFError, ErroProtocolo) as erro:
+            if self._escritor is escritor:
+                self.fechar(ConnectionResetError(f"conexão com {self.host}:{self.porta} perdida ({erro!r})"))
+
+    def fechar(self, erro=None):
+        # Fecha o socket e falha as requisições em curso.
+        if self._escritor is not None:
+            self._escritor.close()
+        if self._recepcao is not None and self._recepcao is not asyncio.current_task():
+            self._recepcao.cancel()
+        self._escritor = self._recepcao = None
+        self._expiradas = 0
+        for _, _, resposta in self._pendentes.values():
+            if not resposta.done():
+                resposta.set_exception(erro or ConnectionResetError(f"conexão com {self.host}:{self.porta} fechada"))
+        self._pendentes.clear()
+
+
+class PoolConexoes:
+    # Até `por_endereco` conexões por (host, porta); cada leitura vai para a
+    # que tem menos requisições em curso, abrindo outra enquanto houver vaga.
+    def __init__(self, por_endereco=CONEXOES_POR_ENDERECO, em_voo=EM_VOO_POR_CONEXAO):
+        self.por_endereco = por_endereco
+        self.em_voo = em_voo
+        self._conexoes = {}
+
+    def conexao(self, host, porta):
+        conexoes = self._conexoes.setdefault((host, porta), [])
+        menos_ocupada = min(conexoes, key=lambda c: c.em_voo, default=None)
+        if menos_ocupada is not None and (menos_ocupada.em_voo == 0 or len(conexoes) >= self.por_endereco):
+            return menos_ocupada
+        conexoes.append(ConexaoModbus(host, porta, self.em_voo))
+        return conexoes[-1]
+
+    def fechar(self):
+        for conexoes in self._conexoes.values():
+            for conexao in conexoes:
+                conexao.fechar()
+        self._conexoes.clear()
@@ -0,0 +1,256 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from supervisorio.alinhamento import marcar_lacunas
+from supervisorio.armazenamento import ArmazenamentoSeries
+
+# =======================================================================
+# PIRÂMIDE DE AGREGAÇÃO (ROLLUPS)
+# Cada nível guarda, por intervalo e por canal, mínimo, máximo, média e
+# último valor. Os níveis são alimentados em cascata (bruto -> 10 s ->
+# 1 min -> 15 min -> 1 h) à medida que os dados chegam; o intervalo ainda
+# aberto de cada nível fica em um pequeno estado pendente em JSON, com o
+# último instante de entrada que o nível já recebeu. Ao abrir, cada nível
+# é sincronizado com o que está gravado abaixo dele (os dados brutos ou os
+# intervalos do nível anterior), então uma queda em qualquer ponto da
+# cascata não perde intervalos.
+# =======================================================================
+
+NIVEIS = {
+    "10s": pd.Timedelta(seconds=10),
+    "1min": pd.Timedelta(minutes=1),
+    "15min": pd.Timedelta(minutes=15),
+    "1h": pd.Timedelta(hours=1),
+}
+ESTATISTICAS = ["min", "max", "media", "ultimo"]
+ARQUIVO_PENDENTE = "pendente.json"
+DIRETORIO_ROLLUP = "rollup"
+LINHAS_POR_BLOCO = 500_000
+
+
+def _canal_estatistica(canal, estatistica):
+    return f"{canal}|{estatistica}"
+
+
+def _agrupar(tempos, blocos, largura_ns):
+    # Agrupa linhas consecutivas do mesmo intervalo com reduceat.
+    # blocos: {canal: (min, max, soma, ultimo)}, contagem em blocos[None].
+    ids = tempos // largura_ns
+    inicios = np.flatnonzero(np.r_[True, ids[1:] != ids[:-1]])
+    fins = np.r_[inicios[1:], len(ids)] - 1
+    contagem = np.add.reduceat(blocos[None], inicios)
+    resultado = {}
+    for canal in blocos:
+        if canal is None:
+            continue
+        minimo, maximo, soma, ultimo = blocos[canal]
+        resultado[canal] = (
+            np.fmin.reduceat(minimo, inicios),
+            np.fmax.reduceat(maximo, inicios),
+            np.add.reduceat(soma, inicios),
+            ultimo[fins],
+        )
+    resultado[None] = contagem
+    return ids[inicios] * largura_ns, resultado
+
+
+class NivelRollup:
+    def __init__(self, diretorio, nome, largura, canais, somente_leitura=False):
+        self.nome = nome
+        self.largura = pd.Timedelta(largura)
+        self.canais = list(canais)
+        colunas = self.colunas() + ["contagem"]
+        self.armazenamento = ArmazenamentoSeries(os.path.join(diretorio, nome), canais=colunas, somente_leitura=somente_leitura)
+        self._caminho_pendente = os.path.join(diretorio, nome, ARQUIVO_PENDENTE)
+        self.pendente = None
+        if os.path.exists(self._caminho_pendente):
+            with open(self._caminho_pendente, encoding="utf-8") as f:
+                self.pendente = json.load(f)
+
+    def _salvar_pendente(self):
+        temporario = self._caminho_pendente + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.pendente, f, ensure_ascii=False)
+        os.replace(temporario, self._caminho_pendente)
+
+    @property
+    def ultima_entrada(self):
+        # Último instante de entrada (bruto ou do nível anterior) já recebido.
+        # Estados gravados por versões anteriores só o têm no primeiro nível.
+        if self.pendente is None:
+            return None
+        return self.pendente.get("ultima_entrada", self.pendente.get("ultimo_bruto"))
+
+    def ler_intervalos(self, a, b):
+        # Linhas [a, b) do nível, no formato de _agrupar: a entrada do
+        # próximo nível.
+        df = self.armazenamento.ler_linhas(a, b)
+        blocos = {None: df["contagem"].to_numpy()}
+        for canal in self.canais:
+            colunas = [df[_canal_estatistica(canal, e)].to_numpy() for e in ESTATISTICAS]
+            colunas[2] = colunas[2] * blocos[None]
+            blocos[canal] = tuple(colunas)
+        return df.index.asi8, blocos
+
+    def sincronizar(self, entrada, ler, linhas_por_bloco=LINHAS_POR_BLOCO):
+        # Recebe o que foi gravado em `entrada` (armazenamento) depois da
+        # última entrada já recebida. ler(a, b): (tempos, blocos) das linhas [a, b).
+        ultima = self.ultima_entrada
+        if ultima is None and self.pendente is not None:
+            return
+        a, n = entrada.localizar(inicio=None if ultima is None else pd.Timestamp(ultima) + pd.Timedelta(1, "ns"))
+        for b in range(a, n, linhas_por_bloco):
+            self.anexar(*ler(b, min(b + linhas_por_bloco, n)))
+
+    def anexar(self, tempos, blocos):
+        # tempos: int64 (ns) crescentes; blocos como em _agrupar.
+        # Retorna os intervalos fechados neste passo, no mesmo formato, para
+        # alimentar o próximo nível.
+        ultima_entrada = int(tempos[-1])
+        if self.pendente is not None:
+            p = self.pendente
+            tempos = np.r_[np.int64(p["inicio"]), tempos]
+            novos = {None: np.r_[p["contagem"], blocos[None]]}
+            for canal in self.canais:
+                minimo, maximo, soma, ultimo = p["canais"].get(canal, [np.nan] * 4)
+                b = blocos[canal]
+                novos[canal] = tuple(np.r_[valor, arr] for valor, arr in zip((minimo, maximo, soma, ultimo), b))
+            blocos = novos
+
+        inicios, agrupado = _agrupar(tempos, blocos, self.largura.value)
+
+        # O último intervalo continua aberto até chegar um dado posterior a ele.
+        self.pendente = {
+            "inicio": int(inicios[-1]),
+            "contagem": float(agrupado[None][-1]),
+            "canais": {c: [float(v[-1]) for v in agrupado[c]] for c in self.canais},
+            "ultima_entrada": ultima_entrada,
+        }
+        fechados = {None: agrupado[None][:-1]}
+        for canal in self.canais:
+            fechados[canal] = tuple(v[:-1] for v in agrupado[canal])
+        # Se o processo caiu entre gravar os intervalos e salvar o estado
+        # pendente, a sincronização refaz intervalos já gravados: eles não são
+        # gravados de novo.
+        gravado = self.armazenamento.ultimo_timestamp()
+        novos = np.ones(len(inicios) - 1, dtype=bool) if gravado is None else inicios[:-1] > gravado.value
+        if novos.any():
+            dados = {"contagem": fechados[None][novos]}
+            for canal in self.canais:
+                minimo, maximo, soma, ultimo = (v[novos] for v in fechados[canal])
+                dados[_canal_estatistica(canal, "min")] = minimo
+                dados[_canal_estatistica(canal, "max")] = maximo
+                dados[_canal_estatistica(canal, "media")] = soma / dados["contagem"]
+                dados[_canal_estatistica(canal, "ultimo")] = ultimo
+            self.armazenamento.anexar(pd.DatetimeIndex(inicios[:-1][novos]), dados)
+        self._salvar_pendente()
+        return inicios[:-1], fechados
+
+    def colunas(self, canais=None, estatisticas=ESTATISTICAS):
+        canais = self.canais if canais is None else canais
+        return [_canal_estatistica(c, e) for c in canais for e in estatisticas]
+
+    def ler_janela(self, inicio, fim, canais, estatistica="media"):
+        colunas = [_canal_estatistica(c, estatistica) for c in canais]
+        df = self.armazenamento.ler_janela(inicio, fim, colunas)
+        df.columns = list(canais)
+        # O intervalo em aberto também entra na consulta para o gráfico chegar até agora.
+        if self.pendente is not None:
+            instante = pd.Timestamp(self.pendente["inicio"])
+            if (inicio is None or instante >= inicio) and (fim is None or instante < fim):
+                # Pendente guarda (min, max, soma, ultimo): a soma ocupa a posição da média.
+                indice = ESTATISTICAS.index(estatistica)
+                linha = {}
+                for c in canais:
+                    valor = self.pendente["canais"].get(c, [np.nan] * 4)[indice]
+                    if estatistica == "media":
+                        valor = valor / self.pendente["contagem"]
+                    linha[c] = valor
+                df = pd.concat([df, pd.DataFrame(linha, index=pd.DatetimeIndex([instante]))])
+        return df
+
+
+class PiramideRollup:
+    def __init__(self, armazenamento, niveis=NIVEIS, somente_leitura=False):
+        # somente_leitura: a pirâmide de um medidor gravado por outro processo,
+        # lida como está (sem sincronizar com os dados brutos).
+        self.armazenamento = armazenamento
+        diretorio = os.path.join(armazenamento.diretorio, DIRETORIO_ROLLUP)
+        self.niveis = [NivelRollup(diretorio, nome, largura, armazenamento.canais, somente_leitura) for nome, largura in niveis.items()]
+        if not somente_leitura:
+            self.sincronizar()
+
+    def _blocos_brutos(self, n, dados):
+        # Cada linha bruta é um "intervalo" de uma amostra.
+        blocos = {None: np.ones(n)}
+        for canal in self.armazenamento.canais:
+            valores = np.asarray(dados[canal], dtype=np.float64)
+            blocos[canal] = (valores, valores, valores, valores)
+        return blocos
+
+    def _ler_brutos(self, a, b):
+        df = self.armazenamento.ler_linhas(a, b)
+        return df.index.asi8, self._blocos_brutos(len(df), {c: df[c].to_numpy() for c in df.columns})
+
+    def sincronizar(self):
+        # Processa o que ainda não entrou em cada nível (primeira execução ou
+        # queda no meio da cascata): o primeiro lê as linhas brutas, os
+        # outros os intervalos gravados no nível anterior. A leitura é feita
+        # em blocos para não carregar o histórico inteiro.
+        self.niveis[0].sincronizar(self.armazenamento, self._ler_brutos)
+        for anterior, nivel in zip(self.niveis, self.niveis[1:]):
+            nivel.sincronizar(anterior.armazenamento, anterior.ler_intervalos)
+
+    def anexar(self, timestamps, dados):
+        tempos = np.asarray(pd.DatetimeIndex(timestamps).asi8, dtype=np.int64)
+        if len(tempos) == 0:
+            return {}
+        blocos = self._blocos_brutos(len(tempos), dados)
+        # Devolve os intervalos fechados em cada nível, para quem consome rollups
+        # incrementalmente (ex.: agregados de janela deslizante).
+        fechados = {}
+        for nivel in self.niveis:
+            tempos, blocos = nivel.anexar(tempos, blocos)
+            if len(tempos) == 0:
+                break
+            fechados[nivel.nome] = (tempos, blocos)
+        return fechados
+
+    def nivel(self, nome):
+        return next(n for n in self.niveis if n.nome == nome)
+
+    def escolher_nivel(self, inicio, fim, pontos_alvo=1000):
+        # Nível mais grosso que ainda tenha ao menos `pontos_alvo` intervalos
+        # na janela; se nenhum tiver, usa os dados brutos.
+        duracao = pd.Timestamp(fim) - pd.Timestamp(inicio)
+        for nivel in reversed(self.niveis):
+            if duracao / nivel.largura >= pontos_alvo:
+                return nivel
+        return None
+
+    def resolucao(self, inicio, fim, pontos_alvo=1000):
+        nivel = self.escolher_nivel(inicio, fim, pontos_alvo)
+        return "bruto" if nivel is None else nivel.nome
+
+    def consultar(self, inicio, fim, canais, pontos_alvo=1000, estatistica="media", series=None, resolucao=None):
+        # estatistica="envelope" intercala mínimo e máximo de cada intervalo
+        # (o máximo no meio do intervalo), preservando os extremos no gráfico.
+        # series: visão fixa dos dados brutos (ex.: de um instantâneo publicado).
+        # resolucao: fixa o nível ("bruto" ou nome) em vez de escolhê-lo.
+        if resolucao is None:
+            nivel = self.escolher_nivel(inicio, fim, pontos_alvo)
+        else:
+            nivel = None if resolucao == "bruto" else self.nivel(resolucao)
+        # As faltas de dados vêm marcadas com uma linha NaN (alinhamento.marcar_lacunas).
+        if nivel is None:
+            bruto = self.armazenamento if series is None else series
+            return "bruto", marcar_lacunas(bruto.janela(inicio, fim, canais).para_dataframe())
+        if estatistica != "envelope":
+            return nivel.nome, marcar_lacunas(nivel.ler_janela(inicio, fim, canais, estatistica), nivel.largura)
+        minimos = marcar_lacunas(nivel.ler_janela(inicio, fim, canais, "min"), nivel.largura)
+        maximos = marcar_lacunas(nivel.ler_janela(inicio, fim, canais, "max"), nivel.largura)
+        maximos.index = maximos.index + nivel.largura / 2
+        return nivel.nome, pd.concat([minimos, maximos]).sort_index(kind="stable")
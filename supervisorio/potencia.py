@@ -0,0 +1,78 @@
+import numpy as np
+
+# =======================================================================
+# CÁLCULO DE POTÊNCIA A PARTIR DAS FORMAS DE ONDA
+# Recebe blocos de amostras de tensão e corrente (fases A, B e C, de um
+# ou vários medidores) e calcula, por janela de ciclos inteiros:
+#   Vrms, Irms  - valor eficaz verdadeiro (raiz da média dos quadrados)
+#   P           - média do produto v·i
+#   Q           - média do produto entre a corrente e a tensão atrasada de
+#                 1/4 de ciclo (positiva para carga indutiva)
+#   S           - Vrms·Irms
+#   FP          - |P|/S, com a natureza dada pelo sinal de Q
+# Tudo em uma única chamada vetorizada; os eixos iniciais (medidores,
+# fases...) são livres e só o último eixo é o tempo.
+# =======================================================================
+
+FREQUENCIA = 60
+AMOSTRAS_POR_CICLO = 256
+# Janela de 12 ciclos = 200 ms em 60 Hz.
+CICLOS_POR_JANELA = 12
+
+INDUTIVO = 1
+CAPACITIVO = -1
+
+
+def dividir_em_janelas(x, amostras_por_janela):
+    x = np.asarray(x)
+    n = x.shape[-1] // amostras_por_janela * amostras_por_janela
+    return x[..., :n].reshape(x.shape[:-1] + (-1, amostras_por_janela))
+
+
+def valor_eficaz(janelas):
+    # janelas: (..., n_janelas, amostras), como sai de dividir_em_janelas.
+    return np.sqrt(np.einsum("...j,...j->...", janelas, janelas) / janelas.shape[-1])
+
+
+def calcular_grandezas(tensoes, correntes, amostras_por_ciclo=AMOSTRAS_POR_CICLO, ciclos_por_janela=CICLOS_POR_JANELA):
+    # tensoes, correntes: (..., n_amostras). Amostras que não completam uma
+    # janela no final do bloco são ignoradas.
+    amostras = amostras_por_ciclo * ciclos_por_janela
+    v = dividir_em_janelas(tensoes, amostras)
+    i = dividir_em_janelas(correntes, amostras)
+
+    vrms = valor_eficaz(v)
+    irms = valor_eficaz(i)
+    # einsum soma os produtos sem criar arrays temporários do tamanho do bloco.
+    p = np.einsum("...j,...j->...", v, i) / amostras
+
+    # Como a janela tem ciclos inteiros, o deslocamento circular equivale ao
+    # atraso de 90° da tensão.
+    v_atrasada = np.roll(v, amostras_por_ciclo // 4, axis=-1)
+    q = np.einsum("...j,...j->...", v_atrasada, i) / amostras
+
+    s = vrms * irms
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fp = np.where(s > 0, np.abs(p) / s, 1.0)
+    natureza = np.where(q >= 0, INDUTIVO, CAPACITIVO)
+    return {"vrms": vrms, "irms": irms, "p": p, "q": q, "s": s, "fp": np.clip(fp, 0.0, 1.0), "natureza": natureza}
+
+
+def sintetizar_formas_onda(vrms, irms, angulo, amostras_por_ciclo=AMOSTRAS_POR_CICLO, ciclos=CICLOS_POR_JANELA, defasagem=0.0, harmonicos_v=None, harmonicos_i=None):
+    # Gera `ciclos` ciclos para cada valor de entrada (eixo final), com a
+    # corrente atrasada de `angulo` radianos em relação à tensão.
+    # harmonicos_v / harmonicos_i: {ordem: amplitude relativa à fundamental},
+    # com a amplitude escalar ou com o mesmo formato de vrms.
+    vrms = np.asarray(vrms, dtype=np.float64)[..., None]
+    irms = np.asarray(irms, dtype=np.float64)[..., None]
+    angulo = np.asarray(angulo, dtype=np.float64)[..., None]
+    fase = 2 * np.pi * np.arange(amostras_por_ciclo * ciclos) / amostras_por_ciclo + defasagem
+    v = np.sin(fase)
+    i = np.sin(fase - angulo)
+    for ordem, amplitude in (harmonicos_v or {}).items():
+        v = v + np.asarray(amplitude)[..., None] * np.sin(ordem * fase)
+    for ordem, amplitude in (harmonicos_i or {}).items():
+        i = i + np.asarray(amplitude)[..., None] * np.sin(ordem * (fase - angulo))
+    v = np.sqrt(2) * vrms * v
+    i = np.sqrt(2) * irms * i
+    return v.reshape(v.shape[:-2] + (-1,)), i.reshape(i.shape[:-2] + (-1,))
@@ -0,0 +1,109 @@
+import numpy as np
+
+# =======================================================================
+# REDUÇÃO DE PONTOS PARA GRÁFICOS
+# Uma figura de 10 polegadas mostra por volta de 1000 posições distintas
+# no eixo X; mandar mais pontos que isso para o matplotlib só custa tempo.
+# As duas reduções trabalham sobre todas as colunas (fases) de uma vez:
+#   - envelope mín/máx: mantém o menor e o maior valor de cada intervalo,
+#     garantindo que afundamentos e picos continuem visíveis;
+#   - LTTB (Largest-Triangle-Three-Buckets): escolhe, em cada intervalo, o
+#     ponto que forma o maior triângulo com os vizinhos, preservando a forma.
+# Ambas devolvem x e y com formato (m, k): cada coluna tem seus próprios
+# instantes selecionados. Nenhuma escolhe uma linha NaN, então as marcas de
+# lacuna (linhas inteiras NaN, de alinhamento.marcar_lacunas) são repostas
+# no resultado, na sua posição, para o gráfico continuar interrompido.
+# =======================================================================
+
+MODOS_REDUCAO = {
+    "Envelope Mín/Máx": "minmax",
+    "LTTB": "lttb",
+    "Nenhuma": None,
+}
+
+
+def _sem_reducao(x, y):
+    return np.repeat(x[:, None], y.shape[1], axis=1), y
+
+
+def _selecionar(x, y, indices):
+    # x e y das linhas escolhidas (indices: (m, k), crescentes por coluna),
+    # mais a primeira linha de cada sequência de linhas inteiras NaN.
+    vazias = np.isnan(y).all(axis=1)
+    quebras = np.flatnonzero(vazias & ~np.r_[False, vazias[:-1]])
+    if len(quebras):
+        indices = np.sort(np.vstack([indices, np.repeat(quebras[:, None], y.shape[1], axis=1)]), axis=0)
+    return x[indices], y[indices, np.arange(y.shape[1])[None, :]]
+
+
+def envelope_min_max(x, y, n_saida):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    n, k = y.shape
+    if n <= n_saida or n_saida < 4:
+        return _sem_reducao(x, y)
+
+    # Como no LTTB, primeiro e último pontos são fixos, para o gráfico
+    # cobrir o período inteiro; o miolo é dividido em intervalos.
+    miolo = y[1:n - 1]
+    n_intervalos = (n_saida - 2) // 2
+    tamanho = -(-(n - 2) // n_intervalos)
+    n_intervalos = -(-(n - 2) // tamanho)
+    preenchido = np.full((n_intervalos * tamanho, k), np.nan)
+    preenchido[:n - 2] = miolo
+    blocos = preenchido.reshape(n_intervalos, tamanho, k)
+
+    # NaN (lacunas e preenchimento final) nunca vence a comparação.
+    base = np.arange(n_intervalos)[:, None] * tamanho + 1
+    i_min = np.where(np.isnan(blocos), np.inf, blocos).argmin(axis=1) + base
+    i_max = np.where(np.isnan(blocos), -np.inf, blocos).argmax(axis=1) + base
+
+    # Mantém a ordem temporal dentro de cada intervalo.
+    indices = np.sort(np.stack([i_min, i_max], axis=1), axis=1).reshape(-1, k)
+    indices = np.vstack([np.zeros((1, k), dtype=np.int64), indices, np.full((1, k), n - 1)])
+    return _selecionar(x, y, indices)
+
+
+def lttb(x, y, n_saida):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    n, k = y.shape
+    if n <= n_saida or n_saida < 3:
+        return _sem_reducao(x, y)
+
+    # Eixo X em segundos relativos ao primeiro ponto, para a área não perder precisão.
+    xs = (x - x[0]).astype("timedelta64[ns]").astype(np.int64) / 1e9 if np.issubdtype(x.dtype, np.datetime64) else (x - x[0]).astype(np.float64)
+
+    # Primeiro e último pontos são fixos; o miolo é dividido em n_saida - 2 intervalos.
+    bordas = np.linspace(1, n - 1, n_saida - 1).astype(np.int64)
+    medias_x = np.add.reduceat(xs[1:n - 1], bordas[:-1] - 1) / np.diff(bordas)
+    # Médias só dos valores presentes: uma marca de lacuna não anula o intervalo.
+    presentes = ~np.isnan(y[1:n - 1])
+    with np.errstate(invalid="ignore"):
+        medias_y = np.add.reduceat(np.where(presentes, y[1:n - 1], 0.0), bordas[:-1] - 1, axis=0) / np.add.reduceat(presentes, bordas[:-1] - 1, axis=0)
+    medias_x = np.r_[medias_x, xs[n - 1]]
+    medias_y = np.vstack([medias_y, y[n - 1]])
+
+    colunas = np.arange(k)
+    indices = np.empty((n_saida, k), dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    anterior = np.zeros(k, dtype=np.int64)
+    for i in range(n_saida - 2):
+        lo, hi = bordas[i], bordas[i + 1]
+        xa, ya = xs[anterior], y[anterior, colunas]
+        xc, yc = medias_x[i + 1], medias_y[i + 1]
+        xb, yb = xs[lo:hi, None], y[lo:hi]
+        area = np.abs((xa - xc) * (yb - ya) - (xa - xb) * (yc - ya))
+        area = np.where(np.isnan(area), -1.0, area)
+        anterior = lo + area.argmax(axis=0)
+        indices[i + 1] = anterior
+    return _selecionar(x, y, indices)
+
+
+def reduzir(x, y, n_saida=1000, modo="minmax"):
+    if modo == "minmax":
+        return envelope_min_max(x, y, n_saida)
+    if modo == "lttb":
+        return lttb(x, y, n_saida)
+    return _sem_reducao(np.asarray(x), np.asarray(y))
@@ -0,0 +1,339 @@
+import json
+import logging
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from supervisorio.agregados import JANELAS, AgregadosStreaming
+from supervisorio.alinhamento import AlinhadorGrade, lacunas
+from supervisorio.armazenamento import ArmazenamentoSeries
+from supervisorio.canais import CANAIS_ARMAZENADOS, CANAIS_ESPECTRO, FASES
+from supervisorio.catalogo import ARQUIVO_RESUMO
+from supervisorio.derivados import ArmazenamentoDerivado, completar_derivados
+from supervisorio.desempenho import Perfilador
+from supervisorio.eventos import DIRETORIO_EVENTOS, DetectorEventos, carregar_limites, salvar_limites
+from supervisorio.harmonicos import ORDEM_MAXIMA
+from supervisorio.importacao import anexar_blocos, intercalar
+from supervisorio.integradores import TIPOS, IntegradorEnergia
+from supervisorio.piramide import DIRETORIO_ROLLUP, PiramideRollup
+
+# =======================================================================
+# SERVIÇO DE INGESTÃO COMPARTILHADO
+# Um único objeto por processo (criado via st.cache_resource) é dono de
+# toda a escrita: lê a fonte, grava no armazenamento e alimenta pirâmide,
+# integradores e agregados. A cada bloco ingerido publica um Instantaneo
+# imutável e versionado; as sessões do Streamlit só leem o instantâneo
+# mais recente, sem copiar dados e sem recalcular nada.
+# Cada publicação também grava o resumo do medidor (resumo.json), que as
+# visões da frota leem sem abrir o serviço.
+# Um medidor gravado por outro processo é aberto com somente_leitura: nada
+# é criado, reparado ou sincronizado, e o instantâneo é o dos dados que já
+# estavam gravados ao abrir.
+# Os trechos antigos dos dados brutos e dos rollups são comprimidos
+# (ArmazenamentoSeries.arquivar) em segundo plano, por um único thread
+# para todos os serviços do processo: a ingestão não espera por eles.
+# =======================================================================
+
+logger = logging.getLogger(__name__)
+
+INTERVALO_INGESTAO = 1.0
+DIRETORIO_IMPORTACAO = "importacao"
+ARQUIVO_ENERGIA = "energia.json"
+ARQUIVO_LIMITES_EVENTOS = "limites_eventos.json"
+# A resolução dos medidores cabe com folga em float32; os cálculos que
+# acumulam (rollups, energia) continuam em float64.
+DTYPE_ARMAZENAMENTO = "float32"
+
+_arquivamento = ThreadPoolExecutor(max_workers=1, thread_name_prefix="arquivamento")
+
+
+@dataclass(frozen=True)
+class Instantaneo:
+    versao: int
+    ultimo_timestamp: pd.Timestamp
+    canais: tuple
+    # Visões somente leitura dos arquivos mapeados, com o tamanho da publicação.
+    series: object
+    # {janela: {canal: resumo}} e registradores do integrador, já calculados.
+    resumos: MappingProxyType = field(repr=False)
+    energia: MappingProxyType = field(repr=False)
+    demanda_maxima: MappingProxyType = field(repr=False)
+
+
+def _extremo(resumos, canais, estatistica):
+    # (valor, canal, instante, rótulo) do menor mínimo ou do maior máximo.
+    candidatos = [(resumos[c][estatistica], c) for c in canais if c in resumos and resumos[c][estatistica] is not None]
+    if not candidatos:
+        return np.nan, None, None, None
+    escolha = min if estatistica == "minimo" else max
+    (valor, instante, rotulo), canal = escolha(candidatos, key=lambda item: item[0][0])
+    return float(valor), canal, instante.isoformat(), rotulo
+
+
+def resumo_medidor(instantaneo):
+    # Só leituras dos agregados e registradores já publicados. Potências e
+    # energia somam as fases; a demanda máxima soma as máximas das fases
+    # (limite superior da máxima trifásica, que pode ter sido em outro instante).
+    ultimos = instantaneo.resumos[next(iter(JANELAS))]
+
+    def soma(resumos, prefixo, estatistica="ultimo"):
+        return float(sum(resumos[f"{prefixo} {fase}"][estatistica] for fase in FASES))
+
+    resumo = {
+        "Último Instante": None if instantaneo.ultimo_timestamp is None else instantaneo.ultimo_timestamp.isoformat(),
+        "Linhas": instantaneo.versao,
+        "Potência Ativa": soma(ultimos, "Potência Ativa"),
+        "Potência Reativa": soma(ultimos, "Potência Reativa"),
+        "Potência Aparente": soma(ultimos, "Potência Aparente"),
+        "Demanda Máxima": float(sum(valor for valor, _ in instantaneo.demanda_maxima["Ativa"].values())),
+        "Energia Ativa": float(sum(instantaneo.energia["Ativa"].values())),
+        "janelas": {},
+    }
+    for janela, resumos in instantaneo.resumos.items():
+        fp, fase_fp, instante_fp, natureza_fp = _extremo(resumos, [f"Fator de Potência {fase}" for fase in FASES], "minimo")
+        resumo["janelas"][janela] = {
+            "Potência Ativa Média": soma(resumos, "Potência Ativa", "media"),
+            "FP Mínimo": fp,
+            "FP Mínimo Fase": None if fase_fp is None else fase_fp.split()[-1],
+            "FP Mínimo Instante": instante_fp,
+            "FP Mínimo Natureza": natureza_fp,
+            "Tensão Mínima": _extremo(resumos, [f"Tensão Fase {fase}" for fase in FASES], "minimo")[0],
+            "Tensão Máxima": _extremo(resumos, [f"Tensão Fase {fase}" for fase in FASES], "maximo")[0],
+            "Desequilíbrio Máximo": _extremo(resumos, ["Desequilíbrio de Tensão"], "maximo")[0],
+        }
+    return resumo
+
+
+class ServicoIngestao:
+    def __init__(self, diretorio, fonte, canais=CANAIS_ARMAZENADOS, intervalo=INTERVALO_INGESTAO, somente_leitura=False):
+        self.diretorio = diretorio
+        self.fonte = fonte
+        self.intervalo = intervalo
+        self.somente_leitura = somente_leitura
+        self.armazenamento = ArmazenamentoSeries(diretorio, canais=canais, dtype=DTYPE_ARMAZENAMENTO, somente_leitura=somente_leitura)
+        # Leitura com os canais derivados (potência aparente, FP) calculados por janela.
+        self.leitura = ArmazenamentoDerivado(self.armazenamento)
+        self.espectros = ArmazenamentoSeries(
+            os.path.join(diretorio, "harmonicos"), canais=CANAIS_ESPECTRO, dtype=DTYPE_ARMAZENAMENTO, largura=ORDEM_MAXIMA, somente_leitura=somente_leitura
+        )
+        self._montar_derivados()
+        # Reentrante: a importação segura a trava e reaproveita ingerir().
+        self._trava_escrita = threading.RLock()
+        self._parar = threading.Event()
+        self._thread = None
+        self._instantaneo = None
+        self._arquivando = None
+        # Tempos de cada ciclo do laço (uma medição por segundo, sempre ligada).
+        self.perfilador = Perfilador(ativo=True)
+        self._publicar()
+
+    def _montar_derivados(self):
+        # Tudo o que é calculado a partir do armazenamento bruto.
+        self.piramide = PiramideRollup(self.leitura, somente_leitura=self.somente_leitura)
+        self.integrador = IntegradorEnergia(os.path.join(self.diretorio, ARQUIVO_ENERGIA))
+        if not self.somente_leitura:
+            self.integrador.sincronizar(self.leitura)
+        self.agregados = AgregadosStreaming(self.leitura.canais)
+        self.agregados.sincronizar(self.piramide)
+        self._montar_eventos()
+
+    def _montar_eventos(self):
+        limites = carregar_limites(os.path.join(self.diretorio, ARQUIVO_LIMITES_EVENTOS))
+        self.eventos = DetectorEventos(os.path.join(self.diretorio, DIRETORIO_EVENTOS), self.leitura.canais, limites, self.somente_leitura)
+        if not self.somente_leitura:
+            self.eventos.sincronizar(self.leitura)
+
+    @property
+    def instantaneo(self):
+        return self._instantaneo
+
+    # --- Escrita (um único escritor) ---
+    def _exigir_escrita(self):
+        if self.somente_leitura:
+            raise ValueError(f"O medidor em '{self.diretorio}' é gravado por outro processo e foi aberto somente para leitura.")
+
+    def ingerir(self, timestamps, dados, espectros=None):
+        self._exigir_escrita()
+        dados = completar_derivados(dados)
+        with self._trava_escrita:
+            self.armazenamento.anexar(timestamps, dados)
+            if espectros is not None:
+                self.espectros.anexar(timestamps, espectros)
+            fechados = self.piramide.anexar(timestamps, dados)
+            self.integrador.atualizar_bloco(timestamps, dados)
+            self.eventos.anexar(timestamps, dados)
+            for nivel, (inicios, blocos) in fechados.items():
+                self.agregados.anexar_intervalos(nivel, inicios, blocos)
+            self.agregados.atualizar_ultimos(timestamps, dados)
+            self._publicar()
+            self._agendar_arquivamento()
+
+    # --- Arquivamento ---
+    def _arquivaveis(self):
+        return [self.armazenamento] + [nivel.armazenamento for nivel in self.piramide.niveis]
+
+    def _agendar_arquivamento(self):
+        if self._arquivando is not None and not self._arquivando.done():
+            return
+        if any(a.arquivamento_pendente() for a in self._arquivaveis()):
+            self._arquivando = _arquivamento.submit(self._arquivar)
+
+    def _arquivar(self):
+        try:
+            for armazenamento in self._arquivaveis():
+                armazenamento.arquivar()
+        except Exception:
+            logger.exception("Falha ao arquivar %s", self.diretorio)
+
+    def aguardar_arquivamento(self):
+        if self._arquivando is not None:
+            self._arquivando.result()
+
+    def redefinir_limites_eventos(self, limites):
+        # Os novos limites valem para todo o histórico: os eventos são
+        # detectados de novo, como os rollups numa importação.
+        self._exigir_escrita()
+        with self._trava_escrita:
+            salvar_limites(os.path.join(self.diretorio, ARQUIVO_LIMITES_EVENTOS), limites)
+            shutil.rmtree(os.path.join(self.diretorio, DIRETORIO_EVENTOS), ignore_errors=True)
+            self._montar_eventos()
+
+    def ingerir_pendentes(self):
+        with self.perfilador.execucao("Ciclo de ingestão"):
+            with self.perfilador.medir("Serviço: geração dos dados"):
+                bloco = self.fonte.ler(self.armazenamento.ultimo_timestamp())
+            if bloco is None:
+                return False
+            with self.perfilador.medir("Serviço: gravação e rollups"):
+                self.ingerir(*bloco)
+            return True
+
+    # --- Importação de históricos ---
+    def importar(self, arquivos, ao_progresso=None, passo=None):
+        # arquivos: um gerador de blocos (tempos, {canal: valores}) por arquivo.
+        # passo: leva cada arquivo à grade comum (alinhamento.AlinhadorGrade),
+        # para que arquivos com canais diferentes ou relógios com deriva se
+        # juntem instante a instante; as lacunas da grade são contadas.
+        # Cada arquivo vai primeiro para um armazenamento temporário; depois
+        # tudo é intercalado com o que já existe. Se os dados importados são
+        # todos posteriores ao armazenamento, entram pela ingestão normal;
+        # senão o armazenamento é reconstruído a partir do primeiro instante
+        # importado e os rollups e integradores são refeitos.
+        self._exigir_escrita()
+        avisar = ao_progresso or (lambda texto, fracao: None)
+        diretorio = os.path.join(self.diretorio, DIRETORIO_IMPORTACAO)
+        shutil.rmtree(diretorio, ignore_errors=True)
+        temporarios = []
+        lidas = 0
+        for k, blocos in enumerate(arquivos):
+            avisar(f"Lendo arquivo {k + 1}", k / max(1, len(arquivos)))
+            temporario = self.armazenamento.clonar(os.path.join(diretorio, f"arquivo_{k}"))
+            if passo is None:
+                lidas += anexar_blocos(temporario, blocos)[0]
+            else:
+                alinhador = AlinhadorGrade(passo)
+                anexar_blocos(temporario, alinhador.blocos(blocos))
+                lidas += alinhador.lidas
+            if len(temporario):
+                temporarios.append(temporario)
+
+        resultado = {"lidas": lidas}
+        if passo is not None:
+            # Trechos da grade sem amostra em nenhum dos arquivos.
+            passo_ns = pd.Timedelta(passo).value
+            grade = np.unique(np.concatenate([t.tempos().view(np.int64) for t in temporarios])) if temporarios else np.zeros(0, dtype=np.int64)
+            inicios, fins = lacunas(grade, passo_ns)
+            resultado.update(lacunas=len(inicios), pontos_sem_dados=int(((fins - inicios) // passo_ns).sum()))
+
+        with self._trava_escrita:
+            antes = len(self.armazenamento)
+            if temporarios:
+                self._intercalar(temporarios, diretorio, avisar)
+            importadas = len(self.armazenamento) - antes
+        shutil.rmtree(diretorio, ignore_errors=True)
+        avisar("Importação concluída", 1.0)
+        return {**resultado, "importadas": importadas, "descartadas": lidas - importadas}
+
+    def _intercalar(self, temporarios, diretorio, avisar):
+        canais = self.armazenamento.canais
+        total = sum(len(t) for t in temporarios)
+        primeiro = min(t.primeiro_timestamp() for t in temporarios)
+        ultimo = self.armazenamento.ultimo_timestamp()
+        feitas = 0
+        if ultimo is None or primeiro > ultimo:
+            for tempos, dados in intercalar(temporarios, canais):
+                self.ingerir(pd.DatetimeIndex(tempos), dados)
+                feitas += len(tempos)
+                avisar("Anexando ao armazenamento", feitas / total)
+            return
+
+        # Linhas anteriores ao primeiro instante importado são copiadas direto.
+        # Um arquivamento em curso termina antes: a pirâmide vai ser refeita.
+        self.aguardar_arquivamento()
+        inicio, n = self.armazenamento.localizar(inicio=primeiro)
+        total += n - inicio
+        novo = self.armazenamento.clonar(os.path.join(diretorio, "reconstrucao"), linhas=inicio)
+        for tempos, dados in intercalar([self.armazenamento] + temporarios, canais, [inicio] + [0] * len(temporarios)):
+            novo.anexar(pd.DatetimeIndex(tempos), dados)
+            feitas += len(tempos)
+            avisar("Intercalando com o histórico", feitas / total)
+        self.armazenamento.substituir_por(novo)
+
+        avisar("Reconstruindo rollups, integradores e eventos", 1.0)
+        # Quem ainda lê os rollups antigos vê os arquivos sumirem e reaparecerem
+        # crescendo; como o arquivo de timestamps é sempre gravado por último,
+        # as leituras continuam consistentes durante a reconstrução.
+        shutil.rmtree(os.path.join(self.diretorio, DIRETORIO_ROLLUP), ignore_errors=True)
+        shutil.rmtree(os.path.join(self.diretorio, DIRETORIO_EVENTOS), ignore_errors=True)
+        caminho_energia = os.path.join(self.diretorio, ARQUIVO_ENERGIA)
+        if os.path.exists(caminho_energia):
+            os.remove(caminho_energia)
+        self._montar_derivados()
+        self._publicar()
+
+    def _publicar(self):
+        canais = self.leitura.canais
+        resumos = {janela: MappingProxyType({c: self.agregados.resumo(janela, c) for c in canais}) for janela in JANELAS}
+        fases = self.integrador.fases
+        energia = {tipo: MappingProxyType({f: self.integrador.energia(tipo, f) for f in fases}) for tipo in TIPOS}
+        demanda = {tipo: MappingProxyType({f: self.integrador.demanda_maxima(tipo, f) for f in fases}) for tipo in TIPOS}
+        # A troca da referência é atômica: leitores veem o instantâneo antigo ou o novo.
+        self._instantaneo = Instantaneo(
+            versao=self.armazenamento.versao,
+            ultimo_timestamp=self.armazenamento.ultimo_timestamp(),
+            canais=tuple(canais),
+            series=self.leitura.series(),
+            resumos=MappingProxyType(resumos),
+            energia=MappingProxyType(energia),
+            demanda_maxima=MappingProxyType(demanda),
+        )
+        if self.somente_leitura:
+            return
+        caminho = os.path.join(self.diretorio, ARQUIVO_RESUMO)
+        with open(caminho + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(resumo_medidor(self._instantaneo), f, ensure_ascii=False)
+        os.replace(caminho + ".tmp", caminho)
+
+    # --- Laço em segundo plano ---
+    def iniciar(self):
+        if self._thread is not None:
+            return
+        self.ingerir_pendentes()
+        self._thread = threading.Thread(target=self._executar, name="ingestao", daemon=True)
+        self._thread.start()
+
+    def parar(self):
+        self._parar.set()
+
+    def _executar(self):
+        while not self._parar.wait(self.intervalo):
+            try:
+                self.ingerir_pendentes()
+            except Exception:
+                logger.exception("Falha na ingestão; nova tentativa em %.1f s", self.intervalo)
@@ -0,0 +1,314 @@
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from supervisorio.canais import CANAIS_ARMAZENADOS, FASES
+from supervisorio.catalogo import MEDIDORES_POR_SITE, nome_medidor, nome_site, registrar_medidores
+from supervisorio.fasores import canais_fasoriais
+from supervisorio.sintetico import DEFASAGENS
+
+# =======================================================================
+# SIMULADOR DE CARGA
+# Gera, sem medidores nem formas de onda, os canais gravados de N
+# medidores em qualquer resolução (1 s por padrão): perfil diário e
+# semanal de carga por tipo de consumidor, fator de potência que cai com a
+# carga leve (e fica capacitivo à noite onde há banco de capacitores),
+# queda de tensão com a carga, harmônicos de cargas não lineares e
+# afundamentos, elevações e interrupções em instantes aleatórios.
+# O tempo é dividido em segmentos fixos (SEGMENTO); cada segmento de cada
+# medidor tem um gerador aleatório próprio, semeado por (semente, medidor,
+# segmento). Assim o resultado depende só da semente e do instante, não
+# do tamanho dos blocos nem de onde a geração começou, e qualquer trecho
+# de um ano pode ser gerado sem gerar o que vem antes.
+# Os blocos saem de um gerador, então a memória depende do tamanho do
+# bloco e não do período. `gravar` os anexa aos armazenamentos de uma
+# frota (um serviço de ingestão por medidor, com rollups, integradores e
+# eventos; ver frota.py) e `transmitir` os envia como JSON por linha a um
+# socket TCP; os dois podem seguir um múltiplo do tempo real.
+#
+#   python -m supervisorio.simulador --medidores 200 --duracao 365d --destino dados_simulados
+#   python -m supervisorio.simulador --socket 127.0.0.1:9000 --velocidade 10
+# =======================================================================
+
+SEGMENTO = pd.Timedelta(hours=1)
+RESOLUCAO_PADRAO = pd.Timedelta(seconds=1)
+LINHAS_POR_BLOCO = 86_400
+TENSAO_NOMINAL = 127.0
+DIA_NS = 86_400 * 10**9
+SEMANA_NS = 7 * DIA_NS
+# Picos do perfil diário por tipo: (hora, largura em horas, altura em pu).
+PERFIS = {
+    "residencial": [(7.5, 1.5, 0.35), (19.5, 2.0, 0.8)],
+    "comercial": [(10.0, 2.5, 0.7), (15.0, 2.5, 0.75)],
+    "industrial": [(8.0, 3.0, 0.5), (14.0, 3.0, 0.55)],
+}
+CARGA_BASE = {"residencial": 0.15, "comercial": 0.2, "industrial": 0.35}
+FATOR_FIM_DE_SEMANA = {"residencial": 1.15, "comercial": 0.35, "industrial": 0.5}
+# Ocorrências por hora em cada medidor e duração típica.
+TAXA_AFUNDAMENTOS = 0.02
+TAXA_ELEVACOES = 0.005
+TAXA_INTERRUPCOES = 0.001
+DURACAO_MEDIANA_EVENTO = pd.Timedelta(seconds=2)
+
+
+@dataclass(frozen=True)
+class Medidor:
+    indice: int
+    perfil: str
+    corrente_nominal: float
+    fp_base: float
+    capacitores: bool
+    carga_nao_linear: float
+    # Fator de corrente e desvio de ângulo (rad) de cada fase: desequilíbrio.
+    fatores_fase: tuple
+    desvios_angulo: tuple
+    # Fases das variações lentas (semanal e de tensão da rede).
+    fase_lenta: float
+
+
+class SimuladorCarga:
+    def __init__(self, semente=0, medidores=1, resolucao=RESOLUCAO_PADRAO):
+        self.semente = semente
+        self.resolucao = pd.Timedelta(resolucao)
+        if SEGMENTO.value % self.resolucao.value:
+            raise ValueError(f"A resolução deve dividir {SEGMENTO}.")
+        self.medidores = [self._sortear_medidor(k) for k in range(medidores)]
+
+    def _sortear_medidor(self, indice):
+        rng = np.random.default_rng([self.semente, indice])
+        perfil = rng.choice(list(PERFIS), p=[0.5, 0.3, 0.2])
+        return Medidor(
+            indice=indice,
+            perfil=str(perfil),
+            corrente_nominal=float(rng.uniform(5, 15) if perfil == "residencial" else rng.uniform(15, 60)),
+            fp_base=float(rng.uniform(0.86, 0.96)),
+            capacitores=bool(rng.random() < 0.3),
+            carga_nao_linear=float(rng.uniform(0.5, 1.5)),
+            fatores_fase=tuple(rng.uniform(0.85, 1.15, len(FASES))),
+            desvios_angulo=tuple(rng.normal(0, np.deg2rad(0.3), len(FASES))),
+            fase_lenta=float(rng.uniform(0, 2 * np.pi)),
+        )
+
+    # --- Geração ---
+    def gerar_segmento(self, medidor, segmento):
+        # Linhas do segmento `segmento` (contado desde a época): (tempos int64
+        # em ns, {canal: float32}).
+        rng = np.random.default_rng([self.semente, medidor.indice, segmento])
+        tempos = segmento * SEGMENTO.value + np.arange(0, SEGMENTO.value, self.resolucao.value, dtype=np.int64)
+        n = len(tempos)
+        forma = (len(FASES), n)
+
+        # Carga em pu: picos do perfil, fim de semana, variação semanal e ruído.
+        hora = (tempos % DIA_NS) / 3.6e12
+        carga = np.full(n, CARGA_BASE[medidor.perfil])
+        for centro, largura, altura in PERFIS[medidor.perfil]:
+            carga += altura * np.exp(-0.5 * ((hora - centro) / largura) ** 2)
+        fim_de_semana = ((tempos // DIA_NS + 3) % 7) >= 5
+        carga *= np.where(fim_de_semana, FATOR_FIM_DE_SEMANA[medidor.perfil], 1.0)
+        carga *= 1 + 0.08 * np.sin(2 * np.pi * tempos / SEMANA_NS + medidor.fase_lenta)
+        carga = np.clip(carga * (1 + rng.normal(0, 0.03, n)), 0.02, 1.5)
+
+        # Tensão: queda proporcional à carga, oscilação lenta da rede e ruído.
+        rede = 1 + 0.01 * np.sin(2 * np.pi * tempos / DIA_NS * 3 + medidor.fase_lenta)
+        tensao = TENSAO_NOMINAL * (1.01 - 0.04 * carga) * rede * (1 + rng.normal(0, 0.002, forma))
+        corrente = medidor.corrente_nominal * carga * np.array(medidor.fatores_fase)[:, None] * (1 + rng.normal(0, 0.01, forma))
+
+        # Fator de potência: pior em carga leve; capacitivo à noite com banco.
+        fp = np.clip(medidor.fp_base + 0.06 * (carga - 0.5) + rng.normal(0, 0.005, forma), 0.5, 1.0)
+        natureza = np.where(medidor.capacitores & ((hora < 6) | (hora >= 22)), -1.0, 1.0)
+        angulo = np.arccos(fp) * natureza
+
+        # Harmônicos: mais distorção de corrente em carga leve.
+        thd_i = np.abs(medidor.carga_nao_linear * (25 - 10 * carga) * (1 + rng.normal(0, 0.05, forma)))
+        thd_v = np.abs((1 + 2 * carga * medidor.carga_nao_linear) * (1 + rng.normal(0, 0.05, forma)))
+
+        # Eventos: tensão residual (pu) aplicada às fases atingidas; a carga
+        # acompanha a tensão (impedância constante).
+        residual = np.ones(forma)
+        for taxa, minimo, maximo in ((TAXA_AFUNDAMENTOS, 0.4, 0.88), (TAXA_ELEVACOES, 1.1, 1.2), (TAXA_INTERRUPCOES, 0.0, 0.05)):
+            for _ in range(rng.poisson(taxa * (SEGMENTO / pd.Timedelta(hours=1)))):
+                duracao = max(1, int(rng.lognormal(np.log(DURACAO_MEDIANA_EVENTO / self.resolucao), 1.0)))
+                inicio = int(rng.integers(0, n))
+                fases = rng.random(len(FASES)) < 0.5
+                fases[rng.integers(0, len(FASES))] = True
+                residual[fases, inicio:inicio + duracao] = rng.uniform(minimo, maximo)
+        tensao *= residual
+        corrente *= residual
+
+        # Fundamentais e fasores; os valores eficazes incluem os harmônicos.
+        tensao_fundamental = tensao / np.sqrt(1 + (thd_v / 100) ** 2)
+        corrente_fundamental = corrente / np.sqrt(1 + (thd_i / 100) ** 2)
+        defasagens = (DEFASAGENS + np.array(medidor.desvios_angulo))[:, None]
+        fasores_v = tensao_fundamental * np.exp(1j * defasagens)
+        fasores_i = corrente_fundamental * np.exp(1j * (defasagens - angulo))
+        aparente = tensao_fundamental * corrente_fundamental
+
+        dados = {}
+        for k, fase in enumerate(FASES):
+            dados[f'Tensão Fase {fase}'] = tensao[k]
+            dados[f'Corrente {fase}'] = corrente[k]
+            dados[f'Potência Ativa {fase}'] = aparente[k] * np.cos(angulo[k])
+            dados[f'Potência Reativa {fase}'] = aparente[k] * np.sin(angulo[k])
+            dados[f'THD Tensão {fase}'] = thd_v[k]
+            dados[f'THD Corrente {fase}'] = thd_i[k]
+        for k, linha in enumerate(['AB', 'BC', 'CA']):
+            dados[f'Tensão Linha {linha}'] = np.abs(fasores_v[k] - fasores_v[(k + 1) % len(FASES)])
+        dados.update(canais_fasoriais(fasores_v, fasores_i))
+        return tempos, {canal: dados[canal].astype(np.float32) for canal in CANAIS_ARMAZENADOS}
+
+    def gerar(self, medidor, inicio, fim):
+        # Linhas de [inicio, fim) de um medidor, montadas segmento a segmento.
+        inicio, fim = pd.Timestamp(inicio).value, pd.Timestamp(fim).value
+        partes = []
+        for segmento in range(inicio // SEGMENTO.value, -(-fim // SEGMENTO.value)):
+            tempos, dados = self.gerar_segmento(medidor, segmento)
+            a, b = np.searchsorted(tempos, [inicio, fim])
+            if b > a:
+                partes.append((tempos[a:b], {c: v[a:b] for c, v in dados.items()}))
+        if not partes:
+            return np.zeros(0, dtype=np.int64), {c: np.zeros(0, dtype=np.float32) for c in CANAIS_ARMAZENADOS}
+        return np.concatenate([t for t, _ in partes]), {c: np.concatenate([d[c] for _, d in partes]) for c in CANAIS_ARMAZENADOS}
+
+    def blocos(self, inicio, fim=None, linhas_por_bloco=LINHAS_POR_BLOCO):
+        # Gera (medidor, tempos, dados) bloco a bloco, todos os medidores a
+        # cada passo de tempo; sem `fim`, não termina.
+        passo = self.resolucao * linhas_por_bloco
+        atual = pd.Timestamp(inicio).ceil(self.resolucao)
+        fim = None if fim is None else pd.Timestamp(fim)
+        while fim is None or atual < fim:
+            proximo = atual + passo if fim is None else min(atual + passo, fim)
+            for medidor in self.medidores:
+                tempos, dados = self.gerar(medidor, atual, proximo)
+                if len(tempos):
+                    yield medidor.indice, tempos, dados
+            atual = proximo
+
+
+def no_ritmo(blocos, velocidade):
+    # Segura cada bloco até que o seu último instante, acelerado
+    # `velocidade` vezes, tenha passado desde o primeiro bloco. 0: sem espera.
+    inicio_simulado = inicio_real = None
+    for medidor, tempos, dados in blocos:
+        if velocidade and len(tempos):
+            if inicio_simulado is None:
+                inicio_simulado, inicio_real = tempos[0], time.monotonic()
+            espera = inicio_real + (tempos[-1] - inicio_simulado) / 1e9 / velocidade - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+        yield medidor, tempos, dados
+
+
+# =======================================================================
+# DESTINOS
+# =======================================================================
+def gravar(simulador, diretorio, inicio, fim, linhas_por_bloco=LINHAS_POR_BLOCO, velocidade=0, ao_progresso=None, medidores_por_site=MEDIDORES_POR_SITE):
+    # Um serviço de ingestão (sem fonte) por medidor, em diretorio/medidor_NNN,
+    # registrado no catálogo da frota. Retorna as linhas gravadas por medidor.
+    from supervisorio.servico import ServicoIngestao
+
+    registrar_medidores(diretorio, {nome_medidor(m.indice): {"site": nome_site(m.indice, medidores_por_site), "perfil": m.perfil} for m in simulador.medidores})
+    servicos = {m.indice: ServicoIngestao(os.path.join(diretorio, nome_medidor(m.indice)), fonte=None) for m in simulador.medidores}
+    gravadas = dict.fromkeys(servicos, 0)
+    for medidor, tempos, dados in no_ritmo(simulador.blocos(inicio, fim, linhas_por_bloco), velocidade):
+        servico = servicos[medidor]
+        ultimo = servico.armazenamento.ultimo_timestamp()
+        if ultimo is not None:
+            # Retomada: o que já está gravado não é gerado de novo.
+            novas = tempos > ultimo.value
+            tempos, dados = tempos[novas], {c: v[novas] for c, v in dados.items()}
+        if len(tempos):
+            servico.ingerir(pd.DatetimeIndex(tempos), dados)
+            gravadas[medidor] += len(tempos)
+        if ao_progresso is not None:
+            ao_progresso(medidor, pd.Timestamp(tempos[-1]) if len(tempos) else None)
+    return gravadas
+
+
+def bloco_json(medidor, tempos, dados):
+    # Uma linha: {"medidor", "tempos" (ns), "canais": {canal: valores}}.
+    return json.dumps({
+        "medidor": medidor,
+        "tempos": tempos.tolist(),
+        "canais": {canal: np.round(valores.astype(np.float64), 4).tolist() for canal, valores in dados.items()},
+    }, ensure_ascii=False)
+
+
+def transmitir(simulador, endereco, inicio, fim=None, linhas_por_bloco=LINHAS_POR_BLOCO, velocidade=1.0):
+    # Conecta em `endereco` (host, porta) e envia um bloco JSON por linha.
+    # Retorna o número de blocos enviados.
+    enviados = 0
+    with socket.create_connection(endereco) as conexao, conexao.makefile("w", encoding="utf-8") as saida:
+        for medidor, tempos, dados in no_ritmo(simulador.blocos(inicio, fim, linhas_por_bloco), velocidade):
+            saida.write(bloco_json(medidor, tempos, dados) + "\n")
+            saida.flush()
+            enviados += 1
+    return enviados
+
+
+class FonteSimulada:
+    # Fonte para o ServicoIngestao (mesma interface de FonteSintetica): um
+    # medidor do simulador, até o instante atual. Na primeira leitura cria
+    # `historico_inicial` de histórico.
+    def __init__(self, simulador, medidor=0, historico_inicial=pd.Timedelta(days=2)):
+        self.simulador = simulador
+        self.medidor = simulador.medidores[medidor]
+        self.historico_inicial = historico_inicial
+
+    def ler(self, ultimo):
+        resolucao = self.simulador.resolucao
+        agora = pd.Timestamp.now().floor(resolucao) + resolucao
+        inicio = agora - self.historico_inicial if ultimo is None else ultimo + resolucao
+        tempos, dados = self.simulador.gerar(self.medidor, inicio, agora)
+        if not len(tempos):
+            return None
+        return pd.DatetimeIndex(tempos), dados, None
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Simulador de carga: canais de N medidores, reprodutíveis pela semente.")
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--medidores", type=int, default=1)
+    parser.add_argument("--medidores-por-site", type=int, default=MEDIDORES_POR_SITE, help="Medidores de cada site no catálogo da frota (com --destino).")
+    parser.add_argument("--resolucao", default="1s", help="Intervalo entre linhas (deve dividir 1 hora).")
+    parser.add_argument("--inicio", help="Primeiro instante (padrão: agora menos a duração, ou agora).")
+    parser.add_argument("--duracao", help="Período gerado (ex.: 365d, 6h); sem ela, gera sem parar.")
+    parser.add_argument("--linhas-por-bloco", type=int, help=f"Padrão: {LINHAS_POR_BLOCO} com --duracao; 1 sem (fluxo contínuo).")
+    parser.add_argument("--velocidade", type=float, default=None, help="Múltiplo do tempo real (0: o mais rápido possível). Padrão: 0 com --duracao, 1 sem.")
+    destino = parser.add_mutually_exclusive_group(required=True)
+    destino.add_argument("--destino", help="Diretório dos armazenamentos (um subdiretório por medidor).")
+    destino.add_argument("--socket", help="host:porta que recebe os blocos em JSON por linha.")
+    args = parser.parse_args(argumentos)
+
+    duracao = pd.Timedelta(args.duracao) if args.duracao else None
+    agora = pd.Timestamp.now().floor(args.resolucao)
+    inicio = pd.Timestamp(args.inicio) if args.inicio else (agora - duracao if duracao is not None else agora)
+    fim = inicio + duracao if duracao is not None else None
+    velocidade = args.velocidade if args.velocidade is not None else (0 if duracao is not None else 1)
+    linhas_por_bloco = args.linhas_por_bloco or (LINHAS_POR_BLOCO if duracao is not None else 1)
+    simulador = SimuladorCarga(args.semente, args.medidores, args.resolucao)
+
+    t0 = time.perf_counter()
+    if args.destino:
+        def ao_progresso(medidor, instante):
+            if medidor == args.medidores - 1 and instante is not None:
+                print(f"{instante:%Y-%m-%d %H:%M:%S} ({time.perf_counter() - t0:.0f} s)", file=sys.stderr, flush=True)
+
+        gravadas = gravar(simulador, args.destino, inicio, fim, linhas_por_bloco, velocidade, ao_progresso, args.medidores_por_site)
+        total = sum(gravadas.values())
+        print(f"{total} linhas gravadas em {len(gravadas)} medidores ({total / max(time.perf_counter() - t0, 1e-9):.0f} linhas/s).")
+    else:
+        host, porta = args.socket.rsplit(":", 1)
+        enviados = transmitir(simulador, (host, int(porta)), inicio, fim, linhas_por_bloco, velocidade)
+        print(f"{enviados} blocos enviados.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
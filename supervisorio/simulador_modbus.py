@@ -0,0 +1,158 @@
+import argparse
+import asyncio
+import random
+import struct
+import sys
+
+import numpy as np
+import pandas as pd
+
+from supervisorio.catalogo import nome_medidor, nome_site, salvar_dispositivos
+from supervisorio.modbus import ENDERECO_INVALIDO, FUNCAO_INVALIDA, GATEWAY_SEM_RESPOSTA, LER_REGISTROS, MAPA_REGISTROS, MAX_REGISTROS, TOTAL_REGISTROS, ErroProtocolo, ler_quadro
+from supervisorio.simulador import SEGMENTO, SimuladorCarga
+
+# =======================================================================
+# SIMULADOR DE MEDIDORES MODBUS-TCP
+# Os medidores do SimuladorCarga respondendo por Modbus-TCP, para testar a
+# aquisição sem equipamento. Como numa instalação com gateways, cada porta
+# atende UNIDADES_POR_GATEWAY medidores (unidades 1, 2, ...): o medidor k
+# fica na porta `porta + k // UNIDADES_POR_GATEWAY`, unidade
+# `k % UNIDADES_POR_GATEWAY + 1`. Os valores são os do instante da
+# requisição, no mapa de modbus.MAPA_REGISTROS. Cada medidor guarda só o
+# segmento de uma hora em uso; a resolução padrão de 10 s mantém 500
+# medidores em algumas dezenas de MB (com 1 s, dez vezes mais).
+# `atraso` e `falhas` imitam um gateway lento e requisições perdidas.
+#
+#   python -m supervisorio.simulador_modbus --medidores 500 --dispositivos dispositivos.json
+# =======================================================================
+
+PORTA_PADRAO = 5020
+UNIDADES_POR_GATEWAY = 100
+RESOLUCAO_SIMULADA = "10s"
+CANAIS_MAPA = list(MAPA_REGISTROS)
+POSICOES_MAPA = np.array([MAPA_REGISTROS[c] // 2 for c in CANAIS_MAPA])
+
+
+class ServidorSimulado:
+    def __init__(self, simulador, unidades_por_gateway=UNIDADES_POR_GATEWAY, atraso=0.0, taxa_falhas=0.0, semente=0):
+        self.simulador = simulador
+        self.unidades_por_gateway = unidades_por_gateway
+        self.atraso = atraso
+        self.taxa_falhas = taxa_falhas
+        self._aleatorio = random.Random(semente)
+        # índice do medidor: (segmento, valores (linhas x CANAIS_MAPA))
+        self._segmentos = {}
+        # índice do medidor: (linha, bytes de todos os registros)
+        self._registros = {}
+
+    @property
+    def gateways(self):
+        return -(-len(self.simulador.medidores) // self.unidades_por_gateway)
+
+    def dispositivos(self, host, porta):
+        # Lista para catalogo.salvar_dispositivos.
+        return [
+            {"medidor": nome_medidor(k), "host": host, "porta": porta + k // self.unidades_por_gateway,
+             "unidade": k % self.unidades_por_gateway + 1, "site": nome_site(k)}
+            for k in range(len(self.simulador.medidores))
+        ]
+
+    def registros(self, indice, instante):
+        # Bytes de TOTAL_REGISTROS registros do medidor no instante (ns).
+        resolucao = self.simulador.resolucao.value
+        linha = instante // resolucao
+        guardado = self._registros.get(indice)
+        if guardado is not None and guardado[0] == linha:
+            return guardado[1]
+        segmento = instante // SEGMENTO.value
+        valores = self._segmentos.get(indice)
+        if valores is None or valores[0] != segmento:
+            _, dados = self.simulador.gerar_segmento(self.simulador.medidores[indice], segmento)
+            valores = self._segmentos[indice] = (segmento, np.stack([dados[c] for c in CANAIS_MAPA], axis=1))
+        banco = np.zeros(TOTAL_REGISTROS // 2, dtype=">f4")
+        banco[POSICOES_MAPA] = valores[1][linha - segmento * (SEGMENTO.value // resolucao)]
+        self._registros[indice] = (linha, banco.tobytes())
+        return self._registros[indice][1]
+
+    async def responder(self, gateway, unidade, pdu):
+        # PDU da resposta; None para não responder.
+        funcao = pdu[0]
+        if funcao != LER_REGISTROS or len(pdu) != 5:
+            return bytes([funcao | 0x80, FUNCAO_INVALIDA])
+        indice = gateway * self.unidades_por_gateway + unidade - 1
+        if not 1 <= unidade <= self.unidades_por_gateway or indice >= len(self.simulador.medidores):
+            return bytes([funcao | 0x80, GATEWAY_SEM_RESPOSTA])
+        inicio, quantidade = struct.unpack(">HH", pdu[1:])
+        if not 1 <= quantidade <= MAX_REGISTROS or inicio + quantidade > TOTAL_REGISTROS:
+            return bytes([funcao | 0x80, ENDERECO_INVALIDO])
+        if self.taxa_falhas and self._aleatorio.random() < self.taxa_falhas:
+            return None
+        if self.atraso:
+            await asyncio.sleep(self.atraso)
+        dados = self.registros(indice, pd.Timestamp.now().value)
+        return bytes([funcao, 2 * quantidade]) + dados[2 * inicio:2 * (inicio + quantidade)]
+
+    async def _responder_quadro(self, gateway, transacao, unidade, pdu, escritor):
+        resposta = await self.responder(gateway, unidade, pdu)
+        if resposta is not None and not escritor.is_closing():
+            escritor.write(struct.pack(">HHHB", transacao, 0, len(resposta) + 1, unidade) + resposta)
+
+    async def atender(self, gateway, leitor, escritor):
+        # Requisições de uma conexão respondidas em paralelo (o atraso é de
+        # rede, não de fila), na ordem em que ficam prontas.
+        tarefas = set()
+        try:
+            while True:
+                tarefa = asyncio.create_task(self._responder_quadro(gateway, *await ler_quadro(leitor), escritor))
+                tarefas.add(tarefa)
+                tarefa.add_done_callback(tarefas.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, ErroProtocolo):
+            pass
+        finally:
+            for tarefa in tarefas:
+                tarefa.cancel()
+            escritor.close()
+
+    async def abrir(self, host, porta):
+        # Um servidor por gateway, nas portas porta, porta + 1, ...
+        return [
+            await asyncio.start_server(lambda l, e, g=g: self.atender(g, l, e), host, porta + g)
+            for g in range(self.gateways)
+        ]
+
+
+async def servir(servidor, host, porta):
+    servidores = await servidor.abrir(host, porta)
+    try:
+        await asyncio.gather(*(s.serve_forever() for s in servidores))
+    finally:
+        for s in servidores:
+            s.close()
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Simulador de medidores Modbus-TCP (valores do simulador de carga).")
+    parser.add_argument("--medidores", type=int, default=1)
+    parser.add_argument("--semente", type=int, default=0)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO, help="Porta do primeiro gateway; os seguintes usam as próximas.")
+    parser.add_argument("--unidades-por-gateway", type=int, default=UNIDADES_POR_GATEWAY)
+    parser.add_argument("--resolucao", default=RESOLUCAO_SIMULADA, help="Intervalo em que os valores mudam (deve dividir 1 hora).")
+    parser.add_argument("--atraso", type=float, default=0.0, help="Segundos antes de cada resposta.")
+    parser.add_argument("--falhas", type=float, default=0.0, help="Fração das requisições sem resposta.")
+    parser.add_argument("--dispositivos", help="Grava aqui a lista de dispositivos para a aquisição.")
+    args = parser.parse_args(argumentos)
+
+    servidor = ServidorSimulado(SimuladorCarga(args.semente, args.medidores, args.resolucao), args.unidades_por_gateway, args.atraso, args.falhas, args.semente)
+    if args.dispositivos:
+        salvar_dispositivos(args.dispositivos, servidor.dispositivos(args.host, args.porta))
+    print(f"{args.medidores} medidores em {servidor.gateways} gateways, portas {args.porta} a {args.porta + servidor.gateways - 1}.", flush=True)
+    try:
+        asyncio.run(servir(servidor, args.host, args.porta))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+import numpy as np
+import pandas as pd
+
+from supervisorio.canais import FASES
+from supervisorio.fasores import DFTDeslizante, canais_fasoriais
+from supervisorio.harmonicos import analisar_harmonicos
+from supervisorio.potencia import AMOSTRAS_POR_CICLO, CICLOS_POR_JANELA, calcular_grandezas, dividir_em_janelas, sintetizar_formas_onda, valor_eficaz
+
+# =======================================================================
+# FONTE DE DADOS SINTÉTICOS
+# Enquanto não há medidores ligados, os canais são gerados aqui. Cada
+# minuto vira uma janela de formas de onda que passa pelos mesmos motores
+# de potência, de harmônicos e de fasores usados com dados reais. As fases
+# são defasadas de 120° (com um pequeno desvio aleatório, que gera
+# desequilíbrio) e as tensões de linha saem das diferenças entre as
+# formas de onda de fase.
+# =======================================================================
+
+# Minutos sintetizados por vez como forma de onda (limita a memória da geração).
+LINHAS_POR_BLOCO_ONDA = 240
+HISTORICO_INICIAL = 2 * 24 * 60
+# Sequência ABC: B atrasada e C adiantada de 120° em relação a A.
+DEFASAGENS = np.array([0.0, -2 * np.pi / 3, 2 * np.pi / 3])
+DESVIO_ANGULO = np.deg2rad(0.5)
+
+
+def gerar_dados_eletricos(timestamps, rng=None):
+    # rng: gerador do numpy (np.random.default_rng(semente)) para repetir a geração.
+    rng = np.random.default_rng() if rng is None else rng
+    n_pontos = len(timestamps)
+    def gerar_serie(base, amp, n):
+        tendencia = np.linspace(0, amp, n)
+        ruido = rng.normal(0, amp * 0.1, n)
+        return base + tendencia + ruido
+    dados = {
+        'Tensão Fase A': gerar_serie(125, 3, n_pontos), 'Tensão Fase B': gerar_serie(126, 2, n_pontos), 'Tensão Fase C': gerar_serie(124, 4, n_pontos),
+        'Corrente A': gerar_serie(10, 2, n_pontos), 'Corrente B': gerar_serie(9, 1.5, n_pontos), 'Corrente C': gerar_serie(11, 2.5, n_pontos),
+    }
+    # As potências são medidas pelo motor de formas de onda: cada minuto vira
+    # uma janela de 12 ciclos de tensão e corrente, com fator de potência
+    # variável (majoritariamente indutivo).
+    tensoes = np.stack([dados[f'Tensão Fase {fase}'] for fase in FASES])
+    correntes = np.stack([dados[f'Corrente {fase}'] for fase in FASES])
+    fp = np.clip(np.stack([gerar_serie(0.90, 0.05, n_pontos) for _ in FASES]), 0.5, 1.0)
+    angulos = np.arccos(fp) * np.where(rng.random(fp.shape) < 0.1, -1, 1)
+    # Conteúdo harmônico variável, típico de cargas não lineares.
+    carga_nao_linear = np.clip(rng.normal(1.0, 0.2, fp.shape), 0.3, 2.0)
+    harmonicos_v = {ordem: amplitude * carga_nao_linear for ordem, amplitude in {3: 0.015, 5: 0.025, 7: 0.01}.items()}
+    harmonicos_i = {ordem: amplitude * carga_nao_linear for ordem, amplitude in {3: 0.12, 5: 0.07, 7: 0.04, 11: 0.02, 13: 0.015}.items()}
+    defasagens = DEFASAGENS[:, None] + rng.normal(0, DESVIO_ANGULO, fp.shape)
+    amostras_janela = AMOSTRAS_POR_CICLO * CICLOS_POR_JANELA
+    # As janelas têm ciclos inteiros e começam todas na mesma fase, então os
+    # blocos formam um fluxo contínuo de amostras para a DFT deslizante.
+    estimador = DFTDeslizante((2, len(FASES)))
+    grandezas = {'p': [], 'q': [], 'espectro_v': [], 'espectro_i': [], 'thd_v': [], 'thd_i': [], 'linha': [], 'fasor_v': [], 'fasor_i': []}
+    for inicio in range(0, n_pontos, LINHAS_POR_BLOCO_ONDA):
+        fatia = slice(inicio, inicio + LINHAS_POR_BLOCO_ONDA)
+        v, i = sintetizar_formas_onda(
+            tensoes[:, fatia], correntes[:, fatia], angulos[:, fatia], defasagem=defasagens[:, fatia, None],
+            harmonicos_v={ordem: a[:, fatia] for ordem, a in harmonicos_v.items()},
+            harmonicos_i={ordem: a[:, fatia] for ordem, a in harmonicos_i.items()},
+        )
+        resultado = calcular_grandezas(v, i)
+        # Tensão e corrente das três fases em uma única chamada de FFT.
+        espectro, thd = analisar_harmonicos(np.stack([v, i]))
+        resultado.update({'espectro_v': espectro[0], 'espectro_i': espectro[1], 'thd_v': thd[0], 'thd_i': thd[1]})
+        # AB, BC e CA.
+        resultado['linha'] = valor_eficaz(dividir_em_janelas(v - np.roll(v, -1, axis=0), amostras_janela))
+        # Um fasor por janela, estimado sobre o seu último ciclo.
+        fasores = estimador.processar(np.stack([v, i]), passo=amostras_janela)
+        resultado.update({'fasor_v': fasores[0], 'fasor_i': fasores[1]})
+        for chave in grandezas:
+            grandezas[chave].append(resultado[chave])
+    grandezas = {chave: np.concatenate(partes, axis=1) for chave, partes in grandezas.items()}
+    espectros = {}
+    for k, fase in enumerate(FASES):
+        dados[f'Potência Ativa {fase}'] = grandezas['p'][k]
+        dados[f'Potência Reativa {fase}'] = grandezas['q'][k]
+        dados[f'THD Tensão {fase}'] = grandezas['thd_v'][k]
+        dados[f'THD Corrente {fase}'] = grandezas['thd_i'][k]
+        espectros[f'Tensão Fase {fase}'] = grandezas['espectro_v'][k]
+        espectros[f'Corrente {fase}'] = grandezas['espectro_i'][k]
+    for k, linha in enumerate(['AB', 'BC', 'CA']):
+        dados[f'Tensão Linha {linha}'] = grandezas['linha'][k]
+    dados.update(canais_fasoriais(grandezas['fasor_v'], grandezas['fasor_i']))
+    # Só os canais gravados, já no tipo do armazenamento; potência aparente e
+    # FP são derivados por janela (supervisorio/derivados.py).
+    dados = {canal: valores.astype(np.float32) for canal, valores in dados.items()}
+    espectros = {canal: valores.astype(np.float32) for canal, valores in espectros.items()}
+    return dados, espectros
+
+
+class FonteSintetica:
+    # Entrega os minutos que ainda não foram gerados, até o instante atual.
+    # Na primeira leitura (armazenamento vazio) cria `historico_inicial` minutos.
+    # Para cargas realistas e reprodutíveis em volume, ver supervisorio/simulador.py.
+    def __init__(self, historico_inicial=HISTORICO_INICIAL, semente=None):
+        self.historico_inicial = historico_inicial
+        self.rng = np.random.default_rng(semente)
+
+    def ler(self, ultimo):
+        agora = pd.Timestamp.now().floor('min')
+        if ultimo is None:
+            timestamps = pd.date_range(end=agora, periods=self.historico_inicial, freq='min')
+        else:
+            timestamps = pd.date_range(start=ultimo + pd.Timedelta(minutes=1), end=agora, freq='min')
+        if not len(timestamps):
+            return None
+        dados, espectros = gerar_dados_eletricos(timestamps, self.rng)
+        return timestamps, dados, espectros
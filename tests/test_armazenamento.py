@@ -0,0 +1,41 @@
+import shutil
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from supervisorio.armazenamento import ArmazenamentoSeries
+
+INICIO = pd.Timestamp("2026-01-05")
+LINHAS_POR_BLOCO = 100
+
+
+def criar_arquivado(diretorio, valor, linhas=3 * LINHAS_POR_BLOCO):
+    armazenamento = ArmazenamentoSeries(diretorio, canais=["Tensão Fase A"], dtype="float32")
+    tempos = pd.date_range(INICIO, periods=linhas, freq="s")
+    armazenamento.anexar(tempos, {"Tensão Fase A": np.full(linhas, valor)})
+    assert armazenamento.arquivar(LINHAS_POR_BLOCO) > 0
+    return armazenamento
+
+
+def test_armazenamento_recriado_no_mesmo_diretorio(tmp_path):
+    # Os blocos do novo armazenamento têm os mesmos nomes dos antigos; a
+    # leitura não pode vir dos blocos antigos decodificados em cache.
+    diretorio = str(tmp_path / "medidor")
+    antigo = criar_arquivado(diretorio, 100.0)
+    assert np.all(antigo.ler_janela(INICIO, INICIO + pd.Timedelta(seconds=10))["Tensão Fase A"] == 100.0)
+    shutil.rmtree(diretorio)
+    novo = criar_arquivado(diretorio, 200.0)
+    assert np.all(novo.ler_janela(INICIO, INICIO + pd.Timedelta(seconds=10))["Tensão Fase A"] == 200.0)
+
+
+def test_bloco_recusado_nao_desalinha_canais(tmp_path):
+    armazenamento = ArmazenamentoSeries(str(tmp_path), canais=["x", "y"])
+    armazenamento.anexar(pd.date_range(INICIO, periods=2, freq="s"), {"x": [0.0, 1.0], "y": [10.0, 11.0]})
+    # y com uma linha a menos: o bloco inteiro é recusado.
+    with pytest.raises(ValueError):
+        armazenamento.anexar(pd.date_range(INICIO + pd.Timedelta(seconds=2), periods=2, freq="s"), {"x": [4.0, 5.0], "y": [14.0]})
+    armazenamento.anexar(pd.date_range(INICIO + pd.Timedelta(seconds=2), periods=2, freq="s"), {"x": [6.0, 7.0], "y": [16.0, 17.0]})
+    df = ArmazenamentoSeries(str(tmp_path)).ler_janela()
+    np.testing.assert_array_equal(df["x"], [0.0, 1.0, 6.0, 7.0])
+    np.testing.assert_array_equal(df["y"], [10.0, 11.0, 16.0, 17.0])
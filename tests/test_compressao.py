@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from supervisorio.compressao import LIMITE_ESCALA, gravar_bloco, ler_bloco, resolucao
+
+LINHAS = 5000
+
+
+def gravar_e_ler(tmp_path, tempos, colunas):
+    caminho = str(tmp_path / "bloco.bin")
+    gravar_bloco(caminho, tempos, colunas, {canal: resolucao(canal) for canal in colunas})
+    lidas = {}
+    for canal, valores in colunas.items():
+        valores = np.asarray(valores)
+        largura = valores.shape[1] if valores.ndim > 1 else 1
+        lidas[canal] = ler_bloco(caminho, canal, valores.dtype, largura)
+        assert lidas[canal].shape == valores.shape and lidas[canal].dtype == valores.dtype
+    return ler_bloco(caminho), lidas
+
+
+def test_tempos_sem_perda(tmp_path):
+    # Amostragem regular com uma lacuna e alguns instantes fora do passo.
+    tempos = pd.date_range("2026-01-05", periods=LINHAS, freq="s").asi8.copy()
+    tempos[2000:] += 3600 * 10**9
+    tempos[[10, 11, 4000]] += [1, 999_999, 123]
+    lidos, _ = gravar_e_ler(tmp_path, tempos, {})
+    np.testing.assert_array_equal(lidos, tempos)
+    np.testing.assert_array_equal(gravar_e_ler(tmp_path, tempos[:1], {})[0], tempos[:1])
+
+
+def test_xor_exato_com_nao_finitos(tmp_path):
+    gerador = np.random.default_rng(0)
+    colunas = {
+        "Frequência": gerador.normal(60.0, 0.01, LINHAS),
+        "Espectro": gerador.normal(0.0, 1.0, (LINHAS, 3)).astype(np.float32),
+        # Acima de LIMITE_ESCALA em unidades da resolução: vai pelo XOR.
+        "Tensão Enorme": np.full(LINHAS, LIMITE_ESCALA * 1e-2 * 4),
+    }
+    colunas["Frequência"][[5, 6, 100]] = [np.nan, np.inf, -np.inf]
+    colunas["Espectro"][7, 1] = np.nan
+    _, lidas = gravar_e_ler(tmp_path, np.arange(LINHAS), colunas)
+    for canal, valores in colunas.items():
+        # Igualdade bit a bit, NaN incluídos.
+        np.testing.assert_array_equal(lidas[canal].view(f"u{valores.dtype.itemsize}"), valores.view(f"u{valores.dtype.itemsize}"))
+
+
+# Os NaN do começo da coluna não podem virar inteiros inválidos.
+@pytest.mark.filterwarnings("error::RuntimeWarning")
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_escala_dentro_de_meia_resolucao(tmp_path, dtype):
+    gerador = np.random.default_rng(1)
+    colunas = {
+        "Tensão Fase A": 220.0 + np.cumsum(gerador.normal(0.0, 0.3, LINHAS)),
+        "Corrente A": np.abs(gerador.normal(50.0, 20.0, LINHAS)),
+        "Potência Ativa A|media": gerador.normal(0.0, 5000.0, (LINHAS, 2)),
+        "Fator de Potência A": gerador.uniform(-1.0, 1.0, LINHAS),
+    }
+    colunas = {canal: valores.astype(dtype) for canal, valores in colunas.items()}
+    # Canal sem dado no começo, lacunas no meio e no fim.
+    colunas["Tensão Fase A"][:10] = np.nan
+    colunas["Tensão Fase A"][[500, 501, LINHAS - 1]] = np.nan
+    colunas["Corrente A"][42] = np.inf
+    colunas["Potência Ativa A|media"][300:400, 1] = np.nan
+    _, lidas = gravar_e_ler(tmp_path, np.arange(LINHAS), colunas)
+    for canal, valores in colunas.items():
+        finitos = np.isfinite(valores)
+        np.testing.assert_array_equal(np.isfinite(lidas[canal]), finitos)
+        np.testing.assert_array_equal(lidas[canal][~finitos], valores[~finitos])
+        erro = np.abs(lidas[canal][finitos].astype(np.float64) - valores[finitos])
+        # Meia resolução, mais o arredondamento do dtype na volta.
+        assert erro.max() <= resolucao(canal) / 2 + np.finfo(dtype).eps * np.abs(valores[finitos]).max()
+
+
+def test_canal_com_resolucao_so_com_nan(tmp_path):
+    valores = np.full(LINHAS, np.nan, dtype=np.float32)
+    _, lidas = gravar_e_ler(tmp_path, np.arange(LINHAS), {"Tensão Fase B": valores})
+    assert np.isnan(lidas["Tensão Fase B"]).all()
+
+
+def test_canal_ausente_no_bloco(tmp_path):
+    caminho = str(tmp_path / "bloco.bin")
+    gravar_bloco(caminho, np.arange(10), {"Tensão Fase A": np.zeros(10)})
+    assert np.isnan(ler_bloco(caminho, "Corrente A", np.float32, 3)).all()
+    assert ler_bloco(caminho, "Corrente A", np.float32, 3).shape == (10, 3)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from supervisorio.armazenamento import ArmazenamentoSeries
+from supervisorio.eventos import DetectorEventos
+
+INICIO = pd.Timestamp("2026-01-05")
+CANAIS = ["Tensão Fase A", "Corrente A"]
+
+
+def bloco(k, linhas=600):
+    # Um afundamento de 5 s a cada minuto e uma sobrecorrente no fim do
+    # bloco, que continua aberta no seguinte.
+    tempos = pd.date_range(INICIO + pd.Timedelta(seconds=k * linhas), periods=linhas, freq="s")
+    tensao = np.full(linhas, 127.0)
+    tensao[np.arange(linhas) % 60 < 5] = 100.0
+    corrente = np.full(linhas, 10.0)
+    corrente[-10:] = 20.0
+    corrente[:10] = 20.0
+    return tempos, {"Tensão Fase A": tensao, "Corrente A": corrente}
+
+
+def gravar(diretorio, blocos):
+    armazenamento = ArmazenamentoSeries(diretorio + "/bruto", canais=CANAIS)
+    detector = DetectorEventos(diretorio + "/eventos", CANAIS)
+    detector.sincronizar(armazenamento)
+    for k in blocos:
+        tempos, dados = bloco(k)
+        armazenamento.anexar(tempos, dados)
+        detector.anexar(tempos, dados)
+    return armazenamento, detector
+
+
+def test_sincronizar_apos_queda_entre_eventos_e_pendente(tmp_path, monkeypatch):
+    _, referencia = gravar(str(tmp_path / "referencia"), range(4))
+    diretorio = str(tmp_path / "queda")
+    armazenamento, detector = gravar(diretorio, range(2))
+    # O processo cai depois de gravar os eventos do bloco, antes de salvar
+    # o estado pendente.
+    tempos, dados = bloco(2)
+    armazenamento.anexar(tempos, dados)
+
+    def cair(self):
+        raise RuntimeError("queda")
+
+    with monkeypatch.context() as m:
+        m.setattr(DetectorEventos, "_salvar_pendente", cair)
+        with pytest.raises(RuntimeError):
+            detector.anexar(tempos, dados)
+    # Reabrir varre de novo o bloco; depois a ingestão continua.
+    _, detector = gravar(diretorio, [3])
+    pd.testing.assert_frame_equal(detector.consultar(), referencia.consultar())
+    assert detector.pendente == referencia.pendente
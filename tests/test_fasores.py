@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from supervisorio.fasores import OPERADOR_A, DFTDeslizante, canais_fasoriais, componentes_simetricas
+from supervisorio.potencia import AMOSTRAS_POR_CICLO
+
+N = AMOSTRAS_POR_CICLO
+
+
+def senoide(eficaz, graus, ciclos=4):
+    # √2·V·sen(ωt + θ): fasor V∠θ, com referência seno.
+    fase = 2 * np.pi * np.arange(N * ciclos) / N
+    return np.sqrt(2) * np.asarray(eficaz)[..., None] * np.sin(fase + np.radians(graus)[..., None])
+
+
+def test_modulo_e_angulo_depois_do_primeiro_ciclo():
+    eficazes, graus = np.array([220.0, 127.0, 10.0]), np.array([0.0, -120.0, 75.0])
+    fasores = DFTDeslizante(forma=(3,)).processar(senoide(eficazes, graus))
+    # O primeiro ciclo ainda mistura os zeros iniciais da janela.
+    completos = fasores[:, N - 1:]
+    np.testing.assert_allclose(np.abs(completos), np.repeat(eficazes[:, None], completos.shape[1], axis=1), rtol=1e-9)
+    np.testing.assert_allclose(np.angle(completos, deg=True), np.repeat(graus[:, None], completos.shape[1], axis=1), atol=1e-7)
+
+
+@pytest.mark.parametrize("passo", [1, 16, N])
+def test_blocos_e_ressincronia_nao_mudam_o_resultado(passo):
+    amostras = senoide(np.array([220.0]), np.array([30.0]), ciclos=10) + 0.5 * np.random.default_rng(0).normal(size=10 * N)
+    inteiro = DFTDeslizante(forma=(1,)).processar(amostras, passo=passo)
+    # Blocos de tamanhos irregulares (múltiplos do passo) e soma recalculada a cada 3 ciclos.
+    dft = DFTDeslizante(forma=(1,), ressincronia=3 * N)
+    cortes = np.array([0, 2, 5, 6, 10]) * N
+    partes = [dft.processar(amostras[:, a:b], passo=passo) for a, b in zip(cortes[:-1], cortes[1:])]
+    np.testing.assert_allclose(np.concatenate(partes, axis=-1), inteiro, atol=1e-9)
+
+
+def test_componentes_de_conjunto_equilibrado():
+    fasores = 220.0 * np.exp(1j * np.radians([10.0, -110.0, 130.0]))
+    positiva, negativa, zero = componentes_simetricas(fasores)
+    assert positiva == pytest.approx(220.0 * np.exp(1j * np.radians(10.0)))
+    assert abs(negativa) == pytest.approx(0.0, abs=1e-9)
+    assert abs(zero) == pytest.approx(0.0, abs=1e-9)
+
+
+def test_componentes_de_conjunto_desequilibrado():
+    v1, v2, v0 = 220.0 * np.exp(0.2j), 11.0 * np.exp(-1.0j), 4.0 * np.exp(2.5j)
+    a, a2 = OPERADOR_A, OPERADOR_A ** 2
+    fasores = np.array([v1 + v2 + v0, a2 * v1 + a * v2 + v0, a * v1 + a2 * v2 + v0])
+    np.testing.assert_allclose(componentes_simetricas(fasores), [v1, v2, v0])
+
+    canais = canais_fasoriais(fasores, fasores / 22.0)
+    assert canais["Tensão Sequência Positiva"] == pytest.approx(220.0)
+    assert canais["Tensão Sequência Negativa"] == pytest.approx(11.0)
+    assert canais["Tensão Sequência Zero"] == pytest.approx(4.0)
+    assert canais["Corrente Sequência Negativa"] == pytest.approx(0.5)
+    assert canais["Desequilíbrio de Tensão"] == pytest.approx(5.0)
+    # Ângulos em relação à Tensão Fase A.
+    assert canais["Ângulo Tensão A"] == pytest.approx(0.0)
+    assert canais["Ângulo Tensão B"] == pytest.approx(np.angle(fasores[1] / fasores[0], deg=True))
+    assert canais["Ângulo Corrente C"] == pytest.approx(np.angle(fasores[2] / fasores[0], deg=True))
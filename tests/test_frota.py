@@ -0,0 +1,109 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from supervisorio import frota as frota_modulo
+from supervisorio.catalogo import nome_medidor, registrar_medidores
+from supervisorio.frota import ServicoFrota
+from supervisorio.servico import ServicoIngestao
+from supervisorio.simulador import SimuladorCarga
+
+INICIO = pd.Timestamp("2026-01-05")
+BLOCO = pd.Timedelta(minutes=1)
+
+
+def ingerir_blocos(diretorio, primeiro, blocos):
+    # Escritor: blocos de um minuto do medidor 0 do simulador.
+    simulador = SimuladorCarga(0, 1)
+    servico = ServicoIngestao(diretorio, fonte=None)
+    for k in range(primeiro, primeiro + blocos):
+        tempos, dados = simulador.gerar(simulador.medidores[0], INICIO + k * BLOCO, INICIO + (k + 1) * BLOCO)
+        servico.ingerir(pd.DatetimeIndex(tempos), dados)
+
+
+def arquivos(diretorio):
+    # {caminho: (tamanho, mtime)} de tudo o que há no diretório do medidor.
+    estado = {}
+    for raiz, _, nomes in os.walk(diretorio):
+        for nome in nomes:
+            informacoes = os.stat(os.path.join(raiz, nome))
+            estado[os.path.join(raiz, nome)] = (informacoes.st_size, informacoes.st_mtime_ns)
+    return estado
+
+
+@pytest.fixture
+def frota(tmp_path):
+    medidor = nome_medidor(0)
+    registrar_medidores(str(tmp_path), {medidor: {"site": "site_00"}})
+    ingerir_blocos(str(tmp_path / medidor), 0, 5)
+    return str(tmp_path), medidor
+
+
+def test_medidor_sem_fonte_nao_e_alterado(frota):
+    diretorio, medidor = frota
+    antes = arquivos(os.path.join(diretorio, medidor))
+    servico = ServicoFrota(diretorio, abertos=1).servico(medidor)
+    assert servico.somente_leitura
+    assert servico.instantaneo.ultimo_timestamp == INICIO + 5 * BLOCO - pd.Timedelta(seconds=1)
+    assert servico.piramide.consultar(INICIO, INICIO + 5 * BLOCO, ["Tensão Fase A"], resolucao="1min")[1].shape[0] == 5
+    with pytest.raises(ValueError):
+        servico.ingerir(pd.DatetimeIndex([INICIO + 10 * BLOCO]), {})
+    assert arquivos(os.path.join(diretorio, medidor)) == antes
+
+
+def test_leitura_enquanto_outro_processo_grava(frota):
+    diretorio, medidor = frota
+    escritor = multiprocessing.get_context("spawn").Process(target=ingerir_blocos, args=(os.path.join(diretorio, medidor), 5, 60))
+    escritor.start()
+    # abertos=0: cada chamada abre o medidor de novo, enquanto ele cresce.
+    frota = ServicoFrota(diretorio, abertos=0)
+    ultimos = []
+    while escritor.is_alive():
+        servico = frota.servico(medidor)
+        ultimos.append(servico.instantaneo.ultimo_timestamp)
+        servico.piramide.consultar(INICIO, ultimos[-1], ["Tensão Fase A"])
+    escritor.join()
+    assert escritor.exitcode == 0
+    assert ultimos == sorted(ultimos)
+    assert frota.servico(medidor).instantaneo.ultimo_timestamp == INICIO + 65 * BLOCO - pd.Timedelta(seconds=1)
+
+
+def test_medidor_vazio_e_reaberto(tmp_path):
+    diretorio, medidor = str(tmp_path), nome_medidor(0)
+    registrar_medidores(diretorio, {medidor: {"site": "site_00"}})
+    frota = ServicoFrota(diretorio, abertos=1)
+    assert frota.servico(medidor).instantaneo.ultimo_timestamp is None
+    ingerir_blocos(os.path.join(diretorio, medidor), 0, 1)
+    assert frota.servico(medidor).instantaneo.ultimo_timestamp == INICIO + BLOCO - pd.Timedelta(seconds=1)
+
+
+def test_abertura_nao_bloqueia_outros_medidores(frota, monkeypatch):
+    diretorio, medidor = frota
+    lento = nome_medidor(1)
+    registrar_medidores(diretorio, {lento: {"site": "site_00"}})
+    ingerir_blocos(os.path.join(diretorio, lento), 0, 1)
+    liberar = threading.Event()
+
+    def abrir(diretorio_medidor, *args, **kwargs):
+        if os.path.basename(diretorio_medidor) == lento:
+            liberar.wait()
+        return ServicoIngestao(diretorio_medidor, *args, **kwargs)
+
+    monkeypatch.setattr(frota_modulo, "ServicoIngestao", abrir)
+    frota = ServicoFrota(diretorio, abertos=2)
+    with ThreadPoolExecutor(3) as executor:
+        abrindo = [executor.submit(frota.servico, lento) for _ in range(2)]
+        try:
+            # Enquanto as duas aberturas do medidor lento esperam, outro medidor abre.
+            assert executor.submit(frota.servico, medidor).result(timeout=30).instantaneo.ultimo_timestamp is not None
+            assert not any(f.done() for f in abrindo)
+        finally:
+            liberar.set()
+        servicos = [f.result() for f in abrindo]
+    # Só um dos serviços abertos em paralelo fica no LRU.
+    assert frota.servico(lento) in servicos
+    assert list(frota._lidos) == [medidor, lento]
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+
+from supervisorio.harmonicos import analisar_harmonicos
+from supervisorio.potencia import AMOSTRAS_POR_CICLO, CICLOS_POR_JANELA
+
+
+def sinal(harmonicos, janelas=2, fundamental=100.0):
+    # harmonicos: {ordem: (amplitude relativa, fase)}; valores eficazes.
+    fase = 2 * np.pi * np.arange(AMOSTRAS_POR_CICLO * CICLOS_POR_JANELA * janelas) / AMOSTRAS_POR_CICLO
+    x = np.sin(fase)
+    for ordem, (amplitude, defasagem) in harmonicos.items():
+        x = x + amplitude * np.sin(ordem * fase + defasagem)
+    return np.sqrt(2) * fundamental * x
+
+
+def test_espectro_e_thd_de_harmonicos_conhecidos():
+    harmonicos = {3: (0.2, 0.5), 5: (0.1, 1.0), 7: (0.05, -2.0), 50: (0.01, 0.0)}
+    espectro, thd = analisar_harmonicos(sinal(harmonicos))
+    assert espectro.shape == (2, 50)
+    esperado = np.zeros(50)
+    esperado[0] = 100.0
+    for ordem, (amplitude, _) in harmonicos.items():
+        esperado[ordem - 1] = 100.0 * amplitude
+    np.testing.assert_allclose(espectro, np.broadcast_to(esperado, espectro.shape), atol=1e-9)
+    np.testing.assert_allclose(thd, np.hypot.reduce([0.2, 0.1, 0.05, 0.01]) * 100)
+
+
+def test_eixos_iniciais_e_sinal_nulo():
+    # (fases, amostras): uma senoide pura, uma distorcida e um sinal nulo.
+    sinais = np.stack([sinal({}), sinal({3: (0.3, 0.0)}), np.zeros(AMOSTRAS_POR_CICLO * CICLOS_POR_JANELA * 2)])
+    espectro, thd = analisar_harmonicos(sinais)
+    assert espectro.shape == (3, 2, 50)
+    np.testing.assert_allclose(thd[:2], [[0.0, 0.0], [30.0, 30.0]], atol=1e-9)
+    assert np.isnan(thd[2]).all()
+
+
+def test_ordem_acima_de_nyquist():
+    with pytest.raises(ValueError):
+        analisar_harmonicos(sinal({}), ordem_maxima=AMOSTRAS_POR_CICLO // 2)
@@ -0,0 +1,77 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from supervisorio.importacao import detectar_coluna_tempo, ler_blocos_csv, sugerir_mapeamento
+from supervisorio.servico import ServicoIngestao
+
+INICIO = pd.Timestamp("2026-01-05")
+CANAIS = ["Tensão Fase A", "Corrente A", "Fator de Potência B"]
+
+
+def instante(segundos):
+    return (INICIO + pd.Timedelta(seconds=segundos)).value
+
+
+def test_mapeamento_e_coluna_de_tempo():
+    colunas = ["Medidor", "DataHora", "TENSAO_FASE_A", "Ia", "pf_b", "Temperatura"]
+    assert detectar_coluna_tempo(colunas) == "DataHora"
+    assert detectar_coluna_tempo(["t", "Va"]) == "t"
+    assert sugerir_mapeamento(colunas, CANAIS) == {
+        "Medidor": None, "DataHora": None, "TENSAO_FASE_A": "Tensão Fase A", "Ia": "Corrente A",
+        "pf_b": "Fator de Potência B", "Temperatura": None,
+    }
+    # Apelido de um canal que não está na lista.
+    assert sugerir_mapeamento(["Vb"], CANAIS) == {"Vb": None}
+
+
+def test_leitura_em_blocos_ordena_e_remove_repetidos():
+    texto = (
+        "DataHora;Va;Ia;Temperatura\n"
+        "2026-01-05 00:00:02;220,5;10,0;30\n"
+        "2026-01-05 00:00:00;219,0;9,0;30\n"
+        "inválido;1,0;1,0;30\n"
+        "2026-01-05 00:00:00;219,5;9,5;30\n"
+        "2026-01-05 00:00:01;;11,0;30\n"
+        "2026-01-05 00:00:05;221,0;12,0;30\n"
+    )
+    mapeamento = {"Va": "Tensão Fase A", "Ia": "Corrente A", "Temperatura": None}
+    blocos = list(ler_blocos_csv(io.StringIO(texto), "DataHora", mapeamento, separador=";", decimal=",", linhas_por_bloco=5))
+    assert len(blocos) == 2
+    tempos, dados = blocos[0]
+    # No bloco: ordenado, sem a linha inválida e com a última ocorrência do repetido.
+    np.testing.assert_array_equal(tempos, [instante(0), instante(1), instante(2)])
+    assert set(dados) == {"Tensão Fase A", "Corrente A"}
+    assert dados["Tensão Fase A"].dtype == np.float32
+    np.testing.assert_array_equal(dados["Tensão Fase A"], np.float32([219.5, np.nan, 220.5]))
+    np.testing.assert_array_equal(dados["Corrente A"], np.float32([9.5, 11.0, 10.0]))
+    np.testing.assert_array_equal(blocos[1][0], [instante(5)])
+
+
+def test_importacao_junta_arquivos_e_historico(tmp_path):
+    servico = ServicoIngestao(str(tmp_path), fonte=None)
+    # Histórico gravado: 10 a 19 s, só com tensão.
+    gravados = pd.date_range(INICIO + pd.Timedelta(seconds=10), periods=10, freq="s")
+    vazios = {c: np.full(10, np.nan, dtype=np.float32) for c in servico.armazenamento.canais}
+    servico.ingerir(gravados, {**vazios, "Tensão Fase A": np.full(10, 220.0, dtype=np.float32)})
+
+    def arquivo(segundos, dados):
+        return [(np.array([instante(s) for s in segundos]), {c: np.float32(v) for c, v in dados.items()})]
+
+    # Primeiro arquivo: 0 a 14 s; o segundo, de 5 a 24 s, tem outro valor de
+    # corrente nos instantes em comum e a tensão que falta nos novos; o
+    # terceiro volta no tempo entre blocos e tem a linha fora de ordem descartada.
+    primeiro = arquivo(range(15), {"Tensão Fase A": [100.0] * 15, "Corrente A": [1.0] * 15})
+    segundo = arquivo(range(5, 25), {"Tensão Fase A": [200.0] * 20, "Corrente A": [2.0] * 20})
+    terceiro = arquivo([30, 31], {"Corrente A": [3.0, 3.0]}) + arquivo([29], {"Corrente A": [9.0]})
+    resultado = servico.importar([primeiro, segundo, terceiro])
+    assert resultado == {"lidas": 38, "importadas": 17, "descartadas": 21}
+
+    df = servico.armazenamento.ler_janela(INICIO, INICIO + pd.Timedelta(minutes=1), ["Tensão Fase A", "Corrente A"])
+    esperados = list(range(25)) + [30, 31]
+    np.testing.assert_array_equal(df.index.asi8, [instante(s) for s in esperados])
+    tensao = {s: 100.0 if s < 10 else 220.0 if s < 20 else 200.0 for s in range(25)}
+    corrente = {s: 1.0 if s < 15 else 2.0 for s in range(25)}
+    np.testing.assert_array_equal(df["Tensão Fase A"], [tensao.get(s, np.nan) for s in esperados])
+    np.testing.assert_array_equal(df["Corrente A"], [corrente.get(s, 3.0) for s in esperados])
@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from supervisorio.armazenamento import ArmazenamentoSeries
+from supervisorio.piramide import NivelRollup, PiramideRollup
+
+INICIO = pd.Timestamp("2026-01-05")
+CANAIS = ["Tensão Fase A", "Corrente A"]
+
+
+def bloco(k, linhas=900):
+    tempos = pd.date_range(INICIO + pd.Timedelta(seconds=k * linhas), periods=linhas, freq="s")
+    gerador = np.random.default_rng(k)
+    return tempos, {c: gerador.normal(100.0, 5.0, linhas) for c in CANAIS}
+
+
+def gravar(diretorio, blocos):
+    armazenamento = ArmazenamentoSeries(diretorio, canais=CANAIS)
+    piramide = PiramideRollup(armazenamento)
+    for k in blocos:
+        tempos, dados = bloco(k)
+        armazenamento.anexar(tempos, dados)
+        piramide.anexar(tempos, dados)
+    return piramide
+
+
+def comparar(piramide, referencia):
+    for nivel, esperado in zip(piramide.niveis, referencia.niveis):
+        pd.testing.assert_frame_equal(nivel.armazenamento.ler_janela(), esperado.armazenamento.ler_janela())
+        assert nivel.pendente == esperado.pendente
+
+
+# (nível, etapa): o processo cai ao entrar em anexar do nível (os anteriores
+# já gravaram tudo) ou logo depois de o nível gravar seus intervalos
+# fechados, antes de salvar o estado pendente.
+@pytest.mark.parametrize("queda", [("10s", "_salvar_pendente"), ("1min", "anexar"), ("1min", "_salvar_pendente"), ("15min", "anexar")])
+def test_sincronizar_apos_queda(tmp_path, monkeypatch, queda):
+    referencia = gravar(str(tmp_path / "referencia"), range(4))
+    diretorio = str(tmp_path / "queda")
+    piramide = gravar(diretorio, range(2))
+    tempos, dados = bloco(2)
+    piramide.armazenamento.anexar(tempos, dados)
+
+    nome, metodo = queda
+    original = getattr(NivelRollup, metodo)
+
+    def cair(self, *args):
+        if self.nome == nome:
+            raise RuntimeError("queda")
+        return original(self, *args)
+
+    with monkeypatch.context() as m:
+        m.setattr(NivelRollup, metodo, cair)
+        with pytest.raises(RuntimeError):
+            piramide.anexar(tempos, dados)
+    # Reabrir sincroniza cada nível com o que falta; depois a ingestão continua.
+    comparar(gravar(diretorio, [3]), referencia)
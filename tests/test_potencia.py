@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+
+from supervisorio.potencia import AMOSTRAS_POR_CICLO, CAPACITIVO, CICLOS_POR_JANELA, INDUTIVO, calcular_grandezas
+
+VRMS = 220.0
+IRMS = 10.0
+
+
+def senoides(angulo, janelas=3, defasagem=0.3):
+    # Corrente atrasada de `angulo` radianos; a defasagem inicial não deve
+    # mudar nada, pois as janelas cobrem ciclos inteiros.
+    fase = 2 * np.pi * np.arange(AMOSTRAS_POR_CICLO * CICLOS_POR_JANELA * janelas) / AMOSTRAS_POR_CICLO + defasagem
+    return np.sqrt(2) * VRMS * np.sin(fase), np.sqrt(2) * IRMS * np.sin(fase - angulo)
+
+
+@pytest.mark.parametrize("graus", [0.0, 30.0, 90.0, -45.0, 180.0])
+def test_grandezas_de_senoide_com_fase_conhecida(graus):
+    angulo = np.radians(graus)
+    v, i = senoides(angulo)
+    grandezas = calcular_grandezas(v, i)
+    assert grandezas["vrms"].shape == (3,)
+    np.testing.assert_allclose(grandezas["vrms"], VRMS)
+    np.testing.assert_allclose(grandezas["irms"], IRMS)
+    np.testing.assert_allclose(grandezas["p"], VRMS * IRMS * np.cos(angulo), atol=1e-6)
+    np.testing.assert_allclose(grandezas["q"], VRMS * IRMS * np.sin(angulo), atol=1e-6)
+    np.testing.assert_allclose(grandezas["s"], VRMS * IRMS)
+    np.testing.assert_allclose(grandezas["fp"], abs(np.cos(angulo)), atol=1e-9)
+    # Com Q nulo (0° e 180°) a natureza não é definida.
+    if graus % 180:
+        assert (grandezas["natureza"] == (INDUTIVO if graus > 0 else CAPACITIVO)).all()
+
+
+def test_eixos_iniciais_e_amostras_que_sobram():
+    # (medidores, fases, amostras), com meia janela a mais no final.
+    angulos = np.radians([[0.0, 30.0, -60.0], [10.0, 20.0, 45.0]])
+    v, i = senoides(angulos[..., None], janelas=2)
+    meia = AMOSTRAS_POR_CICLO * CICLOS_POR_JANELA // 2
+    v = np.concatenate([v, v[..., :meia]], axis=-1)
+    i = np.concatenate([i, i[..., :meia]], axis=-1)
+    grandezas = calcular_grandezas(np.broadcast_to(v, i.shape), i)
+    assert grandezas["p"].shape == (2, 3, 2)
+    np.testing.assert_allclose(grandezas["p"], np.repeat(VRMS * IRMS * np.cos(angulos)[..., None], 2, axis=-1), atol=1e-6)
+    np.testing.assert_allclose(grandezas["q"], np.repeat(VRMS * IRMS * np.sin(angulos)[..., None], 2, axis=-1), atol=1e-6)
+
+
+def test_sem_corrente():
+    v, _ = senoides(0.0, janelas=1)
+    grandezas = calcular_grandezas(v, np.zeros_like(v))
+    assert grandezas["s"][0] == 0
+    assert grandezas["fp"][0] == 1.0
@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from supervisorio.alinhamento import marcar_lacunas
+from supervisorio.reducao import reduzir
+
+INICIO = pd.Timestamp("2026-01-05")
+
+
+@pytest.mark.parametrize("modo", ["minmax", "lttb"])
+def test_reducao_mantem_lacunas(modo):
+    # 3000 minutos com uma falta de 300 minutos no meio.
+    tempos = pd.date_range(INICIO, periods=3300, freq="min").delete(slice(1500, 1800))
+    gerador = np.random.default_rng(0)
+    df = pd.DataFrame({"A": gerador.normal(127, 1, 3000), "B": gerador.normal(127, 1, 3000)}, index=tempos)
+    marcado = marcar_lacunas(df, pd.Timedelta(minutes=1))
+    x, y = reduzir(marcado.index.values, marcado.to_numpy(), 1000, modo)
+    assert len(x) < 1100
+    for j in range(y.shape[1]):
+        presentes = ~np.isnan(y[:, j])
+        # A falta continua marcada por um NaN, e nenhuma linha a atravessa.
+        assert (~presentes).sum() == 1
+        ligados = presentes[1:] & presentes[:-1]
+        assert np.diff(x[:, j])[ligados].max() < np.timedelta64(300, "m")
+
+
+def serie(n=10_000, k=3, semente=1):
+    tempos = pd.date_range(INICIO, periods=n, freq="s").values
+    return tempos, np.random.default_rng(semente).normal(127, 1, (n, k))
+
+
+@pytest.mark.parametrize("modo", ["minmax", "lttb"])
+def test_reducao_mantem_extremos_e_pontas(modo):
+    x, y = serie()
+    # Um afundamento e um pico de uma amostra, em colunas e lugares diferentes.
+    y[3333, 0], y[7777, 1], y[5, 2] = 80.0, 180.0, 60.0
+    xr, yr = reduzir(x, y, 1000, modo)
+    assert xr.shape == yr.shape and len(xr) <= 1000
+    for j in range(y.shape[1]):
+        # Cada ponto é uma amostra original, em ordem.
+        posicoes = np.searchsorted(x, xr[:, j])
+        np.testing.assert_array_equal(x[posicoes], xr[:, j])
+        np.testing.assert_array_equal(y[posicoes, j], yr[:, j])
+        assert (np.diff(posicoes) > 0).all()
+        assert posicoes[0] == 0 and posicoes[-1] == len(x) - 1
+        assert yr[:, j].min() == y[:, j].min() and yr[:, j].max() == y[:, j].max()
+
+
+def test_envelope_mantem_extremos_de_cada_intervalo():
+    x, y = serie(n=9_999)
+    xr, yr = reduzir(x, y, 500, "minmax")
+    # Fora as pontas, intervalos de tamanho fixo; o último pode ser menor.
+    tamanho = -(-(len(x) - 2) // 249)
+    for j in range(y.shape[1]):
+        intervalos = np.r_[-1, np.arange(len(x) - 2) // tamanho, -2]
+        escolhidos = intervalos[np.searchsorted(x, xr[:, j])]
+        for intervalo in range(intervalos[-2] + 1):
+            valores = y[intervalos == intervalo, j]
+            assert set(yr[escolhidos == intervalo, j]) >= {valores.min(), valores.max()}
+
+
+@pytest.mark.parametrize("modo", ["minmax", "lttb"])
+def test_serie_curta_nao_e_reduzida(modo):
+    x, y = serie(n=800)
+    xr, yr = reduzir(x, y, 1000, modo)
+    np.testing.assert_array_equal(yr, y)
+    np.testing.assert_array_equal(xr[:, 0], x)
@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from supervisorio.servico import ServicoIngestao
+from supervisorio.simulador import SimuladorCarga
+
+INICIO = pd.Timestamp("2026-01-05")
+FIM = INICIO + pd.Timedelta(minutes=10)
+
+
+def test_importacao_em_timestamps_gravados_renova_derivados(tmp_path):
+    simulador = SimuladorCarga(0, 1)
+    tempos, dados = simulador.gerar(simulador.medidores[0], INICIO, FIM)
+    corrente = np.asarray(dados["Corrente A"])
+    servico = ServicoIngestao(str(tmp_path), fonte=None)
+    servico.ingerir(pd.DatetimeIndex(tempos), {**dados, "Corrente A": np.full(len(tempos), np.nan)})
+    assert servico.leitura.ler_janela(INICIO, FIM, ["Potência Aparente A"])["Potência Aparente A"].isna().all()
+
+    # Mesmos instantes: primeiro, último e número de linhas não mudam.
+    servico.importar([[(np.asarray(tempos, dtype=np.int64), {"Corrente A": corrente})]])
+    aparente = servico.leitura.ler_janela(INICIO, FIM, ["Potência Aparente A"])["Potência Aparente A"]
+    esperada = np.asarray(dados["Tensão Fase A"], dtype=np.float32) * corrente.astype(np.float32)
+    np.testing.assert_allclose(aparente.to_numpy(), esperada, rtol=1e-6)